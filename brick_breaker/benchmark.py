@@ -0,0 +1,151 @@
+# benchmark.py - Headless performance scenarios for Brick Breaker
+#
+# Runs scripted scenarios against the real Game with SDL's dummy video
+# driver and reports frames/second plus update and draw percentiles as
+# JSON, e.g.  python benchmark.py --frames 600 --output results.json
+import argparse
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from config import *
+from game import Game
+from profiler import percentile
+
+
+def setup_multiball(game, balls=50):
+    """Level 1 with 50 balls in play after chained multiball pickups"""
+    game.seed(1)
+    game.reset_game()
+    game.lives = 1000
+    game.balls[0].launch()
+    while len(game.balls) < balls:
+        game.create_extra_balls(min(3, balls - len(game.balls)))
+
+
+def script_multiball(game, frame, balls=50):
+    """Chain another multiball whenever balls are lost"""
+    if game.balls and len(game.balls) < balls:
+        game.create_extra_balls(balls - len(game.balls))
+
+
+def setup_full_field(game):
+    """Level 3 with every brick standing and the ball held on the paddle"""
+    game.seed(2)
+    game.reset_game()
+    game.load_level(2)
+
+
+def setup_particles(game):
+    """Level 1 in play with a screen full of particles"""
+    game.seed(3)
+    game.reset_game()
+    game.particles.budget = 5000
+    game.lives = 1000
+    game.balls[0].launch()
+
+
+def script_particles(game, frame, count=5000):
+    """Top the particle count back up to `count` in bursts across the screen"""
+    missing = count - len(game.particles)
+    if missing <= 0:
+        return
+
+    bursts = 10
+    for burst in range(bursts):
+        x = (burst * 79 + frame * 7) % SCREEN_WIDTH
+        y = (burst * 53 + frame * 3) % SCREEN_HEIGHT
+        game.particles.add_brick_break(x, y, YELLOW, missing // bursts + 1)
+
+
+def script_none(game, frame):
+    """Leave the scenario alone"""
+
+
+SCENARIOS = {
+    "multiball_50": (setup_multiball, script_multiball),
+    "full_field": (setup_full_field, script_none),
+    "particles_5000": (setup_particles, script_particles),
+}
+
+
+def run_scenario(name, frames):
+    """Run one scenario for a number of frames and return its results"""
+    setup, script = SCENARIOS[name]
+
+    game = Game()
+    game.state = "playing"
+    setup(game)
+
+    update_times = []
+    draw_times = []
+    for frame in range(frames):
+        script(game, frame)
+        if game.state != "playing":
+            # Level cleared or lost; start the scenario over
+            setup(game)
+            game.state = "playing"
+
+        # The paddle follows the first ball
+        mouse_x = game.balls[0].rect.centerx if game.balls else None
+
+        start = time.perf_counter()
+        game.update_game(mouse_x)
+        updated = time.perf_counter()
+        game.draw()
+        drawn = time.perf_counter()
+
+        update_times.append(updated - start)
+        draw_times.append(drawn - updated)
+
+    return summarize(name, update_times, draw_times)
+
+
+def summarize(name, update_times, draw_times):
+    """Frames/second and per-phase percentiles in milliseconds"""
+    total = sum(update_times) + sum(draw_times)
+    result = {"scenario": name, "frames": len(update_times),
+              "fps": len(update_times) / total if total else 0.0}
+    for phase, times in (("update", update_times), ("draw", draw_times)):
+        ordered = sorted(times)
+        result[phase] = {
+            "p50_ms": percentile(ordered, 0.50) * 1000,
+            "p95_ms": percentile(ordered, 0.95) * 1000,
+            "p99_ms": percentile(ordered, 0.99) * 1000,
+            "mean_ms": sum(ordered) / len(ordered) * 1000,
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Brick Breaker benchmarks")
+    parser.add_argument("--frames", type=int, default=600,
+                        help="frames to run per scenario")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="scenario to run (repeatable, default: all)")
+    parser.add_argument("--output", metavar="FILE",
+                        help="write the JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    results = []
+    for name in args.scenario or SCENARIOS:
+        result = run_scenario(name, args.frames)
+        results.append(result)
+        print(f"{name:<16}{result['fps']:>9.1f} fps  "
+              f"update p95 {result['update']['p95_ms']:.2f} ms  "
+              f"draw p95 {result['draw']['p95_ms']:.2f} ms", file=sys.stderr)
+
+    report = json.dumps({"game": "brick_breaker", "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 import pygame
 from config import *
+from resources import get_font
+from ui import text_cache
 
 
 class Brick:
@@ -22,21 +24,18 @@ class Brick:
 
         # Draw hit counter for tough bricks
         if self.type == BRICK_TOUGH:
-            font = pygame.font.Font(None, 20)
             hits_left = self.hits_needed - self.hits
-            text = font.render(str(hits_left), True, WHITE)
+            text = text_cache.render(get_font(20), str(hits_left), WHITE)
             text_rect = text.get_rect(center=self.rect.center)
             screen.blit(text, text_rect)
         # Draw "P" for power-up bricks
         elif self.type == BRICK_POWERUP:
-            font = pygame.font.Font(None, 24)
-            text = font.render("P", True, WHITE)
+            text = text_cache.render(get_font(24), "P", WHITE)
             text_rect = text.get_rect(center=self.rect.center)
             screen.blit(text, text_rect)
         # Draw "U" for unbreakable bricks
         elif self.type == BRICK_UNBREAKABLE:
-            font = pygame.font.Font(None, 24)
-            text = font.render("U", True, WHITE)
+            text = text_cache.render(get_font(24), "U", WHITE)
             text_rect = text.get_rect(center=self.rect.center)
             screen.blit(text, text_rect)
 
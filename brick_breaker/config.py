@@ -91,16 +91,42 @@ POWERUP_NAMES = {
     POWERUP_EXTRA_LIFE: "EXTRA LIFE"
 }
 
+# Particles
+PARTICLE_SPRITE_CACHE_SIZE = 512  # Pre-rendered particle sprites kept around
+PARTICLE_BUDGET = 2000  # Live particles per system; the faintest are recycled past this
+
 # Game Settings
 INITIAL_LIVES = 3
 COMBO_TIMER = 1.0  # seconds for combo chain
 COMBO_BONUS = 5    # points per consecutive brick
 
+# Profiling
+PROFILER_SAMPLES = 600  # Frames kept for percentiles
+PROFILER_OVERLAY_INTERVAL = 30  # Frames between overlay refreshes
+
+# Adaptive quality (see quality.py)
+QUALITY_ADAPTIVE = True  # Scale effects down when frames run over budget
+QUALITY_WINDOW = 60  # Frames judged together before changing level
+QUALITY_DOWN_AT = 0.9  # Step down when p90 busy time is over this fraction of a frame
+QUALITY_UP_AT = 0.5  # Step up when it is under this fraction...
+QUALITY_UP_DELAY = 3  # ...for this many windows in a row
+# Effect settings from lowest to highest quality
+QUALITY_LEVELS = [
+    {"particles": 0.25},
+    {"particles": 0.5},
+    {"particles": 1.0},
+]
+
 # Font sizes
 TITLE_FONT_SIZE = 64
 MENU_FONT_SIZE = 36
 HUD_FONT_SIZE = 24
 SCORE_FONT_SIZE = 28
+TEXT_CACHE_SIZE = 256
+SCREEN_CACHE_SIZE = 8
+
+# Level pack file (see levelpack.py), used instead of LEVELS when present
+LEVEL_PACK = "levels.brkl"
 
 # Level layouts (1 = normal, 2 = tough, 3 = power-up, 4 = unbreakable)
 LEVELS = [
@@ -8,11 +8,18 @@ from ball import Ball
 from bricks import Brick
 from powerups import PowerUp
 from particles import ParticleSystem
-from ui import UI
+from ui import UI, StaticScreen
+from profiler import FrameProfiler
+from quality import QualityGovernor, quality
+from levelpack import level_count, get_level_layout
+
+# Frame phases timed by the profiler, in the order they run
+PROFILE_PHASES = ("events", "update", "bricks", "powerups", "paddle", "balls",
+                  "particles", "hud", "screen", "flip", "overlay", "wait")
 
 
 class Game:
-    def __init__(self):
+    def __init__(self, profile_path=None, seed=None):
         pygame.init()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Brick Breaker - Defender of the Crystal Kingdom")
@@ -30,14 +37,33 @@ class Game:
         self.combo_timer = 0
         self.bricks_left = 0
 
+        # Named random streams: "gameplay" decides power-ups, multiball
+        # directions and speed-ups, "cosmetic" drives particles, so effects
+        # never change how a game plays out and a seeded Game makes the
+        # same run every time
+        self.rng = random.Random()
+        self.cosmetic_rng = random.Random()
+        self.seed(seed)
+
         # Game objects
         self.paddle = Paddle()
         self.balls = []  # Main list of balls
         self.bricks = []
         self.powerups = []
-        self.particles = ParticleSystem()
+        self.particles = ParticleSystem(self.cosmetic_rng)
         self.ui = UI()
 
+        # Static screen currently on the display and the composed pause frame
+        self.shown_screen = None
+        self.pause_screen = None
+
+        # Frame timings, shown with F3 and written to profile_path on exit
+        self.profiler = FrameProfiler(PROFILE_PHASES)
+        self.profile_path = profile_path
+
+        # Effects scale down when frames run over budget (see quality.py)
+        self.governor = QualityGovernor(quality) if QUALITY_ADAPTIVE else None
+
         # Initialize first ball
         self.create_ball()
 
@@ -50,6 +76,13 @@ class Game:
             "slow_ball": 0
         }
 
+    def seed(self, seed=None):
+        """Reseed the gameplay and cosmetic streams (None picks a fresh seed)"""
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.rng.seed(f"{seed}:gameplay")
+        self.cosmetic_rng.seed(f"{seed}:cosmetic")
+
     def create_ball(self, x=None, y=None):
         """Create a new ball"""
         ball = Ball(x, y)
@@ -65,25 +98,24 @@ class Game:
         for _ in range(count):
             new_ball = Ball(main_ball.rect.centerx, main_ball.rect.centery)
             # Give random direction
-            angle = random.uniform(0, 2 * 3.14159)
-            speed = random.uniform(3, 5)
+            angle = self.rng.uniform(0, 2 * 3.14159)
+            speed = self.rng.uniform(3, 5)
             new_ball.speed_x = math.cos(angle) * speed
             new_ball.speed_y = math.sin(angle) * speed
             new_ball.stuck_to_paddle = False
             self.balls.append(new_ball)
 
     def load_level(self, level_index):
-        """Load a level from the LEVELS configuration"""
+        """Load a level from the level pack (or the LEVELS configuration)"""
         self.bricks = []
         self.powerups = []
-        self.level = level_index % len(LEVELS)
+        self.level = level_index % level_count()
 
-        level_layout = LEVELS[self.level]
+        level_layout = get_level_layout(self.level)
         self.bricks_left = 0
 
-        for row in range(BRICK_ROWS):
-            for col in range(BRICK_COLS):
-                brick_type = level_layout[row][col]
+        for row, brick_types in enumerate(level_layout):
+            for col, brick_type in enumerate(brick_types):
                 if brick_type > 0:
                     x = col * (BRICK_WIDTH + BRICK_PADDING) + BRICK_PADDING
                     y = row * (BRICK_HEIGHT + BRICK_PADDING) + BRICK_MARGIN_TOP
@@ -120,6 +152,12 @@ class Game:
                 elif event.key == pygame.K_p and self.state == "playing":
                     self.paused = not self.paused
 
+                elif event.key == pygame.K_F3:
+                    self.profiler.toggle()
+                    if not self.profiler.visible:
+                        # Paint over the overlay
+                        self.shown_screen = None
+
                 elif event.key == pygame.K_SPACE and self.state == "playing":
                     for ball in self.balls:
                         if ball.stuck_to_paddle:
@@ -243,7 +281,7 @@ class Game:
         self.particles.update()
 
         # Gradually increase ball speed
-        if random.random() < 0.01:  # 1% chance per frame
+        if self.rng.random() < 0.01:  # 1% chance per frame
             for ball in self.balls:
                 ball.increase_speed()
 
@@ -256,7 +294,7 @@ class Game:
             POWERUP_EXTRA_LIFE
         ]
 
-        powerup_type = random.choice(powerup_types)
+        powerup_type = self.rng.choice(powerup_types)
         powerup = PowerUp(x, y, powerup_type)
         self.powerups.append(powerup)
 
@@ -281,7 +319,7 @@ class Game:
             self.high_score = self.score
 
         # Check if all levels are complete
-        if self.level + 1 >= len(LEVELS):
+        if self.level + 1 >= level_count():
             self.state = "game_over"
         else:
             # Load next level
@@ -305,80 +343,97 @@ class Game:
         self.combo_timer = 0
         self.load_level(self.level)
         self.powerups = []
-        self.particles = ParticleSystem()
+        self.particles = ParticleSystem(self.cosmetic_rng)
 
     def draw(self):
-        """Draw everything to the screen"""
-        self.screen.fill(BACKGROUND)
+        """Draw everything to the screen, returning the buttons on it"""
+        static = self.static_screen()
+        if static:
+            # Only push what changed since this screen was last shown
+            dirty = static.draw(self.screen, full=static is not self.shown_screen)
+            self.shown_screen = static
+            self.profiler.mark("screen")
+            if dirty:
+                pygame.display.update(dirty)
+            self.profiler.mark("flip")
+            return static.buttons
+
+        self.shown_screen = None
+        self.draw_playing()
+        pygame.display.flip()
+        self.profiler.mark("flip")
+        return []
 
+    def static_screen(self):
+        """Get the composed screen for the current state, or None while playing"""
         if self.state == "menu":
-            buttons = self.ui.draw_main_menu(self.screen)
-            # Draw high score
-            high_score_text = self.ui.font_medium.render(
-                f"HIGH SCORE: {self.high_score}", True, YELLOW
-            )
-            high_score_rect = high_score_text.get_rect(
-                center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 50)
-            )
-            self.screen.blit(high_score_text, high_score_rect)
-
-        elif self.state == "instructions":
-            back_button = self.ui.draw_instructions(self.screen)
-            buttons = [back_button]
-
-        elif self.state == "playing":
-            # Draw game objects
-            for brick in self.bricks:
-                brick.draw(self.screen)
+            return self.ui.main_menu_screen(self.high_score)
 
-            for powerup in self.powerups:
-                powerup.draw(self.screen)
+        if self.state == "instructions":
+            return self.ui.instructions_screen()
 
-            self.paddle.draw(self.screen)
+        if self.state == "game_over":
+            level_complete = (self.bricks_left <= 0 and self.lives > 0)
+            return self.ui.game_over_screen(self.score, level_complete, self.high_score)
 
-            for ball in self.balls:
-                ball.draw(self.screen)
+        if self.paused:
+            # The paused frame does not change, so compose it once
+            if self.pause_screen is None:
+                self.draw_playing()
+                self.ui.draw_pause(self.screen)
+                self.pause_screen = StaticScreen(self.screen.copy(), [])
+            return self.pause_screen
 
-            # Draw particles
-            self.particles.draw(self.screen)
+        self.pause_screen = None
+        return None
 
-            # Draw HUD
-            self.ui.draw_hud(
-                self.screen, self.score, self.lives,
-                self.level, self.bricks_left, self.combo
-            )
+    def draw_playing(self):
+        """Draw the bricks, paddle, balls, particles and HUD"""
+        profiler = self.profiler
+        self.screen.fill(BACKGROUND)
 
-            buttons = []
+        # Draw game objects
+        for brick in self.bricks:
+            brick.draw(self.screen)
+        profiler.mark("bricks")
 
-            # Draw pause indicator if paused
-            if self.paused:
-                self.ui.draw_pause(self.screen)
+        for powerup in self.powerups:
+            powerup.draw(self.screen)
+        profiler.mark("powerups")
 
-        elif self.state == "game_over":
-            level_complete = (self.bricks_left <= 0 and self.lives > 0)
-            buttons = self.ui.draw_game_over(self.screen, self.score, level_complete)
+        self.paddle.draw(self.screen)
+        profiler.mark("paddle")
 
-            # Draw high score
-            high_score_text = self.ui.font_medium.render(
-                f"HIGH SCORE: {self.high_score}", True, YELLOW
-            )
-            high_score_rect = high_score_text.get_rect(
-                center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 100)
-            )
-            self.screen.blit(high_score_text, high_score_rect)
+        for ball in self.balls:
+            ball.draw(self.screen)
+        profiler.mark("balls")
 
-        pygame.display.flip()
-        return buttons
+        # Draw particles
+        self.particles.draw(self.screen)
+        profiler.mark("particles")
+
+        # Draw HUD
+        self.ui.draw_hud(
+            self.screen, self.score, self.lives,
+            self.level, self.bricks_left, self.combo
+        )
+        profiler.mark("hud")
 
     def run(self):
         """Main game loop"""
+        profiler = self.profiler
+
         while self.running:
+            profiler.begin_frame()
+
             # Handle events
             mouse_pos, mouse_click, mouse_x = self.handle_events()
+            profiler.mark("events")
 
             # Update game state
             if self.state == "playing":
                 self.update_game(mouse_x)
+            profiler.mark("update")
 
             # Draw everything
             buttons = self.draw()
@@ -409,8 +464,20 @@ class Game:
                             self.state = "playing"
                         elif button.text == "MAIN MENU":
                             self.state = "menu"
+            profiler.mark("events")
+
+            if profiler.visible:
+                profiler.draw(self.screen)
+                profiler.mark("overlay")
 
             # Cap the frame rate
             self.clock.tick(FPS)
-
+            profiler.mark("wait")
+            if self.governor and self.state == "playing" and not self.paused:
+                # Only gameplay frames say anything about the effects' cost
+                self.governor.record(profiler.busy_time())
+            profiler.end_frame()
+
+        if self.profile_path:
+            profiler.dump(self.profile_path)
         pygame.quit()
\ No newline at end of file
@@ -0,0 +1,113 @@
+# levelpack.py - On-disk brick level packs, decoded one level at a time
+import argparse
+import mmap
+import os
+import struct
+from config import *
+
+# File layout: header, then an index of (offset, rows, cols) entries, one
+# per level, then each level as a rows * cols byte grid of brick types
+# (0 = empty), row-major.
+MAGIC = b"BRKL"
+VERSION = 1
+HEADER = struct.Struct("<4sBI")  # magic, version, level count
+INDEX_ENTRY = struct.Struct("<IBB")  # offset, rows, cols
+
+
+def write_pack(path, levels):
+    """Write a level pack from a list of layouts (lists of rows of brick types)"""
+    offset = HEADER.size + INDEX_ENTRY.size * len(levels)
+    index = bytearray()
+    grids = []
+    for layout in levels:
+        rows = len(layout)
+        cols = len(layout[0]) if rows else 0
+        grids.append(bytes(brick_type for row in layout for brick_type in row))
+        index += INDEX_ENTRY.pack(offset, rows, cols)
+        offset += rows * cols
+
+    with open(path, "wb") as pack_file:
+        pack_file.write(HEADER.pack(MAGIC, VERSION, len(levels)))
+        pack_file.write(index)
+        for grid in grids:
+            pack_file.write(grid)
+
+
+class LevelPack:
+    """A memory-mapped level pack.
+
+    Opening a pack reads only its header; a level's grid is decoded when
+    that level is loaded, so packs with thousands of levels cost nothing
+    until they are played.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, self.count = HEADER.unpack_from(self.data)
+        except (ValueError, struct.error):
+            self.file.close()
+            raise ValueError(f"{path} is not a brick level pack")
+
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a brick level pack (or an unsupported version)")
+
+    def __len__(self):
+        return self.count
+
+    def layout(self, level):
+        """Decode a level into a list of rows of brick types"""
+        offset, rows, cols = INDEX_ENTRY.unpack_from(self.data, HEADER.size + INDEX_ENTRY.size * level)
+        grid = self.data[offset:offset + rows * cols]
+        return [list(grid[row * cols:(row + 1) * cols]) for row in range(rows)]
+
+    def close(self):
+        """Unmap and close the pack file"""
+        self.data.close()
+        self.file.close()
+
+
+_default_pack = None
+_default_pack_loaded = False
+
+
+def default_pack():
+    """The LEVEL_PACK file next to the game, or None if there isn't one"""
+    global _default_pack, _default_pack_loaded
+    if not _default_pack_loaded:
+        _default_pack_loaded = True
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), LEVEL_PACK)
+        if os.path.exists(path):
+            _default_pack = LevelPack(path)
+    return _default_pack
+
+
+def level_count():
+    """Number of levels, from the level pack if there is one"""
+    pack = default_pack()
+    return len(pack) if pack is not None else len(LEVELS)
+
+
+def get_level_layout(level):
+    """Get a level's layout from the level pack, or from LEVELS without one"""
+    pack = default_pack()
+    if pack is not None:
+        return pack.layout(level)
+    return LEVELS[level]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build brick level packs")
+    parser.add_argument("output", help="pack file to write")
+    args = parser.parse_args()
+
+    # Export the built-in layouts as a starting point
+    write_pack(args.output, LEVELS)
+    print(f"Wrote {len(LEVELS)} levels to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,15 @@
+import argparse
 from game import Game
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Brick Breaker")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="write frame timings to a .csv or .json file on exit")
+    parser.add_argument("--seed", type=int,
+                        help="seed for power-ups, ball speed-ups and effects, for reproducible runs")
+    args = parser.parse_args()
+
     print("Starting Brick Breaker Game...")
     print("Defender of the Crystal Kingdom")
     print("=" * 50)
@@ -10,9 +18,10 @@ def main():
     print("- Launch ball: SPACEBAR")
     print("- Pause: P key")
     print("- Menu: ESC key")
+    print("- Frame profiler: F3 key")
     print("=" * 50)
 
-    game = Game()
+    game = Game(profile_path=args.profile, seed=args.seed)
     game.run()
 
 
@@ -2,11 +2,21 @@
 import pygame
 import random
 import math
+from collections import OrderedDict
+from operator import attrgetter
 from config import *
+from quality import quality
 
 
 class Particle:
-    def __init__(self, x, y, color):
+    # Particles are recycled through ParticleSystem's pool, so keep them small
+    __slots__ = ("x", "y", "color", "size", "speed_x", "speed_y", "life", "decay")
+
+    def __init__(self, x, y, color, rng=random):
+        self.reset(x, y, color, rng)
+
+    def reset(self, x, y, color, rng=random):
+        """(Re)start the particle at a position"""
         self.x = x
         self.y = y
         # Ensure color is valid RGB tuple
@@ -15,11 +25,11 @@ class Particle:
         else:
             self.color = (255, 255, 255)
 
-        self.size = random.randint(2, 6)
-        self.speed_x = random.uniform(-3, 3)
-        self.speed_y = random.uniform(-3, 3)
+        self.size = rng.randint(2, 6)
+        self.speed_x = rng.uniform(-3, 3)
+        self.speed_y = rng.uniform(-3, 3)
         self.life = 1.0  # 1.0 to 0.0
-        self.decay = random.uniform(0.02, 0.05)
+        self.decay = rng.uniform(0.02, 0.05)
 
     def update(self):
         self.x += self.speed_x
@@ -29,42 +39,131 @@ class Particle:
         return self.life > 0
 
     def draw(self, screen):
+        sprite = self.get_sprite()
+        if sprite is not None:
+            screen.blit(sprite, (int(self.x - self.size), int(self.y - self.size)))
+
+    def get_sprite(self):
+        """Get the cached sprite for this particle, or None if invisible"""
         alpha = int(max(0, min(255, self.life * 255)))
-        if alpha > 0 and self.size > 0:
-            # Create surface with alpha for particle
-            particle_surface = pygame.Surface((self.size * 2, self.size * 2), pygame.SRCALPHA)
+        return sprite_cache.get(self.size, self.color, alpha)
+
+
+def render_particle(size, color, alpha):
+    """Render one round particle sprite of radius size"""
+    particle_surface = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+
+    # Ensure color values are valid
+    r = int(max(0, min(255, color[0])))
+    g = int(max(0, min(255, color[1])))
+    b = int(max(0, min(255, color[2])))
 
-            # Ensure color values are valid
-            r = int(max(0, min(255, self.color[0])))
-            g = int(max(0, min(255, self.color[1])))
-            b = int(max(0, min(255, self.color[2])))
+    pygame.draw.circle(particle_surface, (r, g, b, alpha),
+                       (size, size), size)
+    return particle_surface
 
-            pygame.draw.circle(particle_surface, (r, g, b, alpha),
-                               (self.size, self.size), self.size)
-            screen.blit(particle_surface, (int(self.x - self.size), int(self.y - self.size)))
+
+class SpriteCache:
+    """Bounded LRU cache of pre-rendered particle sprites.
+
+    Sprites are keyed by radius, color and a 16-step alpha bucket, so a
+    burst of particles shares a handful of surfaces instead of allocating
+    one per particle per frame.
+    """
+
+    def __init__(self, max_size=PARTICLE_SPRITE_CACHE_SIZE):
+        self.max_size = max_size
+        self.sprites = OrderedDict()
+
+    def get(self, size, color, alpha):
+        """Get the sprite for a particle, or None if it is invisible"""
+        if alpha <= 0 or size <= 0:
+            return None
+
+        key = (size, color, alpha >> 4)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            # Draw at the top of the alpha bucket
+            sprite = render_particle(size, color, (alpha >> 4 << 4) | 15)
+            self.sprites[key] = sprite
+            if len(self.sprites) > self.max_size:
+                self.sprites.popitem(last=False)
+        else:
+            self.sprites.move_to_end(key)
+        return sprite
+
+
+# Shared by every particle system
+sprite_cache = SpriteCache()
 
 
 class ParticleSystem:
-    def __init__(self):
+    """Particles as pooled objects, at most budget of them alive at once.
+
+    Dead particles go back to a free list and are reused by the next
+    burst. A burst that would go over budget first recycles the faintest
+    live particles, so multiball chains cannot pile up particles.
+    """
+
+    def __init__(self, rng=random, budget=PARTICLE_BUDGET):
+        # Cosmetic random stream, kept apart from the gameplay one
+        self.rng = rng
+        self.budget = budget
         self.particles = []
+        self.pool = []
+
+    def __len__(self):
+        return len(self.particles)
+
+    def _emit(self, x, y, color, count):
+        """Add count particles and return them, recycling the faintest past the budget"""
+        particles = self.particles
+        # Bursts shrink at lower quality levels
+        count = min(quality.particle_count(count), self.budget)
+        excess = len(particles) + count - self.budget
+        if excess > 0:
+            particles.sort(key=attrgetter("life"), reverse=True)
+            self.pool.extend(particles[-excess:])
+            del particles[-excess:]
+
+        pool = self.pool
+        rng = self.rng
+        start = len(particles)
+        for _ in range(count):
+            if pool:
+                particle = pool.pop()
+                particle.reset(x, y, color, rng)
+            else:
+                particle = Particle(x, y, color, rng)
+            particles.append(particle)
+        return particles[start:]
 
     def add_brick_break(self, x, y, color, count=20):
         """Add particles for brick break effect"""
-        for _ in range(count):
-            self.particles.append(Particle(x, y, color))
+        self._emit(x, y, color, count)
 
     def add_powerup_collect(self, x, y, color, count=15):
         """Add particles for power-up collection"""
-        for _ in range(count):
-            particle = Particle(x, y, color)
-            particle.speed_y = random.uniform(-5, -2)  # Upward burst
-            self.particles.append(particle)
+        for particle in self._emit(x, y, color, count):
+            particle.speed_y = self.rng.uniform(-5, -2)  # Upward burst
 
     def update(self):
-        """Update all particles"""
-        self.particles = [p for p in self.particles if p.update()]
+        """Update all particles, returning dead ones to the pool"""
+        live = []
+        dead = self.pool
+        for particle in self.particles:
+            if particle.update():
+                live.append(particle)
+            else:
+                dead.append(particle)
+        self.particles = live
 
     def draw(self, screen):
-        """Draw all particles"""
+        """Draw all particles in one batched blit"""
+        blits = []
         for particle in self.particles:
-            particle.draw(screen)
\ No newline at end of file
+            sprite = particle.get_sprite()
+            if sprite is not None:
+                blits.append((sprite, (int(particle.x - particle.size),
+                                       int(particle.y - particle.size))))
+        screen.blits(blits, doreturn=False)
\ No newline at end of file
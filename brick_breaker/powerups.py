@@ -2,6 +2,8 @@
 import pygame
 import math
 from config import *
+from resources import get_font
+from ui import text_cache
 
 
 class PowerUp:
@@ -35,9 +37,8 @@ class PowerUp:
         pygame.draw.rect(screen, WHITE, draw_rect, 2, border_radius=5)
 
         # Draw power-up symbol
-        font = pygame.font.Font(None, 20)
         symbol = self.name[0]  # First letter
-        text = font.render(symbol, True, WHITE)
+        text = text_cache.render(get_font(20), symbol, WHITE)
         text_rect = text.get_rect(center=draw_rect.center)
         screen.blit(text, text_rect)
 
@@ -0,0 +1,17 @@
+# resources.py - Process-wide cache of loaded fonts
+import pygame
+
+_fonts = {}
+
+
+def get_font(size, name=None):
+    """Get the shared Font for a font file and size, loading it on first use.
+
+    name is a font file path, or None for pygame's default font.
+    """
+    key = (name, size)
+    font = _fonts.get(key)
+    if font is None:
+        font = pygame.font.Font(name, size)
+        _fonts[key] = font
+    return font
@@ -0,0 +1,208 @@
+# arena.py - Many AI snakes on one board, for stress tests
+#
+#   python arena.py --snakes 200 --ticks 20000       (headless, prints stats)
+#   python arena.py --snakes 50 --render             (watch it in a window)
+import argparse
+import time
+from config import *
+from cells import DIRECTIONS, to_position
+from world import World
+
+
+class Arena:
+    """Dozens to hundreds of AI snakes sharing one World.
+
+    Collisions are the World's: every snake is on the same BodyCells
+    grid, so a crash is found from the cell a head lands on, whatever
+    the number of snakes. Each snake is steered greedily toward a piece
+    of food, choosing only among cells that are free right now and
+    preferring ones with free cells beyond them.
+    """
+
+    def __init__(self, snakes=ARENA_SNAKES, width=WORLD_WIDTH, height=WORLD_HEIGHT,
+                 seed=None, level=0):
+        self.world = World(width, height, seed, level)
+        for _ in range(snakes):
+            if self.world.add_snake() is None:
+                # Board full
+                break
+
+        # Food cell each snake is heading for, and (x, y, cell) for every
+        # piece of food, rebuilt only when food moves
+        self.targets = {}
+        self.food_positions = None
+
+        self.ticks = 0
+        self.deaths = 0
+
+    def target_for(self, snake_id, head):
+        """The food a snake is after, picking the nearest when its last one is gone"""
+        target = self.targets.get(snake_id)
+        if target in self.world.foods:
+            return target
+
+        if self.food_positions is None:
+            width = self.world.width
+            self.food_positions = [to_position(cell, width) + (cell,) for cell in self.world.foods]
+
+        head_x, head_y = head
+        target = None
+        best = None
+        for x, y, cell in self.food_positions:
+            distance = abs(x - head_x) + abs(y - head_y)
+            if best is None or distance < best:
+                best = distance
+                target = cell
+        self.targets[snake_id] = target
+        return target
+
+    def choose(self, snake_id, snake):
+        """Pick a direction for a snake's next move"""
+        world = self.world
+        width, height = world.width, world.height
+        occupancy = world.body_cells.occupancy
+        obstacle_map = world.grid.obstacle_map
+
+        target = self.target_for(snake_id, snake.head)
+        target_x, target_y = to_position(target, width) if target is not None else snake.head
+
+        head_x, head_y = snake.head
+        current_dx, current_dy = snake.direction
+        best = None
+        choice = snake.direction
+        for dx, dy in DIRECTIONS:
+            if dx == -current_dx and dy == -current_dy:
+                continue
+
+            x, y = head_x + dx, head_y + dy
+            if not (0 <= x < width and 0 <= y < height):
+                continue
+            cell = y * width + x
+            if occupancy[cell] or obstacle_map[cell]:
+                continue
+
+            # Free cells beyond this one; a cell with none is a dead end
+            room = 0
+            for ndx, ndy in DIRECTIONS:
+                nx, ny = x + ndx, y + ndy
+                if 0 <= nx < width and 0 <= ny < height:
+                    neighbor = ny * width + nx
+                    if not occupancy[neighbor] and not obstacle_map[neighbor]:
+                        room += 1
+
+            rank = (room == 0, abs(target_x - x) + abs(target_y - y), -room)
+            if best is None or rank < best:
+                best = rank
+                choice = (dx, dy)
+        return choice
+
+    def update(self, dt=1.0 / SIM_TICK_RATE):
+        """Steer the snakes about to move, advance the world and return its events"""
+        for snake_id, snake in self.world.snakes.items():
+            if snake.time_until_move() <= dt:
+                snake.change_direction(self.choose(snake_id, snake))
+
+        events = self.world.update(dt)
+        self.ticks += 1
+        for event in events:
+            kind = event[0]
+            if kind == "death":
+                self.deaths += 1
+            elif kind == "food_added":
+                self.food_positions = None
+        return events
+
+    def run(self, ticks, dt=1.0 / SIM_TICK_RATE):
+        """Run a number of ticks as fast as possible, returning ticks per second"""
+        start = time.perf_counter()
+        for _ in range(ticks):
+            self.update(dt)
+        elapsed = time.perf_counter() - start
+        return ticks / elapsed if elapsed else 0.0
+
+    def leader(self):
+        """Id of the highest-scoring snake on the board, or None"""
+        world = self.world
+        if not world.snakes:
+            return None
+        return max(world.snakes, key=lambda snake_id: (world.scores[snake_id], -snake_id))
+
+    def draw(self, screen, camera=None, lag=0.0):
+        """Draw the board, food and every snake with the single-player drawing code"""
+        world = self.world
+        world.grid.draw(screen, camera)
+        for food in world.foods.values():
+            food.draw(screen, camera)
+        for snake in world.snakes.values():
+            snake.draw(screen, lag, camera)
+
+
+def watch(arena, time_scale=1.0):
+    """Show the arena in a window, following the leading snake"""
+    import pygame
+    from camera import Camera
+
+    pygame.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Emerald Serpent - Arena")
+    clock = pygame.time.Clock()
+
+    world = arena.world
+    camera = None
+    if world.width * GRID_SIZE > SCREEN_WIDTH or world.height * GRID_SIZE > SCREEN_HEIGHT:
+        camera = Camera(world.width, world.height)
+
+    tick = 1.0 / SIM_TICK_RATE
+    accumulator = 0.0
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and
+                                             event.key == pygame.K_ESCAPE):
+                running = False
+
+        accumulator += clock.tick(FPS) / 1000 * time_scale
+        for _ in range(MAX_TICKS_PER_FRAME):
+            if accumulator < tick:
+                break
+            accumulator -= tick
+            arena.update(tick)
+
+        leader = world.snakes.get(arena.leader())
+        if camera and leader is not None:
+            camera.follow(*leader.head)
+        arena.draw(screen, camera, accumulator)
+        pygame.display.flip()
+
+    pygame.quit()
+
+
+def main():
+    from main import board_size
+
+    parser = argparse.ArgumentParser(description="Emerald Serpent AI arena")
+    parser.add_argument("--snakes", type=int, default=ARENA_SNAKES, help="snakes on the board")
+    parser.add_argument("--board", type=board_size, default=(WORLD_WIDTH, WORLD_HEIGHT),
+                        metavar="WIDTHxHEIGHT", help="board size in cells")
+    parser.add_argument("--level", type=int, default=0, help="obstacle layout to play on")
+    parser.add_argument("--seed", type=int, default=1, help="seed for food and spawn positions")
+    parser.add_argument("--ticks", type=int, default=10000, help="ticks to run headless")
+    parser.add_argument("--render", action="store_true", help="watch the arena in a window")
+    parser.add_argument("--time-scale", type=float, default=TIME_SCALE,
+                        help="simulation speed relative to real time when rendering")
+    args = parser.parse_args()
+
+    arena = Arena(args.snakes, *args.board, args.seed, args.level)
+    if args.render:
+        watch(arena, args.time_scale)
+        return
+
+    rate = arena.run(args.ticks)
+    scores = sorted(arena.world.scores.values(), reverse=True)
+    print(f"{len(arena.world.scores)} snakes on {args.board[0]}x{args.board[1]}: "
+          f"{arena.ticks} ticks at {rate:,.0f} ticks/second")
+    print(f"Deaths: {arena.deaths}, top scores: {scores[:5]}")
+
+
+if __name__ == "__main__":
+    main()
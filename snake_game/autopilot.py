@@ -0,0 +1,225 @@
+# autopilot.py - AI controller for attract mode and load tests
+from array import array
+from collections import deque
+from config import *
+from cells import DIRECTIONS, to_index, in_bounds
+
+UNREACHABLE = 1 << 30
+
+
+class Autopilot:
+    """Steers a SnakeSim's snake toward the food without trapping itself.
+
+    A breadth-first distance field from the food over free cells is built
+    once per food placement. Cells freed by the tail are folded in
+    incrementally, relaxing only the distances they shorten, so most ticks
+    touch a handful of cells. The field is rebuilt when the snake has to
+    leave the shortest path (the cells it crosses may have been on other
+    cells' paths) or when moves were missed.
+
+    The breadth-first search stops once every neighbour of the head has
+    its distance, so on large boards a rebuild only covers the cells
+    between the food and the snake. Distances past that horizon are left
+    unreached and relaxing never extends beyond it.
+
+    Before committing to a move the autopilot checks that, from the new
+    cell, it can still reach its own tail or enough free cells to fit its
+    body. That flood fill stops as soon as either is true.
+    """
+
+    def __init__(self, sim):
+        self.sim = sim
+        self.width = sim.width
+        self.height = sim.height
+        self.size = self.width * self.height
+
+        self.unreached = array("i", [UNREACHABLE]) * self.size
+        self.distance = array("i", self.unreached)
+        self.reset()
+
+    def reset(self):
+        """Forget the distance field, e.g. after the simulation is reset"""
+        self.target = None
+        self.stale = True
+        self.horizon = UNREACHABLE
+
+        # Head position the field and last decision were made for
+        self.seen_head = None
+        self.decision_head = None
+        self.decision = None
+
+    def neighbors(self, index):
+        """Packed indices of the on-board cells next to index"""
+        width = self.width
+        x = index % width
+        if x > 0:
+            yield index - 1
+        if x < width - 1:
+            yield index + 1
+        if index >= width:
+            yield index - width
+        if index < self.size - width:
+            yield index + width
+
+    def passable(self, index):
+        """Check if the snake could move through a cell right now"""
+        return (not self.sim.grid.obstacle_map[index] and
+                not self.sim.snake.occupancy[index])
+
+    def rebuild(self):
+        """Recompute the distance field from the food from scratch"""
+        distance = self.distance
+        distance[:] = self.unreached
+        self.stale = False
+        self.seen_head = head = self.head_index()
+        self.horizon = UNREACHABLE
+
+        food = self.sim.food.position
+        if food is None:
+            self.target = None
+            return
+
+        self.target = to_index(*food, self.width)
+        distance[self.target] = 0
+        queue = deque([self.target])
+        while queue:
+            cell = queue.popleft()
+            step = distance[cell] + 1
+            if step > self.horizon:
+                break
+            for neighbor in self.neighbors(cell):
+                if neighbor == head and self.horizon == UNREACHABLE:
+                    # The head's neighbours are all settled one ring further out
+                    self.horizon = step + 1
+                if distance[neighbor] > step and self.passable(neighbor):
+                    distance[neighbor] = step
+                    queue.append(neighbor)
+
+    def relax(self, index):
+        """Let distances shrink through a cell the tail just freed"""
+        if not self.passable(index):
+            return
+
+        distance = self.distance
+        best = min(distance[neighbor] for neighbor in self.neighbors(index)) + 1
+        if best >= distance[index] or best > self.horizon:
+            return
+
+        distance[index] = best
+        queue = deque([index])
+        while queue:
+            cell = queue.popleft()
+            step = distance[cell] + 1
+            if step > self.horizon:
+                break
+            for neighbor in self.neighbors(cell):
+                if distance[neighbor] > step and self.passable(neighbor):
+                    distance[neighbor] = step
+                    queue.append(neighbor)
+
+    def head_index(self):
+        """Packed head cell, or None if the head is off the board"""
+        x, y = self.sim.snake.head
+        if not in_bounds(x, y, self.width, self.height):
+            return None
+        return to_index(x, y, self.width)
+
+    def sync(self):
+        """Bring the distance field up to date with the board"""
+        food = self.sim.food.position
+        if self.stale or food is None or to_index(*food, self.width) != self.target:
+            self.rebuild()
+            return
+
+        snake = self.sim.snake
+        head = self.head_index()
+        if head == self.seen_head:
+            return
+
+        if len(snake.body) > 1 and snake.body[1] == self.seen_head:
+            # Exactly one move since the last sync
+            if snake.vacated is not None:
+                self.relax(snake.vacated)
+            self.seen_head = head
+        else:
+            self.rebuild()
+
+    def room_from(self, start, limit):
+        """Count free cells reachable from start, up to limit.
+
+        Returns limit early if the tail can be reached, since following
+        the tail always leaves a way out.
+        """
+        tail = self.sim.snake.body[-1]
+        seen = {start}
+        queue = deque([start])
+        count = 0
+        while queue:
+            cell = queue.popleft()
+            count += 1
+            if count >= limit:
+                return limit
+            for neighbor in self.neighbors(cell):
+                if neighbor == tail and neighbor != start:
+                    return limit
+                if neighbor not in seen and self.passable(neighbor):
+                    seen.add(neighbor)
+                    queue.append(neighbor)
+        return count
+
+    def choose(self):
+        """Pick the direction the snake should take next"""
+        snake = self.sim.snake
+        head = self.head_index()
+        if head is None:
+            return snake.next_direction
+        if head == self.decision_head:
+            # Nothing has moved since the last decision
+            return self.decision
+
+        self.sync()
+
+        # Candidate moves, ranked by distance to the food
+        head_x, head_y = snake.head
+        tail = snake.body[-1]
+        current_dx, current_dy = snake.direction
+        candidates = []
+        for dx, dy in DIRECTIONS:
+            if dx == -current_dx and dy == -current_dy:
+                continue
+
+            x, y = head_x + dx, head_y + dy
+            if not in_bounds(x, y, self.width, self.height):
+                continue
+            cell = to_index(x, y, self.width)
+            if self.sim.grid.obstacle_map[cell]:
+                continue
+            if snake.occupancy[cell] and not (cell == tail and snake.grow_pending == 0):
+                continue
+            candidates.append((self.distance[cell], (dx, dy), cell))
+        candidates.sort(key=lambda candidate: candidate[0])
+
+        # Take the closest move that leaves room to survive, else the roomiest
+        limit = len(snake.body) + 1
+        choice = None
+        best_room = -1
+        for rank, (distance, direction, cell) in enumerate(candidates):
+            room = self.room_from(cell, limit)
+            if room >= limit:
+                choice = direction
+                if rank > 0 and distance < UNREACHABLE:
+                    # Leaving the shortest path invalidates parts of the field
+                    self.stale = True
+                break
+            if room > best_room:
+                best_room = room
+                choice = direction
+                self.stale = True
+
+        if choice is None:
+            # Boxed in; keep going and hope
+            choice = snake.direction
+
+        self.decision_head = head
+        self.decision = choice
+        return choice
@@ -0,0 +1,178 @@
+# batch_env.py - Vectorized snake boards for bot training
+import numpy as np
+from config import *
+from cells import DIRECTIONS
+from grid import get_level_cells
+
+# Action codes, one per entry in cells.DIRECTIONS: up, down, left, right
+ACTIONS = np.array(DIRECTIONS, dtype=np.int32)
+OPPOSITE = np.array([1, 0, 3, 2], dtype=np.int8)
+
+# Food types in the same proportions as Food.spawn
+FOOD_NORMAL, FOOD_GOLDEN, FOOD_SPEED = 0, 1, 2
+FOOD_POINTS_BY_TYPE = np.array([FOOD_POINTS, GOLDEN_FOOD_POINTS, SPEED_FOOD_POINTS], dtype=np.int32)
+FOOD_GROWTH_BY_TYPE = np.array([1, 2, 0], dtype=np.int32)
+
+
+class BatchSnakeEnv:
+    """N independent snake boards advanced together with NumPy.
+
+    Every board follows the same movement, growth, food and collision rules
+    as Snake._move, Food.get_effect and SnakeSim.check_collisions. One
+    step is one move on every board, so the time-based rules (speed, food
+    expiry and combos) do not apply. Boards that die are reset in the
+    same call.
+
+    State lives in arrays indexed by board: `occupied` (N, cells) marks
+    body cells, `body` (N, cells) is a ring buffer of packed cell indices
+    whose newest entry is at `head_slot`, and `food`, `score`, `length`
+    and `alive` hold one value per board.
+    """
+
+    def __init__(self, num_boards, width=GRID_WIDTH, height=GRID_HEIGHT,
+                 level=0, seed=None):
+        self.num_boards = num_boards
+        self.width = width
+        self.height = height
+        self.num_cells = width * height
+        self.rng = np.random.default_rng(seed)
+
+        # Static level layout shared by every board
+        self.obstacles = np.zeros(self.num_cells, dtype=bool)
+        self.obstacles[np.fromiter(get_level_cells(level, width, height), dtype=np.int64)] = True
+
+        n = num_boards
+        self.occupied = np.zeros((n, self.num_cells), dtype=bool)
+        self.body = np.zeros((n, self.num_cells), dtype=np.int32)
+        self.head_slot = np.zeros(n, dtype=np.int64)
+        self.length = np.zeros(n, dtype=np.int32)
+        self.grow_pending = np.zeros(n, dtype=np.int32)
+        self.direction = np.zeros(n, dtype=np.int8)
+        self.food = np.full(n, -1, dtype=np.int64)
+        self.food_type = np.zeros(n, dtype=np.int8)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.steps = np.zeros(n, dtype=np.int64)
+        self.alive = np.ones(n, dtype=bool)
+
+        self._all = np.arange(n)
+        self.reset_boards(self._all)
+
+    @property
+    def head(self):
+        """Packed head cell of every board"""
+        return self.body[self._all, self.head_slot]
+
+    def reset(self):
+        """Reset every board"""
+        self.reset_boards(self._all)
+
+    def reset_boards(self, boards):
+        """Put fresh snakes and food on the given boards"""
+        if len(boards) == 0:
+            return
+
+        self.occupied[boards] = False
+        self.score[boards] = 0
+        self.steps[boards] = 0
+        self.grow_pending[boards] = 0
+        self.direction[boards] = 3  # Moving right
+        self.alive[boards] = True
+
+        # Same starting snake as Snake.reset, tail in slot 0
+        start_x = self.width // 2
+        start_y = self.height // 2
+        for slot in range(SNAKE_START_LENGTH):
+            cell = start_y * self.width + start_x - (SNAKE_START_LENGTH - 1 - slot)
+            self.body[boards, slot] = cell
+            self.occupied[boards, cell] = True
+        self.head_slot[boards] = SNAKE_START_LENGTH - 1
+        self.length[boards] = SNAKE_START_LENGTH
+
+        self.spawn_food(boards)
+
+    def spawn_food(self, boards):
+        """Place food on a random free cell of each given board"""
+        if len(boards) == 0:
+            return
+
+        # A few rounds of rejection sampling handle almost every board
+        cells = self.rng.integers(0, self.num_cells, len(boards))
+        pending = np.ones(len(boards), dtype=bool)
+        for _ in range(4):
+            free = ~self.occupied[boards, cells] & ~self.obstacles[cells]
+            pending &= ~free
+            if not pending.any():
+                break
+            cells[pending] = self.rng.integers(0, self.num_cells, int(pending.sum()))
+
+        # Crowded boards pick uniformly among their free cells
+        if pending.any():
+            crowded = boards[pending]
+            keys = self.rng.random((len(crowded), self.num_cells))
+            keys[self.occupied[crowded] | self.obstacles] = -1.0
+            picked = keys.argmax(axis=1)
+            full = keys[np.arange(len(crowded)), picked] < 0
+            picked[full] = -1  # Nowhere left to put food
+            cells[pending] = picked
+
+        self.food[boards] = cells
+
+        # Food type odds from Food.spawn: 5% golden, 5% speed, 90% normal
+        roll = self.rng.random(len(boards))
+        self.food_type[boards] = np.where(
+            roll < 0.05, FOOD_GOLDEN, np.where(roll < 0.10, FOOD_SPEED, FOOD_NORMAL))
+
+    def step(self, actions):
+        """Advance every board by one move.
+
+        actions holds one code per board (see ACTIONS), or -1 to keep
+        going straight. Returns (rewards, dones): the points scored on
+        each board this step and which boards died and were reset.
+        """
+        actions = np.asarray(actions, dtype=np.int8)
+        boards = self._all
+
+        # Turn, refusing 180-degree reversals like Snake.change_direction
+        turning = (actions >= 0) & (actions != OPPOSITE[self.direction])
+        self.direction = np.where(turning, actions, self.direction).astype(np.int8)
+
+        # New head position
+        head = self.head
+        delta = ACTIONS[self.direction]
+        x = head % self.width + delta[:, 0]
+        y = head // self.width + delta[:, 1]
+        hit_wall = (x < 0) | (x >= self.width) | (y < 0) | (y >= self.height)
+        target = np.where(hit_wall, 0, y * self.width + x)
+
+        # The tail moves out before the head moves in, so following it is safe
+        growing = self.grow_pending > 0
+        tail_slot = (self.head_slot - self.length + 1) % self.num_cells
+        moving = ~growing
+        self.occupied[boards[moving], self.body[boards[moving], tail_slot[moving]]] = False
+
+        dead = hit_wall | self.occupied[boards, target] | self.obstacles[target]
+        live = ~dead
+
+        # Push the new head
+        live_boards = boards[live]
+        self.head_slot[live] = (self.head_slot[live] + 1) % self.num_cells
+        self.body[live_boards, self.head_slot[live]] = target[live]
+        self.occupied[live_boards, target[live]] = True
+        grew = live & growing
+        self.length[grew] += 1
+        self.grow_pending[grew] -= 1
+        self.steps[live] += 1
+
+        # Eat food
+        rewards = np.zeros(self.num_boards, dtype=np.int64)
+        ate = live & (target == self.food)
+        eaten_type = self.food_type[ate]
+        rewards[ate] = FOOD_POINTS_BY_TYPE[eaten_type]
+        self.grow_pending[ate] += FOOD_GROWTH_BY_TYPE[eaten_type]
+        self.score += rewards
+        self.spawn_food(boards[ate])
+
+        # Auto-reset boards that crashed
+        self.alive = live
+        self.reset_boards(boards[dead])
+        return rewards, dead
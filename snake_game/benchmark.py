@@ -0,0 +1,266 @@
+# benchmark.py - Headless performance scenarios for Emerald Serpent
+#
+# Runs scripted scenarios against the real Game with SDL's dummy video
+# driver and reports frames/second plus update and draw percentiles as
+# JSON, e.g.  python benchmark.py --frames 600 --output results.json
+import argparse
+import functools
+import json
+import os
+import sys
+import time
+from collections import deque
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from config import *
+from cells import to_index
+from game import Game
+from grid import get_level_cells
+from levelpack import level_count
+from profiler import percentile
+
+FRAME_DT = 1.0 / FPS
+
+
+# Links between neighbouring blocks of a board tour (see board_tour)
+LINK_LEFT, LINK_RIGHT, LINK_UP, LINK_DOWN = 1, 2, 4, 8
+
+
+@functools.lru_cache(maxsize=None)
+def board_tour(width, height, level):
+    """A loop through a board's 2x2 blocks that avoids a level's obstacles.
+
+    The blocks without an obstacle are joined into a spanning tree, one
+    byte of LINK_* flags per block. Walking around the tree (tour_step)
+    visits each cell of the joined blocks exactly once before coming back
+    to the start, so a snake shorter than the loop can follow it forever
+    without crashing. On an odd-sized board the last row or column is left
+    out. Returns the links, a cell on the loop and the loop's length.
+    """
+    columns, rows = width // 2, height // 2
+    obstacles = set(get_level_cells(level, width, height))
+    free = [not any(to_index(2 * (block % columns) + dx, 2 * (block // columns) + dy, width)
+                    in obstacles for dx in (0, 1) for dy in (0, 1))
+            for block in range(columns * rows)]
+
+    links = bytearray(columns * rows)
+    joined = [False] * len(free)
+    first = free.index(True)
+    joined[first] = True
+    queue = deque([first])
+    while queue:
+        block = queue.popleft()
+        bx, by = block % columns, block // columns
+        for dx, dy, link, back in ((-1, 0, LINK_LEFT, LINK_RIGHT), (1, 0, LINK_RIGHT, LINK_LEFT),
+                                   (0, -1, LINK_UP, LINK_DOWN), (0, 1, LINK_DOWN, LINK_UP)):
+            if 0 <= bx + dx < columns and 0 <= by + dy < rows:
+                neighbor = block + dy * columns + dx
+                if free[neighbor] and not joined[neighbor]:
+                    joined[neighbor] = True
+                    links[block] |= link
+                    links[neighbor] |= back
+                    queue.append(neighbor)
+    start = (2 * (first % columns), 2 * (first // columns))
+    return links, start, 4 * sum(joined)
+
+
+def tour_step(x, y, links, width):
+    """Direction from (x, y) to the next cell of a board_tour loop.
+
+    Each block is walked anticlockwise on screen (down its left column,
+    up its right one) except where it crosses into a linked neighbour.
+    """
+    block = links[(y // 2) * (width // 2) + x // 2]
+    if x % 2 == 0:
+        if y % 2 == 0:
+            return (-1, 0) if block & LINK_LEFT else (0, 1)
+        return (0, 1) if block & LINK_DOWN else (1, 0)
+    if y % 2 == 1:
+        return (1, 0) if block & LINK_RIGHT else (0, -1)
+    return (0, -1) if block & LINK_UP else (-1, 0)
+
+
+def busiest_level(width, height):
+    """The level with the most obstacles on a width x height board"""
+    return max(range(level_count()), key=lambda level: len(get_level_cells(level, width, height)))
+
+
+class TourPilot:
+    """Steers the snake along a board_tour loop, in place of the Autopilot"""
+
+    def __init__(self, sim, links):
+        self.sim = sim
+        self.links = links
+
+    def reset(self):
+        """Nothing to forget; the loop never changes"""
+
+    def choose(self):
+        """The direction of the next cell on the loop"""
+        return tour_step(*self.sim.snake.head, self.links, self.sim.width)
+
+
+def setup_long_snake(game, length=2000):
+    """A very long snake on the level with the most obstacles.
+
+    The snake is laid along a board_tour loop around the obstacles and a
+    TourPilot keeps it there, so every move goes through the normal
+    collision checks without the snake ever running into anything. The
+    level number is pushed past the point where the target length could
+    end the level.
+    """
+    sim = game.sim
+    width, height = sim.width, sim.height
+    sim.reset(seed=1)
+    busiest = busiest_level(width, height)
+    sim.grid.load_level(busiest)
+    sim.level = len(LEVEL_TARGET_LENGTH) + length
+
+    links, start, loop_length = board_tour(width, height, busiest)
+    if length >= loop_length:
+        raise ValueError(f"A {length}-segment snake does not fit a {width}x{height} board")
+
+    positions = [start]
+    for _ in range(length - 1):
+        x, y = positions[-1]
+        dx, dy = tour_step(x, y, links, width)
+        positions.append((x + dx, y + dy))
+    positions.reverse()
+
+    snake = game.snake
+    snake.set_body(positions)
+    snake.direction = snake.next_direction = tour_step(*snake.head, links, width)
+    game.autopilot = TourPilot(sim, links)
+    game.autopilot_enabled = True
+
+
+def setup_large_board(game):
+    """A 20000-segment snake touring a 1000x1000 board"""
+    setup_long_snake(game, length=20000)
+
+
+def setup_particles(game):
+    """A normal game under the autopilot with a screen full of particles"""
+    game.sim.reset(seed=2)
+    game.autopilot_enabled = True
+    # Room for the whole load in either particle engine
+    game.particles.budget = max(game.particles.budget, 5000)
+
+
+def script_particles(game, frame, count=5000):
+    """Top the particle count back up to `count` in bursts around the board"""
+    missing = count - len(game.particles)
+    if missing <= 0:
+        return
+
+    bursts = 10
+    for burst in range(bursts):
+        x = (burst * 79 + frame * 7) % SCREEN_WIDTH
+        y = (burst * 53 + frame * 3) % SCREEN_HEIGHT
+        game.particles.add_food_particles(x, y, GOLD, missing // bursts + 1)
+
+
+def setup_autopilot(game):
+    """Ordinary play under the autopilot, as a baseline"""
+    game.sim.reset(seed=3)
+    game.autopilot_enabled = True
+
+
+def script_restart(game, frame):
+    """Start over if the snake died"""
+    if game.state != "playing":
+        game.start_new_game()
+        game.state = "playing"
+
+
+SCENARIOS = {
+    "long_snake": (setup_long_snake, script_restart),
+    "particles_5000": (setup_particles, script_particles),
+    "autopilot": (setup_autopilot, script_restart),
+    "large_board": (setup_large_board, script_restart),
+}
+
+# Board size for scenarios not played on the default board
+BOARDS = {
+    "long_snake": (60, 45),
+    "large_board": (1000, 1000),
+}
+
+
+def run_scenario(name, frames):
+    """Run one scenario for a number of frames and return its results"""
+    setup, script = SCENARIOS[name]
+    width, height = BOARDS.get(name, (GRID_WIDTH, GRID_HEIGHT))
+
+    # Seeded so restarts and particle bursts are the same every run
+    game = Game(grid_width=width, grid_height=height, seed=0)
+    game.start_new_game()
+    game.state = "playing"
+    setup(game)
+    game.begin_recording()
+
+    update_times = []
+    draw_times = []
+    for frame in range(frames):
+        script(game, frame)
+        if game.state != "playing":
+            script_restart(game, frame)
+
+        start = time.perf_counter()
+        game.update_game(FRAME_DT)
+        updated = time.perf_counter()
+        game.draw()
+        drawn = time.perf_counter()
+
+        update_times.append(updated - start)
+        draw_times.append(drawn - updated)
+
+    return summarize(name, update_times, draw_times)
+
+
+def summarize(name, update_times, draw_times):
+    """Frames/second and per-phase percentiles in milliseconds"""
+    total = sum(update_times) + sum(draw_times)
+    result = {"scenario": name, "frames": len(update_times),
+              "fps": len(update_times) / total if total else 0.0}
+    for phase, times in (("update", update_times), ("draw", draw_times)):
+        ordered = sorted(times)
+        result[phase] = {
+            "p50_ms": percentile(ordered, 0.50) * 1000,
+            "p95_ms": percentile(ordered, 0.95) * 1000,
+            "p99_ms": percentile(ordered, 0.99) * 1000,
+            "mean_ms": sum(ordered) / len(ordered) * 1000,
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Emerald Serpent benchmarks")
+    parser.add_argument("--frames", type=int, default=600,
+                        help="frames to run per scenario")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="scenario to run (repeatable, default: all)")
+    parser.add_argument("--output", metavar="FILE",
+                        help="write the JSON results here instead of stdout")
+    args = parser.parse_args()
+
+    results = []
+    for name in args.scenario or SCENARIOS:
+        result = run_scenario(name, args.frames)
+        results.append(result)
+        print(f"{name:<16}{result['fps']:>9.1f} fps  "
+              f"update p95 {result['update']['p95_ms']:.2f} ms  "
+              f"draw p95 {result['draw']['p95_ms']:.2f} ms", file=sys.stderr)
+
+    report = json.dumps({"game": "snake", "results": results}, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# camera.py - Window-sized view onto boards larger than the screen
+from config import *
+
+
+class Camera:
+    """Follows a point on a board too big to fit in the window.
+
+    x and y are the board pixel shown at the top-left corner of the
+    screen. The view is kept inside the board, so it stops scrolling at
+    the edges.
+    """
+
+    def __init__(self, board_width, board_height,
+                 view_width=SCREEN_WIDTH, view_height=SCREEN_HEIGHT):
+        self.board_width = board_width
+        self.board_height = board_height
+        self.view_width = view_width
+        self.view_height = view_height
+        self.x = 0
+        self.y = 0
+
+    @property
+    def covers_view(self):
+        """Check if the board fills the whole window"""
+        return (self.board_width * GRID_SIZE >= self.view_width and
+                self.board_height * GRID_SIZE >= self.view_height)
+
+    def follow(self, cell_x, cell_y):
+        """Centre the view on a (possibly fractional) grid position"""
+        max_x = max(0, self.board_width * GRID_SIZE - self.view_width)
+        max_y = max(0, self.board_height * GRID_SIZE - self.view_height)
+        x = int((cell_x + 0.5) * GRID_SIZE) - self.view_width // 2
+        y = int((cell_y + 0.5) * GRID_SIZE) - self.view_height // 2
+        self.x = min(max(x, 0), max_x)
+        self.y = min(max(y, 0), max_y)
+
+    def visible_cells(self, margin=0):
+        """Cell rectangle (x0, y0, x1, y1) in view, end-exclusive.
+
+        margin widens it by that many cells on every side, for sprites
+        that are drawn slightly outside their cell.
+        """
+        x0 = max(0, self.x // GRID_SIZE - margin)
+        y0 = max(0, self.y // GRID_SIZE - margin)
+        x1 = min(self.board_width, -(-(self.x + self.view_width) // GRID_SIZE) + margin)
+        y1 = min(self.board_height, -(-(self.y + self.view_height) // GRID_SIZE) + margin)
+        return x0, y0, x1, y1
+
+    def in_view(self, screen_x, screen_y, radius=GRID_SIZE):
+        """Check if a point on the screen, give or take radius, is visible"""
+        return (-radius <= screen_x < self.view_width + radius and
+                -radius <= screen_y < self.view_height + radius)
@@ -0,0 +1,124 @@
+# cells.py - Packed grid cell helpers
+import random
+from array import array
+from config import *
+
+# The four moves, in the order recorded and sent direction codes number them
+DIRECTIONS = [(0, -1), (0, 1), (-1, 0), (1, 0)]  # up, down, left, right
+
+
+def to_index(x, y, width=GRID_WIDTH):
+    """Pack a grid position into a single cell index"""
+    return y * width + x
+
+
+def to_position(index, width=GRID_WIDTH):
+    """Unpack a cell index into an (x, y) grid position"""
+    y, x = divmod(index, width)
+    return x, y
+
+
+def in_bounds(x, y, width=GRID_WIDTH, height=GRID_HEIGHT):
+    """Check if a grid position lies on the board"""
+    return 0 <= x < width and 0 <= y < height
+
+
+class FreeCells:
+    """Index of unblocked board cells with O(1) updates and random picks.
+
+    Every cell sits in one permutation array: the first `count` entries are
+    the free cells and `slots` maps a cell back to its position in the
+    array, so freeing or claiming a cell is a single swap. Cells keep a
+    blocker count, letting the snake, obstacles and food claim the same
+    cell independently.
+    """
+
+    def __init__(self, size=GRID_WIDTH * GRID_HEIGHT):
+        self.size = size
+        self.clear()
+
+    def clear(self):
+        """Mark every cell as free"""
+        self.blockers = bytearray(self.size)
+        self.cells = array("i", range(self.size))
+        self.slots = array("i", range(self.size))
+        self.count = self.size
+
+    def __len__(self):
+        return self.count
+
+    def is_free(self, index):
+        """Check if nothing is blocking a cell"""
+        return self.blockers[index] == 0
+
+    def block(self, index):
+        """Claim a cell, removing it from the free set"""
+        self.blockers[index] += 1
+        if self.blockers[index] == 1:
+            self.count -= 1
+            self._swap(self.slots[index], self.count)
+
+    def unblock(self, index):
+        """Release a claim on a cell, freeing it once nothing else holds it"""
+        self.blockers[index] -= 1
+        if self.blockers[index] == 0:
+            self._swap(self.slots[index], self.count)
+            self.count += 1
+
+    def choice(self, rng=random):
+        """Pick a random free cell index, or None if the board is full"""
+        if self.count == 0:
+            return None
+        return self.cells[rng.randrange(self.count)]
+
+    def _swap(self, slot_a, slot_b):
+        cell_a = self.cells[slot_a]
+        cell_b = self.cells[slot_b]
+        self.cells[slot_a] = cell_b
+        self.cells[slot_b] = cell_a
+        self.slots[cell_b] = slot_a
+        self.slots[cell_a] = slot_b
+
+
+class BodyCells:
+    """Per-cell snake bookkeeping, shared by every snake on one board.
+
+    occupancy counts the segments on each cell (of any snake), owner holds
+    the id of the snake whose segment entered a cell last (0 when empty)
+    and entered the move number, counted by that snake, at which it did.
+    Collision checks read one cell instead of comparing snakes' bodies.
+
+    Cells holding more than one segment (a crash, or an invincible snake
+    crossing a body) also keep every segment's (owner, entered) in stacked,
+    oldest first, so the segment underneath gets the cell back when the
+    top one leaves.
+    """
+
+    def __init__(self, size=GRID_WIDTH * GRID_HEIGHT):
+        self.occupancy = bytearray(size)
+        self.owner = array("H", [0]) * size
+        self.entered = array("q", [0]) * size
+        self.stacked = {}
+
+    def cover(self, index, snake_id, stamp, below=False):
+        """Add a segment to an occupied cell, on top unless below is set"""
+        stack = self.stacked.get(index)
+        if stack is None:
+            stack = self.stacked[index] = [(self.owner[index], self.entered[index])]
+        if below:
+            stack.insert(0, (snake_id, stamp))
+        else:
+            stack.append((snake_id, stamp))
+            self.owner[index] = snake_id
+            self.entered[index] = stamp
+
+    def uncover(self, index, snake_id):
+        """Take a snake's oldest segment off a shared cell, handing the cell to the newest left"""
+        stack = self.stacked[index]
+        for i, (owner, _) in enumerate(stack):
+            if owner == snake_id:
+                del stack[i]
+                break
+        self.owner[index], self.entered[index] = stack[-1]
+        if len(stack) == 1:
+            del self.stacked[index]
@@ -7,6 +7,30 @@ GRID_SIZE = 20
 GRID_WIDTH = SCREEN_WIDTH // GRID_SIZE
 GRID_HEIGHT = SCREEN_HEIGHT // GRID_SIZE
 FPS = 60
+SIM_TICK_RATE = 120  # Fixed simulation ticks per second
+MAX_TICKS_PER_FRAME = 8  # Catch-up limit before dropping time (scaled by TIME_SCALE)
+TIME_SCALE = 1.0  # Simulation speed relative to wall time (turbo / QA runs)
+DIRTY_RECT_RENDERING = False  # Only push changed screen regions while playing
+
+# Large boards (bigger than the window) are drawn through a camera
+GRID_CHUNK_CELLS = 32  # Cells per side of a pre-rendered background chunk
+GRID_CHUNK_CACHE_SIZE = 24  # Background chunks kept around
+
+# Multiplayer (see world.py, server.py, net_client.py and arena.py)
+WORLD_WIDTH = 200
+WORLD_HEIGHT = 150
+WORLD_FOODS_PER_SNAKE = 2
+SPAWN_CLEARANCE = 5  # Free cells needed ahead of a newly spawned snake
+NET_HOST = "127.0.0.1"
+NET_PORT = 5555
+NET_TICK_RATE = 30  # World updates (and broadcasts) per second
+NET_MAX_BACKLOG = 256 * 1024  # Unsent bytes before a client is resynced with a snapshot
+ARENA_SNAKES = 100  # AI snakes in arena.py
+
+# Replays
+RECORD_REPLAYS = False  # Save every finished game to REPLAY_DIR
+REPLAY_DIR = "replays"
+REPLAY_CHECKSUM_INTERVAL = 60  # Ticks between recorded state checksums
 
 # Colors
 BACKGROUND = (15, 15, 30)  # Dark blue
@@ -29,6 +53,9 @@ SNAKE_HEAD_COLOR = (100, 255, 100)
 SNAKE_SPEED = 10  # Moves per second
 SPEED_INCREMENT = 0.5  # Speed increase per level
 MAX_SPEED = 20
+SNAKE_GRADIENT_STEPS = 64  # Shades in the head-to-tail color gradient
+SNAKE_WIGGLE_STEPS = 64  # Wiggle phases per cycle
+SNAKE_PULSE_STEPS = 16  # Shades of the invincible head's pulse
 
 # Food
 FOOD_COLOR = RED
@@ -37,6 +64,11 @@ SPEED_FOOD_COLOR = BLUE
 FOOD_SIZE = GRID_SIZE - 2
 FOOD_SPAWN_RATE = 0.95  # 95% normal, 5% special
 
+# Particles
+PARTICLE_SPRITE_CACHE_SIZE = 512  # Pre-rendered particle sprites kept around
+PARTICLE_BUDGET = 2000  # Live particles per system; the faintest are recycled past this
+ARRAY_PARTICLE_BUDGET = 50000  # The same for the NumPy engine, built for tens of thousands
+
 # Obstacles
 OBSTACLE_COLOR = (100, 100, 120)
 OBSTACLE_COUNT_PER_LEVEL = [0, 2, 5, 8]  # Obstacles per level
@@ -58,11 +90,36 @@ COMBO_BONUS = 5
 SPEED_BOOST_DURATION = 5
 INVINCIBILITY_DURATION = 5
 
+# Profiling
+PROFILER_SAMPLES = 600  # Frames kept for percentiles
+PROFILER_OVERLAY_INTERVAL = 30  # Frames between overlay refreshes
+
+# Adaptive quality (see quality.py)
+QUALITY_ADAPTIVE = True  # Scale effects down when frames run over budget
+QUALITY_WINDOW = 60  # Frames judged together before changing level
+QUALITY_DOWN_AT = 0.9  # Step down when p90 busy time is over this fraction of a frame
+QUALITY_UP_AT = 0.5  # Step up when it is under this fraction...
+QUALITY_UP_DELAY = 3  # ...for this many windows in a row
+# Effect settings from lowest to highest quality
+QUALITY_LEVELS = [
+    {"particles": 0.25, "snake_gradient": False, "snake_wiggle": False,
+     "food_sparkles": 0, "title_glow": 0},
+    {"particles": 0.5, "snake_gradient": True, "snake_wiggle": False,
+     "food_sparkles": 2, "title_glow": 2},
+    {"particles": 1.0, "snake_gradient": True, "snake_wiggle": True,
+     "food_sparkles": 4, "title_glow": 5},
+]
+
 # Font sizes
 TITLE_FONT_SIZE = 64
 MENU_FONT_SIZE = 36
 HUD_FONT_SIZE = 24
 SCORE_FONT_SIZE = 28
+TEXT_CACHE_SIZE = 256
+SCREEN_CACHE_SIZE = 8
+
+# Level pack file (see levelpack.py), used instead of LEVEL_OBSTACLES when present
+LEVEL_PACK = "levels.snkl"
 
 # Level layouts (grid positions for obstacles)
 LEVEL_OBSTACLES = [
@@ -1,55 +1,68 @@
-import pygame
 import random
 import math
 from config import *
+from cells import FreeCells, to_index, to_position
+from quality import quality
+
+try:
+    import pygame
+except ImportError:  # Only drawing needs pygame; headless runs work without it
+    pygame = None
 
 
 class Food:
-    def __init__(self, snake_segments=None, obstacles=None):
-        self.snake_segments = snake_segments or []
-        self.obstacles = obstacles or []
+    def __init__(self, free_cells=None, current_time=0, rng=random, width=GRID_WIDTH):
+        self.width = width
+        self.free_cells = free_cells if free_cells is not None else FreeCells()
+        self.rng = rng
         self.type = "normal"  # normal, golden, speed
-        self.position = (0, 0)
+        self.position = None
         self.spawn_time = 0
+        self.age = 0
         self.lifetime = 15  # seconds
-        self.spawn()
-
-    def spawn(self):
-        """Spawn food at random position"""
-        attempts = 0
-        max_attempts = 100
-
-        while attempts < max_attempts:
-            x = random.randint(0, GRID_WIDTH - 1)
-            y = random.randint(0, GRID_HEIGHT - 1)
-            position = (x, y)
-
-            # Check if position is free
-            if (position not in self.snake_segments and
-                    position not in self.obstacles):
-                self.position = position
-
-                # Determine food type
-                rand = random.random()
-                if rand < 0.05:  # 5% golden food
-                    self.type = "golden"
-                elif rand < 0.10:  # 5% speed food
-                    self.type = "speed"
-                else:  # 90% normal food
-                    self.type = "normal"
-
-                self.spawn_time = pygame.time.get_ticks() / 1000
-                return True
-
-            attempts += 1
-
-        # Couldn't find valid position
-        return False
+        self.spawn(current_time)
+
+    def spawn(self, current_time=0):
+        """Spawn food at random position (current_time is game time in seconds)"""
+        # Give the old cell back before picking a new one
+        self.remove()
+
+        index = self.free_cells.choice(self.rng)
+        if index is None:
+            # Board is full
+            return False
+
+        # Determine food type
+        rand = self.rng.random()
+        if rand < 0.05:  # 5% golden food
+            food_type = "golden"
+        elif rand < 0.10:  # 5% speed food
+            food_type = "speed"
+        else:  # 90% normal food
+            food_type = "normal"
+
+        self.place(index, food_type, current_time)
+        return True
+
+    def place(self, index, food_type, current_time=0):
+        """Put food of a given type on a packed cell"""
+        self.remove()
+        self.free_cells.block(index)
+        self.position = to_position(index, self.width)
+        self.type = food_type
+        self.spawn_time = current_time
+        self.age = 0
+
+    def remove(self):
+        """Take the food off the board"""
+        if self.position is not None:
+            self.free_cells.unblock(to_index(*self.position, self.width))
+            self.position = None
 
     def update(self, current_time):
         """Update food state (check expiration)"""
-        elapsed = current_time - self.spawn_time
-        return elapsed < self.lifetime
+        self.age = current_time - self.spawn_time
+        return self.age < self.lifetime
 
     def check_collision(self, snake_head):
         """Check if snake head collides with food"""
@@ -73,11 +86,19 @@ class Food:
             return {"speed_boost": True}
         return {"grow": 1}  # Normal food grows by 1
 
-    def draw(self, screen):
-        """Draw food on screen"""
+    def draw(self, screen, camera=None):
+        """Draw food on screen, returning the rect that was touched"""
+        if self.position is None:
+            return None
+
         x, y = self.position
         screen_x = x * GRID_SIZE + GRID_SIZE // 2
         screen_y = y * GRID_SIZE + GRID_SIZE // 2
+        if camera is not None:
+            screen_x -= camera.x
+            screen_y -= camera.y
+            if not camera.in_view(screen_x, screen_y):
+                return None
 
         # Choose color based on type
         if self.type == "normal":
@@ -96,7 +117,7 @@ class Food:
 
         # Draw pulsing circle
         radius = int(size * pulse / 2)
-        pygame.draw.circle(screen, color, (screen_x, screen_y), radius)
+        dirty = pygame.draw.circle(screen, color, (screen_x, screen_y), radius)
 
         # Draw highlight
         highlight_radius = radius // 2
@@ -108,17 +129,19 @@ class Food:
 
         # Draw sparkle effect for golden food
         if self.type == "golden":
-            for i in range(4):
-                angle = time * 2 + i * math.pi / 2
+            sparkles = quality["food_sparkles"]
+            for i in range(sparkles):
+                angle = time * 2 + i * math.pi * 2 / sparkles
                 sparkle_x = screen_x + math.cos(angle) * radius * 1.5
                 sparkle_y = screen_y + math.sin(angle) * radius * 1.5
                 sparkle_size = abs(math.sin(time * 4 + i)) * 2 + 1
-                pygame.draw.circle(screen, YELLOW,
-                                   (int(sparkle_x), int(sparkle_y)),
-                                   int(sparkle_size))
+                sparkle = pygame.draw.circle(screen, YELLOW,
+                                             (int(sparkle_x), int(sparkle_y)),
+                                             int(sparkle_size))
+                dirty.union_ip(sparkle)
 
         # Draw timer ring for expiration
-        elapsed = time - self.spawn_time
+        elapsed = self.age
         if elapsed > self.lifetime * 0.7:  # Last 30% of lifetime
             progress = (elapsed - self.lifetime * 0.7) / (self.lifetime * 0.3)
             angle = 360 * progress
@@ -129,7 +152,10 @@ class Food:
             else:
                 ring_color = ORANGE
 
-            pygame.draw.arc(screen, ring_color,
-                            (screen_x - radius - 2, screen_y - radius - 2,
-                             (radius + 2) * 2, (radius + 2) * 2),
-                            0, math.radians(angle), 3)
\ No newline at end of file
+            ring = pygame.draw.arc(screen, ring_color,
+                                   (screen_x - radius - 2, screen_y - radius - 2,
+                                    (radius + 2) * 2, (radius + 2) * 2),
+                                   0, math.radians(angle), 3)
+            dirty.union_ip(ring)
+
+        return dirty
@@ -1,17 +1,27 @@
 import pygame
+import os
 import random
 import time
-import math
 from config import *
-from snake import Snake
-from food import Food
-from grid import Grid
-from particles import ParticleSystem
-from ui import UI
+from sim import SnakeSim
+from autopilot import Autopilot
+from camera import Camera
+from replay import ReplayRecorder, ReplayPlayer
+from particles import create_particle_system
+from renderer import DirtyRectRenderer
+from ui import UI, StaticScreen
+from profiler import FrameProfiler
+from quality import QualityGovernor, quality
+
+# Frame phases timed by the profiler, in the order they run
+PROFILE_PHASES = ("events", "update", "grid", "food", "snake", "particles",
+                  "hud", "screen", "flip", "overlay", "wait")
 
 
 class Game:
-    def __init__(self):
+    def __init__(self, time_scale=TIME_SCALE, record_replays=RECORD_REPLAYS,
+                 profile_path=None, grid_width=GRID_WIDTH, grid_height=GRID_HEIGHT,
+                 seed=None):
         pygame.init()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Emerald Serpent - The Mystical Garden Quest")
@@ -21,55 +31,116 @@ class Game:
 
         # Game state
         self.state = "menu"  # menu, playing, game_over, instructions
-        self.score = 0
         self.high_score = 0
-        self.level = 0
-        self.combo = 0
-        self.combo_counter = 0
-        self.combo_timer = 0
-        self.consecutive_foods = 0
-
-        # Game objects
-        self.snake = Snake()
-        self.grid = Grid()
-        self.food = None
-        self.particles = ParticleSystem()
+
+        # Game rules live in the headless simulation, advanced in fixed
+        # ticks; accumulator holds wall time not yet simulated
+        self.sim = self.create_simulation(grid_width, grid_height)
+        self.time_scale = time_scale
+        self.accumulator = 0.0
+
+        # Named random streams: "gameplay" picks the seed of every new game
+        # and "cosmetic" drives effects, so particles never change how a
+        # game plays out and a seeded Game makes the same run every time
+        self.rng = random.Random()
+        self.cosmetic_rng = random.Random()
+        self.seed(seed)
+
+        # Every game is recorded in memory; finished ones are saved to disk
+        # when record_replays is set. replay_player drives on-screen playback.
+        self.record_replays = record_replays
+        self.recorder = None
+        self.replay_player = None
+
+        # Attract mode: the autopilot steers (through steer, so it is recorded)
+        self.autopilot_enabled = False
+        self.autopilot = Autopilot(self.sim) if self.sim is not None else None
+
+        self.particles = create_particle_system(self.cosmetic_rng)
         self.ui = UI()
 
-        # Game timers
-        self.game_time = 0
-        self.last_food_time = 0
+        # Static screen currently on the display and the composed pause frame
+        self.shown_screen = None
+        self.pause_screen = None
+
+        # Frame timings, shown with F3 and written to profile_path on exit
+        self.profiler = FrameProfiler(PROFILE_PHASES)
+        self.profile_path = profile_path
+
+        # Effects scale down when frames run over budget (see quality.py)
+        self.governor = QualityGovernor(quality) if QUALITY_ADAPTIVE else None
+
+        # Boards bigger than the window scroll to follow the snake's head
+        if grid_width * GRID_SIZE > SCREEN_WIDTH or grid_height * GRID_SIZE > SCREEN_HEIGHT:
+            self.camera = Camera(grid_width, grid_height)
+        else:
+            self.camera = None
+
+        # Optional renderer that only updates changed screen regions (the
+        # whole screen changes while a camera scrolls, so not with one)
+        if DIRTY_RECT_RENDERING and self.camera is None:
+            self.dirty_renderer = DirtyRectRenderer()
+        else:
+            self.dirty_renderer = None
+
+    def create_simulation(self, width, height):
+        """The simulation this front end plays (None when it has none)"""
+        return SnakeSim(width=width, height=height)
+
+    @property
+    def snake(self):
+        """The player's snake"""
+        return self.sim.snake
 
-        # Initialize game
-        self.start_new_game()
+    def seed(self, seed=None):
+        """Reseed the gameplay and cosmetic streams (None picks a fresh seed)"""
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.rng.seed(f"{seed}:gameplay")
+        self.cosmetic_rng.seed(f"{seed}:cosmetic")
 
     def start_new_game(self):
         """Start a new game from scratch"""
-        self.score = 0
-        self.level = 0
-        self.combo = 1
-        self.combo_counter = 0
-        self.combo_timer = 0
-        self.consecutive_foods = 0
-        self.game_time = 0
-
-        self.snake.reset()
-        self.grid.load_level(self.level)
-        self.spawn_food()
-
-    def spawn_food(self):
-        """Spawn new food in valid position"""
-        snake_positions = self.snake.segments
-        obstacle_positions = self.grid.get_all_obstacles()
-
-        self.food = Food(snake_positions, obstacle_positions)
-        self.last_food_time = time.time()
-
-    def get_target_length(self):
-        """Get target length for current level"""
-        if self.level < len(LEVEL_TARGET_LENGTH):
-            return LEVEL_TARGET_LENGTH[self.level]
-        return 30 + (self.level - len(LEVEL_TARGET_LENGTH)) * 10
+        self.sim.reset(self.rng.getrandbits(64))
+        self.begin_recording()
+
+    def begin_recording(self):
+        """Start recording the game from the simulation's current state"""
+        self.accumulator = 0.0
+        self.replay_player = None
+        self.autopilot.reset()
+        self.recorder = ReplayRecorder(self.sim.seed, self.sim.level, self.sim.score,
+                                       width=self.sim.width, height=self.sim.height)
+
+    def finish_recording(self):
+        """Close the current recording, saving it if replays are enabled"""
+        if not self.recorder:
+            return
+
+        self.recorder.finish(self.sim.tick_count, self.sim.checksum())
+        if self.record_replays:
+            os.makedirs(REPLAY_DIR, exist_ok=True)
+            name = time.strftime("snake-%Y%m%d-%H%M%S") + f"-{self.sim.score}.snr"
+            self.recorder.save(os.path.join(REPLAY_DIR, name))
+        self.recorder = None
+
+    def play_replay(self, replay):
+        """Watch a recorded game on screen"""
+        self.recorder = None
+        self.replay_player = ReplayPlayer(replay, self.sim)
+        self.accumulator = 0.0
+        self.paused = False
+        self.state = "playing"
+
+    def steer(self, direction):
+        """Turn the snake, recording the input for replays"""
+        if self.replay_player:
+            # Playback drives the snake
+            return
+
+        self.snake.change_direction(direction)
+        if self.recorder:
+            self.recorder.record_direction(self.sim.tick_count, direction)
 
     def handle_events(self):
         """Handle pygame events"""
@@ -90,15 +161,26 @@ class Game:
                 elif event.key == pygame.K_p and self.state == "playing":
                     self.paused = not self.paused
 
+                elif event.key == pygame.K_F3:
+                    self.profiler.toggle()
+                    if not self.profiler.visible:
+                        # Paint over the overlay
+                        self.shown_screen = None
+                        if self.dirty_renderer:
+                            self.dirty_renderer.invalidate()
+
+                elif event.key == pygame.K_TAB and self.state == "playing" and self.autopilot is not None:
+                    self.autopilot_enabled = not self.autopilot_enabled
+
                 # Snake controls
                 elif event.key == pygame.K_UP or event.key == pygame.K_w:
-                    self.snake.change_direction((0, -1))
+                    self.steer((0, -1))
                 elif event.key == pygame.K_DOWN or event.key == pygame.K_s:
-                    self.snake.change_direction((0, 1))
+                    self.steer((0, 1))
                 elif event.key == pygame.K_LEFT or event.key == pygame.K_a:
-                    self.snake.change_direction((-1, 0))
+                    self.steer((-1, 0))
                 elif event.key == pygame.K_RIGHT or event.key == pygame.K_d:
-                    self.snake.change_direction((1, 0))
+                    self.steer((1, 0))
 
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 mouse_click = True
@@ -106,237 +188,168 @@ class Game:
         return mouse_pos, mouse_click
 
     def update_game(self, dt):
-        """Update game logic"""
+        """Update game logic for dt seconds of wall time"""
         if self.paused or self.state != "playing":
             return
 
-        self.game_time += dt
-
-        # Update combo timer
-        if self.combo_timer > 0:
-            self.combo_timer -= dt
-            if self.combo_timer <= 0:
-                self.combo = 1
-                self.combo_counter = 0
-
-        # Update snake
-        self.snake.update(dt)
-
-        # Check for collisions
-        if self.check_collisions():
-            return
-
-        # Check food collision
-        if self.food and self.food.check_collision(self.snake.get_head_position()):
-            self.handle_food_collection()
-
-        # Update food expiration
-        if self.food and not self.food.update(self.game_time):
-            self.spawn_food()
+        # Run as many fixed simulation ticks as have fallen due
+        tick = 1.0 / SIM_TICK_RATE
+        max_ticks = max(1, int(MAX_TICKS_PER_FRAME * self.time_scale))
+        self.accumulator += dt * self.time_scale
+
+        ticks = 0
+        while self.accumulator >= tick:
+            if ticks == max_ticks:
+                # Too far behind (e.g. after a stall); drop the backlog
+                self.accumulator = 0.0
+                break
+
+            self.accumulator -= tick
+            ticks += 1
+
+            if self.replay_player:
+                events = self.replay_player.tick()
+            else:
+                if self.autopilot_enabled:
+                    direction = self.autopilot.choose()
+                    if direction != self.snake.next_direction:
+                        self.steer(direction)
+                events = self.sim.update(tick)
+            for event in events:
+                self.handle_sim_event(event)
+
+            if self.recorder and self.sim.tick_count % REPLAY_CHECKSUM_INTERVAL == 0:
+                self.recorder.record_checksum(self.sim.tick_count, self.sim.checksum())
+
+            if self.sim.score > self.high_score:
+                self.high_score = self.sim.score
+
+            if self.sim.state == "game_over" or (
+                    self.replay_player and self.replay_player.finished):
+                self.finish_recording()
+                self.state = "game_over"
+                return
 
         # Update particles
         self.particles.update()
 
         # Add trail particles
-        head_x, head_y = self.snake.get_head_position()
-        screen_x = head_x * GRID_SIZE + GRID_SIZE // 2
-        screen_y = head_y * GRID_SIZE + GRID_SIZE // 2
-
+        screen_x, screen_y = self.cell_center(self.snake.get_head_position())
         self.particles.add_trail_particles(screen_x, screen_y, GREEN, 1)
 
-        # Check level completion
-        if self.snake.length >= self.get_target_length():
-            self.level_complete()
-
-    def check_collisions(self):
-        """Check all collision types"""
-        # Check wall collision
-        if self.snake.check_wall_collision():
-            self.game_over()
-            return True
-
-        # Check self collision
-        if self.snake.check_self_collision():
-            self.game_over()
-            return True
-
-        # Check obstacle collision
-        if self.snake.check_obstacle_collision(self.grid.get_all_obstacles()):
-            self.game_over()
-            return True
-
-        return False
-
-    def handle_food_collection(self):
-        """Handle food collection and scoring"""
-        if not self.food:
-            return
-
-        # Calculate points with combo
-        base_points = self.food.get_points()
-        points_earned = int(base_points * self.combo)
-        self.score += points_earned
-
-        # Get food effect
-        effect = self.food.get_effect()
-
-        # Apply growth effect
-        if "grow" in effect:
-            self.snake.grow(effect["grow"])
-
-        # Apply speed boost
-        if effect.get("speed_boost"):
-            self.snake.activate_speed_boost()
-
-        # Update combo
-        self.consecutive_foods += 1
-        current_time = time.time()
-
-        # Check if food was eaten quickly enough for combo
-        if current_time - self.last_food_time < 2.0:  # 2 second window
-            self.combo_counter += 1
-            if self.combo_counter >= COMBO_MULTIPLIER_THRESHOLD:
-                self.combo = COMBO_MULTIPLIER
-                self.combo_timer = 3.0  # 3 seconds of combo
-                self.combo_counter = 0
-        else:
-            # Reset combo if too slow
-            self.combo_counter = 1
-            self.combo = 1
-
-        self.last_food_time = current_time
-
-        # Create particles at food position
-        food_x, food_y = self.food.position
-        screen_x = food_x * GRID_SIZE + GRID_SIZE // 2
-        screen_y = food_y * GRID_SIZE + GRID_SIZE // 2
-
-        self.particles.add_food_particles(screen_x, screen_y, self.food.type)
-
-        # Spawn new food
-        self.spawn_food()
-
-        # Gradually increase speed
-        if self.consecutive_foods % 5 == 0:
-            self.snake.increase_speed()
-
-    def level_complete(self):
-        """Handle level completion"""
-        # Add level completion bonus
-        level_bonus = LEVEL_COMPLETE_BONUS * (self.level + 1)
-        self.score += level_bonus
-
-        # Update high score
-        if self.score > self.high_score:
-            self.high_score = self.score
+    def handle_sim_event(self, event):
+        """Turn a simulation event into visual effects"""
+        kind = event[0]
 
-        # Move to next level
-        self.level += 1
+        if kind == "food":
+            # Create particles at food position
+            position, food_type = event[1], event[2]
+            screen_x, screen_y = self.cell_center(position)
+            self.particles.add_food_particles(screen_x, screen_y, food_type)
 
-        if self.level >= len(LEVEL_OBSTACLES):
-            # All levels completed
-            self.state = "game_over"
-        else:
-            # Start next level
-            self.snake.reset()
-            self.grid.load_level(self.level)
-            self.spawn_food()
-            self.consecutive_foods = 0
-            self.combo = 1
-            self.combo_counter = 0
-
-            # Add some random obstacles
-            extra_obstacles = random.randint(2, 5)
-            snake_positions = self.snake.segments
-            food_position = self.food.position if self.food else None
-            self.grid.add_random_obstacles(extra_obstacles, snake_positions, food_position)
-
-            self.state = "playing"
-
-    def game_over(self):
-        """Handle game over"""
-        # Create collision particles
-        head_x, head_y = self.snake.get_head_position()
-        screen_x = head_x * GRID_SIZE + GRID_SIZE // 2
-        screen_y = head_y * GRID_SIZE + GRID_SIZE // 2
+        elif kind == "game_over":
+            # Create collision particles
+            screen_x, screen_y = self.cell_center(event[1])
+            self.particles.add_collision_particles(screen_x, screen_y, RED, 30)
 
-        self.particles.add_collision_particles(screen_x, screen_y, RED, 30)
-
-        # Update high score
-        if self.score > self.high_score:
-            self.high_score = self.score
-
-        self.state = "game_over"
+    def cell_center(self, position):
+        """Get the board pixel position of a grid cell's center (the screen position without a camera)"""
+        x, y = position
+        return x * GRID_SIZE + GRID_SIZE // 2, y * GRID_SIZE + GRID_SIZE // 2
 
     def draw(self):
-        """Draw everything to the screen"""
-        self.screen.fill(BACKGROUND)
+        """Draw everything to the screen, returning the buttons on it"""
+        static = self.static_screen()
+        if static:
+            if self.dirty_renderer:
+                self.dirty_renderer.invalidate()
+
+            # Only push what changed since this screen was last shown
+            dirty = static.draw(self.screen, full=static is not self.shown_screen)
+            self.shown_screen = static
+            self.profiler.mark("screen")
+            if dirty:
+                pygame.display.update(dirty)
+            self.profiler.mark("flip")
+            return static.buttons
+
+        self.shown_screen = None
+        if self.dirty_renderer:
+            self.dirty_renderer.draw(self)
+        else:
+            self.draw_playing()
+            pygame.display.flip()
+            self.profiler.mark("flip")
+        return []
 
+    def static_screen(self):
+        """Get the composed screen for the current state, or None while playing"""
         if self.state == "menu":
-            buttons = self.ui.draw_main_menu(self.screen)
-            # Draw high score
-            high_score_text = self.ui.font_medium.render(
-                f"HIGH SCORE: {self.high_score}", True, YELLOW
-            )
-            high_score_rect = high_score_text.get_rect(
-                center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 50)
-            )
-            self.screen.blit(high_score_text, high_score_rect)
-
-        elif self.state == "instructions":
-            back_button = self.ui.draw_instructions(self.screen)
-            buttons = [back_button]
-
-        elif self.state == "playing":
-            # Draw grid
-            self.grid.draw(self.screen)
-
-            # Draw food
-            if self.food:
-                self.food.draw(self.screen)
+            return self.ui.main_menu_screen(self.high_score)
 
-            # Draw snake
-            self.snake.draw(self.screen)
+        if self.state == "instructions":
+            return self.ui.instructions_screen()
 
-            # Draw particles
-            self.particles.draw(self.screen)
-
-            # Draw HUD
-            target_length = self.get_target_length()
-            self.ui.draw_hud(
-                self.screen, self.score, self.snake.length,
-                self.level, self.snake.speed, self.combo, target_length
+        if self.state == "game_over":
+            level_complete = (self.snake.length >= self.sim.get_target_length())
+            return self.ui.game_over_screen(
+                self.sim.score, self.snake.length, level_complete, self.high_score
             )
 
-            buttons = []
-
-            # Draw pause indicator if paused
-            if self.paused:
+        if self.paused:
+            # The paused frame does not change, so compose it once
+            if self.pause_screen is None:
+                self.draw_playing()
                 self.ui.draw_pause(self.screen)
-
-        elif self.state == "game_over":
-            level_complete = (self.snake.length >= self.get_target_length())
-            buttons = self.ui.draw_game_over(
-                self.screen, self.score, self.snake.length, level_complete
-            )
-
-            # Draw high score
-            high_score_text = self.ui.font_medium.render(
-                f"HIGH SCORE: {self.high_score}", True, YELLOW
-            )
-            high_score_rect = high_score_text.get_rect(
-                center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 100)
-            )
-            self.screen.blit(high_score_text, high_score_rect)
-
-        pygame.display.flip()
-        return buttons
+                self.pause_screen = StaticScreen(self.screen.copy(), [])
+            return self.pause_screen
+
+        self.pause_screen = None
+        return None
+
+    def draw_playing(self):
+        """Draw the board, snake, particles and HUD"""
+        profiler = self.profiler
+        camera = self.camera
+        if camera:
+            # Keep the (interpolated) head in the middle of the view
+            progress = self.snake.move_progress(self.accumulator)
+            camera.follow(*next(self.snake.segment_positions(progress)))
+
+        # Draw grid
+        self.sim.grid.draw(self.screen, camera)
+        profiler.mark("grid")
+
+        # Draw food
+        if self.sim.food:
+            self.sim.food.draw(self.screen, camera)
+        profiler.mark("food")
+
+        # Draw snake
+        self.snake.draw(self.screen, self.accumulator, camera)
+        profiler.mark("snake")
+
+        # Draw particles
+        self.particles.draw(self.screen, (camera.x, camera.y) if camera else (0, 0))
+        profiler.mark("particles")
+
+        # Draw HUD
+        target_length = self.sim.get_target_length()
+        self.ui.draw_hud(
+            self.screen, self.sim.score, self.snake.length,
+            self.sim.level, self.snake.speed, self.sim.combo, target_length
+        )
+        profiler.mark("hud")
 
     def run(self):
         """Main game loop"""
         last_time = time.time()
 
+        profiler = self.profiler
+
         while self.running:
+            profiler.begin_frame()
+
             # Calculate delta time
             current_time = time.time()
             dt = current_time - last_time
@@ -344,10 +357,12 @@ class Game:
 
             # Handle events
             mouse_pos, mouse_click = self.handle_events()
+            profiler.mark("events")
 
             # Update game state
             if self.state == "playing":
                 self.update_game(dt)
+            profiler.mark("update")
 
             # Draw everything
             buttons = self.draw()
@@ -374,15 +389,28 @@ class Game:
                             self.start_new_game()
                             self.state = "playing"
                         elif button.text == "NEXT LEVEL":
-                            self.level += 1
-                            self.snake.reset()
-                            self.grid.load_level(self.level)
-                            self.spawn_food()
+                            self.sim.next_level(self.rng.getrandbits(64))
+                            self.begin_recording()
                             self.state = "playing"
                         elif button.text == "MAIN MENU":
                             self.state = "menu"
+            profiler.mark("events")
+
+            if profiler.visible:
+                rect = profiler.draw(self.screen)
+                if self.dirty_renderer and self.shown_screen is None:
+                    # The renderer drew this frame; have it paint the overlay over next frame
+                    self.dirty_renderer.add_overlay(rect)
+                profiler.mark("overlay")
 
             # Cap the frame rate
             self.clock.tick(FPS)
-
+            profiler.mark("wait")
+            if self.governor and self.state == "playing" and not self.paused:
+                # Only gameplay frames say anything about the effects' cost
+                self.governor.record(profiler.busy_time())
+            profiler.end_frame()
+
+        if self.profile_path:
+            profiler.dump(self.profile_path)
         pygame.quit()
\ No newline at end of file
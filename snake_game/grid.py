@@ -1,87 +1,222 @@
-import pygame
 from config import *
+from cells import FreeCells, to_index, to_position, in_bounds
+from levelpack import default_pack, level_count
 import random
 import math
+from collections import OrderedDict
+
+try:
+    import pygame
+except ImportError:  # Only drawing needs pygame; headless runs work without it
+    pygame = None
+
+
+# Packed obstacle cells per level, built the first time a level is loaded
+_level_cells = {}
+
+
+def get_level_cells(level, width=GRID_WIDTH, height=GRID_HEIGHT):
+    """Get the packed obstacle cell indices for a level on a width x height board"""
+    key = (level, width, height)
+    if key not in _level_cells:
+        pack = default_pack()
+        if not 0 <= level < level_count():
+            cells = ()
+        elif pack is not None:
+            cells = pack.level_cells(level, width, height)
+        else:
+            cells = tuple(dict.fromkeys(to_index(x, y, width) for x, y in LEVEL_OBSTACLES[level]
+                                        if in_bounds(x, y, width, height)))
+        _level_cells[key] = cells
+    return _level_cells[key]
 
 
 class Grid:
-    def __init__(self):
+    def __init__(self, free_cells=None, width=GRID_WIDTH, height=GRID_HEIGHT):
+        self.width = width
+        self.height = height
+        self.free_cells = free_cells if free_cells is not None else FreeCells(width * height)
         self.obstacles = []
+        self.obstacle_map = bytearray(width * height)
+        self.obstacle_view = frozenset()
         self.current_level = 0
 
+        # Pre-rendered grid lines and obstacles, rebuilt when the layout
+        # changes: the whole board when it fits the window, otherwise
+        # square chunks of it rendered as the camera reaches them
+        self.background = None
+        self.chunks = OrderedDict()
+
     def load_level(self, level):
         """Load obstacles for specified level"""
         self.current_level = level
-        self.obstacles = []
+        return self.set_obstacles(get_level_cells(level, self.width, self.height))
+
+    def set_obstacles(self, cells):
+        """Replace every obstacle with ones on the given packed cells"""
+        self.clear()
 
-        if 0 <= level < len(LEVEL_OBSTACLES):
-            self.obstacles = LEVEL_OBSTACLES[level].copy()
+        for index in cells:
+            self._place(index)
+        self.obstacle_view = frozenset(self.obstacles)
+        self.layout_changed()
 
         return self.obstacles
 
-    def add_random_obstacles(self, count, snake_segments, food_position):
-        """Add random obstacles avoiding snake and food"""
+    def clear(self):
+        """Remove every obstacle, releasing their cells"""
+        for position in self.obstacles:
+            index = to_index(*position, self.width)
+            self.obstacle_map[index] = 0
+            self.free_cells.unblock(index)
+        self.obstacles = []
+        self.obstacle_view = frozenset()
+        self.layout_changed()
+
+    def layout_changed(self):
+        """Throw away pre-rendered backgrounds after obstacles change"""
+        self.background = None
+        self.chunks.clear()
+
+    def _place(self, index):
+        """Put an obstacle on a cell"""
+        self.obstacle_map[index] = 1
+        self.free_cells.block(index)
+        self.obstacles.append(to_position(index, self.width))
+
+    def add_random_obstacles(self, count, rng=random):
+        """Add random obstacles on free cells (avoiding snake and food)"""
         added = 0
-        attempts = 0
-        max_attempts = count * 10
-
-        while added < count and attempts < max_attempts:
-            x = random.randint(0, GRID_WIDTH - 1)
-            y = random.randint(0, GRID_HEIGHT - 1)
-            position = (x, y)
 
-            # Check if position is free
-            if (position not in snake_segments and
-                    position != food_position and
-                    position not in self.obstacles):
-                self.obstacles.append(position)
-                added += 1
+        while added < count:
+            index = self.free_cells.choice(rng)
+            if index is None:
+                # Board is full
+                break
 
-            attempts += 1
+            self._place(index)
+            added += 1
 
+        if added:
+            self.obstacle_view = frozenset(self.obstacles)
+            self.layout_changed()
         return added
 
     def is_obstacle(self, position):
         """Check if position contains an obstacle"""
-        return position in self.obstacles
+        x, y = position
+        return (in_bounds(x, y, self.width, self.height) and
+                self.obstacle_map[to_index(x, y, self.width)] == 1)
 
     def get_all_obstacles(self):
-        """Get all obstacle positions"""
-        return self.obstacles.copy()
+        """Get all obstacle positions (read-only, shared between calls)"""
+        return self.obstacle_view
+
+    def draw(self, screen, camera=None):
+        """Draw grid and obstacles, through camera when the board is larger than the window"""
+        if camera is None:
+            if self.background is None:
+                self.background = self.render_background(screen)
+            screen.blit(self.background, (0, 0))
+            return
+
+        if not camera.covers_view:
+            screen.fill(BACKGROUND)
+
+        # Blit the chunks the view overlaps
+        chunk_pixels = GRID_CHUNK_CELLS * GRID_SIZE
+        x0, y0, x1, y1 = camera.visible_cells()
+        blits = []
+        for chunk_y in range(y0 // GRID_CHUNK_CELLS, (y1 - 1) // GRID_CHUNK_CELLS + 1):
+            for chunk_x in range(x0 // GRID_CHUNK_CELLS, (x1 - 1) // GRID_CHUNK_CELLS + 1):
+                blits.append((self.get_chunk(screen, chunk_x, chunk_y),
+                              (chunk_x * chunk_pixels - camera.x, chunk_y * chunk_pixels - camera.y)))
+        screen.blits(blits, doreturn=False)
+
+    def get_chunk(self, screen, chunk_x, chunk_y):
+        """Get a rendered chunk, keeping only the most recently used ones"""
+        key = (chunk_x, chunk_y)
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            self.chunks.move_to_end(key)
+            return chunk
+
+        chunk = self.render_chunk(screen, chunk_x, chunk_y)
+        self.chunks[key] = chunk
+        if len(self.chunks) > GRID_CHUNK_CACHE_SIZE:
+            self.chunks.popitem(last=False)
+        return chunk
+
+    def render_chunk(self, screen, chunk_x, chunk_y):
+        """Render the grid lines and obstacles of one square chunk of the board"""
+        origin_x = chunk_x * GRID_CHUNK_CELLS
+        origin_y = chunk_y * GRID_CHUNK_CELLS
+        columns = min(GRID_CHUNK_CELLS, self.width - origin_x)
+        rows = min(GRID_CHUNK_CELLS, self.height - origin_y)
+        width = columns * GRID_SIZE
+        height = rows * GRID_SIZE
+
+        surface = pygame.Surface((width, height)).convert(screen)
+        surface.fill(BACKGROUND)
+        for x in range(0, width, GRID_SIZE):
+            pygame.draw.line(surface, GRID_COLOR, (x, 0), (x, height), 1)
+        for y in range(0, height, GRID_SIZE):
+            pygame.draw.line(surface, GRID_COLOR, (0, y), (width, y), 1)
+
+        # Obstacles straight from the map, so only this chunk's cells are visited
+        for y in range(origin_y, origin_y + rows):
+            start = y * self.width + origin_x
+            cells = self.obstacle_map[start:start + columns]
+            x = cells.find(1)
+            while x != -1:
+                self.draw_obstacle(surface, origin_x + x, y, origin_x, origin_y)
+                x = cells.find(1, x + 1)
+
+        return surface
+
+    def render_background(self, screen):
+        """Render the static grid lines and obstacles onto one surface"""
+        surface = pygame.Surface(screen.get_size()).convert(screen)
+        surface.fill(BACKGROUND)
 
-    def draw(self, screen):
-        """Draw grid and obstacles"""
         # Draw grid lines
         for x in range(0, SCREEN_WIDTH, GRID_SIZE):
-            pygame.draw.line(screen, GRID_COLOR, (x, 0), (x, SCREEN_HEIGHT), 1)
+            pygame.draw.line(surface, GRID_COLOR, (x, 0), (x, SCREEN_HEIGHT), 1)
         for y in range(0, SCREEN_HEIGHT, GRID_SIZE):
-            pygame.draw.line(screen, GRID_COLOR, (0, y), (SCREEN_WIDTH, y), 1)
+            pygame.draw.line(surface, GRID_COLOR, (0, y), (SCREEN_WIDTH, y), 1)
 
         # Draw obstacles
         for x, y in self.obstacles:
-            screen_x = x * GRID_SIZE
-            screen_y = y * GRID_SIZE
-
-            # Draw obstacle with 3D effect
-            pygame.draw.rect(screen, OBSTACLE_COLOR,
-                             (screen_x, screen_y, GRID_SIZE, GRID_SIZE),
-                             border_radius=GRID_SIZE // 6)
-
-            # Draw highlight
-            pygame.draw.rect(screen, (150, 150, 170),
-                             (screen_x + 2, screen_y + 2,
-                              GRID_SIZE - 4, GRID_SIZE // 3),
-                             border_radius=GRID_SIZE // 8)
-
-            # Draw cracks/texture
-            for i in range(3):
-                crack_x = screen_x + random.randint(5, GRID_SIZE - 5)
-                crack_y = screen_y + random.randint(5, GRID_SIZE - 5)
-                crack_length = random.randint(3, 8)
-                angle = random.uniform(0, math.pi * 2)
-
-                end_x = crack_x + math.cos(angle) * crack_length
-                end_y = crack_y + math.sin(angle) * crack_length
-
-                pygame.draw.line(screen, (80, 80, 100),
-                                 (crack_x, crack_y), (end_x, end_y), 2)
\ No newline at end of file
+            self.draw_obstacle(surface, x, y)
+
+        return surface
+
+    def draw_obstacle(self, surface, x, y, origin_x=0, origin_y=0):
+        """Draw one obstacle block on a surface whose top-left is cell (origin_x, origin_y)"""
+        screen_x = (x - origin_x) * GRID_SIZE
+        screen_y = (y - origin_y) * GRID_SIZE
+
+        # Draw obstacle with 3D effect
+        pygame.draw.rect(surface, OBSTACLE_COLOR,
+                         (screen_x, screen_y, GRID_SIZE, GRID_SIZE),
+                         border_radius=GRID_SIZE // 6)
+
+        # Draw highlight
+        pygame.draw.rect(surface, (150, 150, 170),
+                         (screen_x + 2, screen_y + 2,
+                          GRID_SIZE - 4, GRID_SIZE // 3),
+                         border_radius=GRID_SIZE // 8)
+
+        # Draw cracks/texture, seeded by cell so each block keeps its look
+        rng = random.Random(to_index(x, y, self.width))
+        for i in range(3):
+            crack_x = screen_x + rng.randint(5, GRID_SIZE - 5)
+            crack_y = screen_y + rng.randint(5, GRID_SIZE - 5)
+            crack_length = rng.randint(3, 8)
+            angle = rng.uniform(0, math.pi * 2)
+
+            end_x = crack_x + math.cos(angle) * crack_length
+            end_y = crack_y + math.sin(angle) * crack_length
+
+            pygame.draw.line(surface, (80, 80, 100),
+                             (crack_x, crack_y), (end_x, end_y), 2)
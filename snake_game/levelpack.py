@@ -0,0 +1,127 @@
+# levelpack.py - On-disk obstacle level packs, decoded one level at a time
+import argparse
+import mmap
+import os
+import struct
+from config import *
+
+# File layout: header, then an index of (offset, size) pairs, one per
+# level, then each level's obstacles as a bitmap of width * height bits,
+# row-major, least significant bit first.
+MAGIC = b"SNKL"
+VERSION = 1
+HEADER = struct.Struct("<4sBHHI")  # magic, version, width, height, level count
+INDEX_ENTRY = struct.Struct("<II")  # offset, size
+
+
+def encode_level(obstacles, width, height):
+    """Pack a list of (x, y) obstacle positions into a bitmap"""
+    bitmap = bytearray((width * height + 7) // 8)
+    for x, y in obstacles:
+        if 0 <= x < width and 0 <= y < height:
+            index = y * width + x
+            bitmap[index >> 3] |= 1 << (index & 7)
+    return bytes(bitmap)
+
+
+def write_pack(path, levels, width=GRID_WIDTH, height=GRID_HEIGHT):
+    """Write a level pack from a list of obstacle position lists"""
+    bitmaps = [encode_level(obstacles, width, height) for obstacles in levels]
+
+    offset = HEADER.size + INDEX_ENTRY.size * len(bitmaps)
+    index = bytearray()
+    for bitmap in bitmaps:
+        index += INDEX_ENTRY.pack(offset, len(bitmap))
+        offset += len(bitmap)
+
+    with open(path, "wb") as pack_file:
+        pack_file.write(HEADER.pack(MAGIC, VERSION, width, height, len(bitmaps)))
+        pack_file.write(index)
+        for bitmap in bitmaps:
+            pack_file.write(bitmap)
+
+
+class LevelPack:
+    """A memory-mapped level pack.
+
+    Opening a pack reads only its header; a level's bitmap is decoded when
+    that level is asked for, so packs with thousands of levels cost
+    nothing until they are played.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, self.width, self.height, self.count = HEADER.unpack_from(self.data)
+        except (ValueError, struct.error):
+            self.file.close()
+            raise ValueError(f"{path} is not a snake level pack")
+
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a snake level pack (or an unsupported version)")
+
+    def __len__(self):
+        return self.count
+
+    def level_cells(self, level, width=GRID_WIDTH, height=GRID_HEIGHT):
+        """Decode a level into packed cell indices for a width x height board.
+
+        Obstacles that fall outside the board are dropped.
+        """
+        offset, size = INDEX_ENTRY.unpack_from(self.data, HEADER.size + INDEX_ENTRY.size * level)
+        bitmap = self.data[offset:offset + size]
+
+        cells = []
+        pack_width = self.width
+        for byte_index, byte in enumerate(bitmap):
+            if not byte:
+                continue
+            for bit in range(8):
+                if byte >> bit & 1:
+                    y, x = divmod(byte_index * 8 + bit, pack_width)
+                    if x < width and y < height:
+                        cells.append(y * width + x)
+        return tuple(cells)
+
+    def close(self):
+        """Unmap and close the pack file"""
+        self.data.close()
+        self.file.close()
+
+
+_default_pack = None
+_default_pack_loaded = False
+
+
+def default_pack():
+    """The LEVEL_PACK file next to the game, or None if there isn't one"""
+    global _default_pack, _default_pack_loaded
+    if not _default_pack_loaded:
+        _default_pack_loaded = True
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), LEVEL_PACK)
+        if os.path.exists(path):
+            _default_pack = LevelPack(path)
+    return _default_pack
+
+
+def level_count():
+    """Number of levels, from the level pack if there is one"""
+    pack = default_pack()
+    return len(pack) if pack is not None else len(LEVEL_OBSTACLES)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build snake level packs")
+    parser.add_argument("output", help="pack file to write")
+    args = parser.parse_args()
+
+    # Export the built-in layouts as a starting point
+    write_pack(args.output, LEVEL_OBSTACLES)
+    print(f"Wrote {len(LEVEL_OBSTACLES)} levels to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
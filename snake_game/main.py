@@ -1,14 +1,67 @@
-from game import Game
+import argparse
+import time
+from config import TIME_SCALE, RECORD_REPLAYS, GRID_WIDTH, GRID_HEIGHT, SNAKE_START_LENGTH
+from replay import Replay, ReplayPlayer
+
+
+def play_headless(path):
+    """Re-simulate a replay without a window and report the result"""
+    replay = Replay.load(path)
+    player = ReplayPlayer(replay)
+
+    start = time.perf_counter()
+    sim = player.run()
+    elapsed = time.perf_counter() - start
+
+    print(f"Replay OK: {sim.tick_count} ticks, score {sim.score}, level {sim.level + 1}")
+    print(f"Simulated at {sim.tick_count / max(elapsed, 1e-9):,.0f} ticks/second")
+
+
+def board_size(text):
+    """Parse a WIDTHxHEIGHT board size"""
+    try:
+        width, height = (int(part) for part in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {text!r}")
+    if width < SNAKE_START_LENGTH * 2 or height < 1 or width > 0xFFFF or height > 0xFFFF:
+        raise argparse.ArgumentTypeError(f"board size {text!r} out of range")
+    return width, height
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Emerald Serpent")
+    parser.add_argument("--time-scale", type=float, default=TIME_SCALE,
+                        help="simulation speed relative to real time (turbo/QA)")
+    parser.add_argument("--record", action="store_true", default=RECORD_REPLAYS,
+                        help="save a replay of every finished game")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="play back a recorded game")
+    parser.add_argument("--headless", action="store_true",
+                        help="verify the --replay file without opening a window")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="write frame timings to a .csv or .json file on exit")
+    parser.add_argument("--board", type=board_size, default=(GRID_WIDTH, GRID_HEIGHT),
+                        metavar="WIDTHxHEIGHT",
+                        help="board size in cells; boards larger than the window scroll")
+    parser.add_argument("--seed", type=int,
+                        help="seed for every game and effect, for reproducible runs")
+    args = parser.parse_args()
+
+    if args.replay and args.headless:
+        play_headless(args.replay)
+        return
+
+    from game import Game
+
     print("Starting Emerald Serpent Game...")
     print("The Mystical Garden Quest")
     print("=" * 50)
     print("Controls:")
     print("- Movement: Arrow Keys or WASD")
     print("- Pause: P key")
+    print("- Autopilot: TAB key")
     print("- Menu: ESC key")
+    print("- Frame profiler: F3 key")
     print("=" * 50)
     print("Objective:")
     print("- Eat food to grow")
@@ -16,7 +69,13 @@ def main():
     print("- Avoid walls, obstacles, and yourself")
     print("=" * 50)
 
-    game = Game()
+    replay = Replay.load(args.replay) if args.replay else None
+    width, height = (replay.width, replay.height) if replay else args.board
+    game = Game(time_scale=args.time_scale, record_replays=args.record,
+                profile_path=args.profile, grid_width=width, grid_height=height,
+                seed=args.seed)
+    if replay:
+        game.play_replay(replay)
     game.run()
 
 
@@ -0,0 +1,346 @@
+# net_client.py - Play on a multiplayer server with the normal game front end
+#
+#   python net_client.py --host 127.0.0.1 --port 5555
+#   python net_client.py --loopback        (starts a local server first)
+import argparse
+import asyncio
+import queue
+import threading
+from config import *
+from cells import FreeCells, BodyCells, to_position
+from snake import Snake
+from food import Food
+from grid import Grid
+from game import Game
+from camera import Camera
+import protocol
+
+
+class RemoteBoard:
+    """The client's copy of a server's board, kept in step by its messages.
+
+    Remote snakes are ordinary Snake objects on a shared BodyCells grid,
+    moved with push_head and pop_tail as deltas arrive, so they draw
+    exactly like the local snake. Their speed is set to the tick rate so
+    Snake.draw interpolates each move across one server tick.
+    """
+
+    def __init__(self, width, height, tick_rate):
+        self.width = width
+        self.height = height
+        self.tick_rate = tick_rate
+        self.tick = 0
+
+        self.free_cells = FreeCells(width * height)
+        self.body_cells = BodyCells(width * height)
+        self.grid = Grid(self.free_cells, width, height)
+        self.snakes = {}
+        self.scores = {}
+        self.foods = {}
+
+    def apply_snapshot(self, payload):
+        """Replace everything with a snapshot from the server"""
+        tick, obstacles, snakes, foods = protocol.decode_snapshot(payload, self.width, self.height)
+        self.tick = tick
+
+        for snake in self.snakes.values():
+            snake.clear_body()
+        for food in self.foods.values():
+            food.remove()
+        self.foods = {}
+        self.grid.set_obstacles(obstacles)
+
+        # Drop snakes that left and create the new ones before laying out
+        # any body, so a new snake's first layout cannot cover a body
+        for snake_id in set(self.snakes) - set(snakes):
+            del self.snakes[snake_id]
+            self.scores.pop(snake_id, None)
+        for snake_id, (score, direction, cells) in snakes.items():
+            self.get_snake(snake_id, cells)
+        for snake_id, (score, direction, cells) in snakes.items():
+            self.spawn(snake_id, cells)
+            self.snakes[snake_id].direction = direction
+            self.scores[snake_id] = score
+
+        for cell, food_type in foods.items():
+            self.add_food(cell, food_type)
+
+    def apply_delta(self, payload):
+        """Apply one tick of changes and return its events"""
+        tick, events = protocol.decode_delta(payload, self.width, self.height)
+        self.tick = tick
+        applied = []
+
+        # Only snakes that move this tick are interpolated
+        for snake in self.snakes.values():
+            snake.has_moved = False
+            snake.move_timer = 0
+
+        for event in events:
+            kind = event[0]
+            snake = self.snakes.get(event[1]) if kind in ("move", "tail", "death", "leave") else None
+
+            if kind == "move" and snake is not None and snake.body:
+                head = protocol.step(snake.body[0], event[2], self.width, self.height)
+                snake.direction = event[2]
+                snake.vacated = None
+                snake.push_head(*to_position(head, self.width))
+                snake.length = len(snake.body)
+            elif kind == "tail" and snake is not None and snake.body:
+                snake.pop_tail()
+                snake.length = len(snake.body)
+            elif kind == "spawn":
+                self.spawn(event[1], event[2])
+            elif kind == "death" and snake is not None:
+                # Report where it died, then wait for the respawn
+                event = ("death", event[1], snake.head)
+                snake.clear_body()
+            elif kind == "leave" and snake is not None:
+                snake.clear_body()
+                del self.snakes[event[1]]
+                self.scores.pop(event[1], None)
+            elif kind == "food_removed":
+                food = self.foods.pop(event[1], None)
+                if food is not None:
+                    food.remove()
+            elif kind == "food_added":
+                self.add_food(event[1], event[2])
+            elif kind == "score":
+                self.scores[event[1]] = event[2]
+            applied.append(event)
+        return applied
+
+    def get_snake(self, snake_id, cells):
+        """Get a snake by id, creating it with its head on the first of cells if it is new"""
+        snake = self.snakes.get(snake_id)
+        if snake is None:
+            # Snakes spawned by the server start with Snake.reset's body,
+            # so a new snake's first layout is already in the right place
+            start = to_position(cells[0], self.width) if cells else None
+            snake = Snake(self.free_cells, self.width, self.height, self.body_cells,
+                          snake_id, start)
+            snake.speed = self.tick_rate
+            self.snakes[snake_id] = snake
+        return snake
+
+    def spawn(self, snake_id, cells):
+        """Lay a snake's body on the given packed cells, creating it if it is new"""
+        positions = [to_position(cell, self.width) for cell in cells]
+        snake = self.get_snake(snake_id, cells)
+        if positions:
+            snake.set_body(positions)
+        else:
+            snake.clear_body()
+        snake.has_moved = False
+
+    def add_food(self, cell, food_type):
+        """Show a piece of food on a cell"""
+        food = self.foods.get(cell)
+        if food is None:
+            food = Food(self.free_cells, width=self.width)
+            self.foods[cell] = food
+        food.place(cell, food_type)
+
+
+class NetClient:
+    """A connection to a SnakeServer, run on a background thread.
+
+    Messages arrive on a queue that the game drains once per frame with
+    poll; steer hands direction changes to the network thread.
+    """
+
+    def __init__(self, host=NET_HOST, port=NET_PORT):
+        self.host = host
+        self.port = port
+        self.messages = queue.SimpleQueue()
+        self.loop = None
+        self.writer = None
+        self.thread = threading.Thread(target=asyncio.run, args=(self.receive(),), daemon=True)
+
+    def start(self, timeout=5.0):
+        """Connect and wait for the server's welcome, returning it"""
+        self.thread.start()
+        message = self.messages.get(timeout=timeout)
+        if message[0] != "welcome":
+            raise ConnectionError(f"Could not join {self.host}:{self.port}: {message}")
+        return message
+
+    async def receive(self):
+        """Network thread: queue every message until the connection closes"""
+        try:
+            reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            self.loop = asyncio.get_running_loop()
+            while True:
+                self.messages.put(await protocol.read_message(reader))
+        except (asyncio.IncompleteReadError, ConnectionError, OSError, ValueError) as error:
+            self.messages.put(("closed", error))
+
+    def poll(self):
+        """Every message received since the last poll"""
+        messages = []
+        while True:
+            try:
+                messages.append(self.messages.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def steer(self, direction):
+        """Send a direction change"""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.writer.write, protocol.encode_steer(direction))
+
+    def close(self):
+        """Hang up"""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.writer.close)
+
+
+class NetGame(Game):
+    """The game front end, playing on a server instead of a local simulation.
+
+    Menus, particles, the HUD, the profiler and all of the drawing code
+    are the single-player game's; the board comes from a RemoteBoard and
+    input goes to the server.
+    """
+
+    def __init__(self, client, profile_path=None):
+        _, self.player_id, width, height, tick_rate = client.start()
+        super().__init__(record_replays=False, profile_path=profile_path)
+        self.client = client
+        self.board = RemoteBoard(width, height, tick_rate)
+        self.camera = Camera(width, height)
+        self.dirty_renderer = None
+
+        # Seconds since the last server tick, for interpolation
+        self.lag = 0.0
+        self.state = "playing"
+
+    def create_simulation(self, width, height):
+        """The server runs the game, so there is no local simulation or autopilot"""
+        return None
+
+    @property
+    def snake(self):
+        """The player's snake (without a body while waiting to respawn)"""
+        return self.board.snakes.get(self.player_id)
+
+    def start_new_game(self):
+        """The server game never ends; just go back to it"""
+
+    def begin_recording(self):
+        """Network games are not recorded"""
+
+    def finish_recording(self):
+        """Network games are not recorded"""
+
+    def steer(self, direction):
+        """Send a turn to the server, which checks it"""
+        self.client.steer(direction)
+
+    def update_game(self, dt):
+        """Apply what the server sent since the last frame"""
+        self.lag += dt
+        for message in self.client.poll():
+            kind = message[0]
+            if kind == "snapshot":
+                self.board.apply_snapshot(message[1])
+                self.lag = 0.0
+            elif kind == "delta":
+                for event in self.board.apply_delta(message[1]):
+                    self.handle_board_event(event)
+                self.lag = 0.0
+            elif kind == "closed":
+                print(f"Disconnected from server: {message[1]}")
+                self.running = False
+
+        self.particles.update()
+        snake = self.snake
+        if snake is not None and snake.body:
+            screen_x, screen_y = self.cell_center(snake.head)
+            self.particles.add_trail_particles(screen_x, screen_y, GREEN, 1)
+
+    def handle_board_event(self, event):
+        """Turn a server event into visual effects"""
+        kind = event[0]
+        if kind == "food_removed":
+            # Eaten or expired; either way it goes out with a burst
+            screen_x, screen_y = self.cell_center(to_position(event[1], self.board.width))
+            self.particles.add_food_particles(screen_x, screen_y, FOOD_COLOR, 8)
+        elif kind == "death" and event[2] is not None:
+            screen_x, screen_y = self.cell_center(event[2])
+            self.particles.add_collision_particles(screen_x, screen_y, RED, 30)
+
+    def draw_playing(self):
+        """Draw the visible part of the board, every snake and the HUD"""
+        profiler = self.profiler
+        camera = self.camera
+        board = self.board
+        lag = min(self.lag, 1.0 / board.tick_rate)
+
+        snake = self.snake
+        if snake is not None and snake.body:
+            camera.follow(*next(snake.segment_positions(snake.move_progress(lag))))
+
+        board.grid.draw(self.screen, camera)
+        profiler.mark("grid")
+
+        for food in board.foods.values():
+            food.draw(self.screen, camera)
+        profiler.mark("food")
+
+        for other in board.snakes.values():
+            if other.body:
+                other.draw(self.screen, lag, camera)
+        profiler.mark("snake")
+
+        self.particles.draw(self.screen, (camera.x, camera.y))
+        profiler.mark("particles")
+
+        length = len(snake.body) if snake is not None else 0
+        self.ui.draw_multiplayer_hud(self.screen, board.scores.get(self.player_id, 0),
+                                     length, len(board.snakes))
+        profiler.mark("hud")
+
+
+def start_loopback_server(width, height, seed=None):
+    """Run a SnakeServer on a free local port in a background thread, returning it"""
+    from server import SnakeServer
+    from world import World
+
+    server = SnakeServer(World(width, height, seed))
+    started = threading.Event()
+    thread = threading.Thread(target=asyncio.run, args=(server.run("127.0.0.1", 0, started),),
+                              daemon=True)
+    thread.start()
+    started.wait()
+    return server
+
+
+def main():
+    from main import board_size
+
+    parser = argparse.ArgumentParser(description="Emerald Serpent multiplayer client")
+    parser.add_argument("--host", default=NET_HOST, help="server address")
+    parser.add_argument("--port", type=int, default=NET_PORT, help="server port")
+    parser.add_argument("--loopback", action="store_true",
+                        help="start a local server and play on it")
+    parser.add_argument("--board", type=board_size, default=(WORLD_WIDTH, WORLD_HEIGHT),
+                        metavar="WIDTHxHEIGHT", help="board size for --loopback")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="write frame timings to a .csv or .json file on exit")
+    args = parser.parse_args()
+
+    host, port = args.host, args.port
+    if args.loopback:
+        server = start_loopback_server(*args.board)
+        host, port = "127.0.0.1", server.port
+        print(f"Loopback server on port {port}")
+
+    client = NetClient(host, port)
+    game = NetGame(client, profile_path=args.profile)
+    game.run()
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
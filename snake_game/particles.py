@@ -2,11 +2,28 @@
 import pygame
 import random
 import math
+from collections import OrderedDict
+from operator import attrgetter
 from config import *
+from quality import quality
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; fall back to one object per particle
+    np = None
+
+PARTICLE_TYPES = ("food", "trail", "collision")
 
 
 class Particle:
-    def __init__(self, x, y, color, particle_type="food"):
+    # Particles are recycled through ParticleSystem's pool, so keep them small
+    __slots__ = ("x", "y", "color", "type", "size", "vx", "vy", "life", "gravity", "decay")
+
+    def __init__(self, x, y, color, particle_type="food", rng=random):
+        self.reset(x, y, color, particle_type, rng)
+
+    def reset(self, x, y, color, particle_type="food", rng=random):
+        """(Re)start the particle at a position"""
         self.x = x
         self.y = y
         # Ensure color is a tuple of 3 integers (R, G, B)
@@ -19,29 +36,29 @@ class Particle:
         self.type = particle_type
 
         if particle_type == "food":
-            self.size = random.uniform(1, 4)
-            angle = random.uniform(0, math.pi * 2)
-            speed = random.uniform(1, 3)
+            self.size = rng.uniform(1, 4)
+            angle = rng.uniform(0, math.pi * 2)
+            speed = rng.uniform(1, 3)
             self.vx = math.cos(angle) * speed
             self.vy = math.sin(angle) * speed
-            self.life = random.uniform(0.5, 1.0)
+            self.life = rng.uniform(0.5, 1.0)
             self.gravity = 0.1
         elif particle_type == "trail":
-            self.size = random.uniform(1, 2)
-            self.vx = random.uniform(-0.5, 0.5)
-            self.vy = random.uniform(-0.5, 0.5)
-            self.life = random.uniform(0.3, 0.6)
+            self.size = rng.uniform(1, 2)
+            self.vx = rng.uniform(-0.5, 0.5)
+            self.vy = rng.uniform(-0.5, 0.5)
+            self.life = rng.uniform(0.3, 0.6)
             self.gravity = 0.05
         elif particle_type == "collision":
-            self.size = random.uniform(2, 5)
-            angle = random.uniform(0, math.pi * 2)
-            speed = random.uniform(2, 5)
+            self.size = rng.uniform(2, 5)
+            angle = rng.uniform(0, math.pi * 2)
+            speed = rng.uniform(2, 5)
             self.vx = math.cos(angle) * speed
             self.vy = math.sin(angle) * speed
-            self.life = random.uniform(0.8, 1.2)
+            self.life = rng.uniform(0.8, 1.2)
             self.gravity = 0.2
 
-        self.decay = random.uniform(0.01, 0.03)
+        self.decay = rng.uniform(0.01, 0.03)
 
     def update(self):
         self.x += self.vx
@@ -51,50 +68,115 @@ class Particle:
         self.size *= 0.98  # Shrink over time
         return self.life > 0
 
-    def draw(self, screen):
-        alpha = int(max(0, min(255, self.life * 255)))
-        if alpha > 0 and self.size > 0:
-            # Create surface with alpha
-            size = int(self.size)
-            if size < 1:
-                return
-
-            surface = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
-
-            # Ensure color values are valid integers
-            r = int(max(0, min(255, self.color[0])))
-            g = int(max(0, min(255, self.color[1])))
-            b = int(max(0, min(255, self.color[2])))
-
-            if self.type == "food":
-                pygame.draw.circle(surface, (r, g, b, alpha),
-                                   (size, size), size)
-            elif self.type == "trail":
-                pygame.draw.circle(surface, (r, g, b, alpha),
-                                   (size, size), size)
-            elif self.type == "collision":
-                # Star shape for collision
-                points = []
-                for i in range(5):
-                    angle = math.pi * 2 * i / 5 - math.pi / 2
-                    outer_x = size + math.cos(angle) * size
-                    outer_y = size + math.sin(angle) * size
-                    points.append((outer_x, outer_y))
-
-                    inner_angle = angle + math.pi / 5
-                    inner_x = size + math.cos(inner_angle) * (size * 0.5)
-                    inner_y = size + math.sin(inner_angle) * (size * 0.5)
-                    points.append((inner_x, inner_y))
-
-                if len(points) >= 3:  # Need at least 3 points for polygon
-                    pygame.draw.polygon(surface, (r, g, b, alpha), points)
-
-            screen.blit(surface, (int(self.x - size), int(self.y - size)))
+
+def render_particle(size, color, alpha, particle_type):
+    """Render one particle sprite of radius size"""
+    surface = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+
+    # Ensure color values are valid integers
+    r = int(max(0, min(255, color[0])))
+    g = int(max(0, min(255, color[1])))
+    b = int(max(0, min(255, color[2])))
+
+    if particle_type == "food":
+        pygame.draw.circle(surface, (r, g, b, alpha),
+                           (size, size), size)
+    elif particle_type == "trail":
+        pygame.draw.circle(surface, (r, g, b, alpha),
+                           (size, size), size)
+    elif particle_type == "collision":
+        # Star shape for collision
+        points = []
+        for i in range(5):
+            angle = math.pi * 2 * i / 5 - math.pi / 2
+            outer_x = size + math.cos(angle) * size
+            outer_y = size + math.sin(angle) * size
+            points.append((outer_x, outer_y))
+
+            inner_angle = angle + math.pi / 5
+            inner_x = size + math.cos(inner_angle) * (size * 0.5)
+            inner_y = size + math.sin(inner_angle) * (size * 0.5)
+            points.append((inner_x, inner_y))
+
+        if len(points) >= 3:  # Need at least 3 points for polygon
+            pygame.draw.polygon(surface, (r, g, b, alpha), points)
+
+    return surface
+
+
+class SpriteCache:
+    """Bounded LRU cache of pre-rendered particle sprites.
+
+    Sprites are keyed by shape, whole-pixel radius, color and a 16-step
+    alpha bucket, so bursts of similar particles share a handful of
+    surfaces instead of allocating one per particle per frame.
+    """
+
+    def __init__(self, max_size=PARTICLE_SPRITE_CACHE_SIZE):
+        self.max_size = max_size
+        self.sprites = OrderedDict()
+
+    def get(self, particle_type, size, color, alpha):
+        """Get the sprite for a particle, or None if it is invisible"""
+        size = int(size)
+        if alpha <= 0 or size < 1:
+            return None
+
+        key = (particle_type, size, tuple(color), alpha >> 4)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            # Draw at the top of the alpha bucket
+            sprite = render_particle(size, color, (alpha >> 4 << 4) | 15, particle_type)
+            self.sprites[key] = sprite
+            if len(self.sprites) > self.max_size:
+                self.sprites.popitem(last=False)
+        else:
+            self.sprites.move_to_end(key)
+        return sprite
+
+
+# Shared by every particle system
+sprite_cache = SpriteCache()
 
 
 class ParticleSystem:
-    def __init__(self):
+    """Particles as pooled objects, at most budget of them alive at once.
+
+    Dead particles go back to a free list and are reused by the next
+    burst. A burst that would go over budget first recycles the faintest
+    live particles, so memory stays bounded however many are asked for.
+    """
+
+    def __init__(self, rng=random, budget=PARTICLE_BUDGET):
+        # Cosmetic random stream, kept apart from the gameplay one
+        self.rng = rng
+        self.budget = budget
         self.particles = []
+        self.pool = []
+
+    def __len__(self):
+        return len(self.particles)
+
+    def _emit(self, x, y, color, particle_type, count):
+        """Add count particles of one type, recycling the faintest past the budget"""
+        particles = self.particles
+        # Bursts shrink at lower quality levels
+        count = min(quality.particle_count(count), self.budget)
+        excess = len(particles) + count - self.budget
+        if excess > 0:
+            particles.sort(key=attrgetter("life"), reverse=True)
+            self.pool.extend(particles[-excess:])
+            del particles[-excess:]
+
+        pool = self.pool
+        rng = self.rng
+        for _ in range(count):
+            if pool:
+                particle = pool.pop()
+                particle.reset(x, y, color, particle_type, rng)
+            else:
+                particle = Particle(x, y, color, particle_type, rng)
+            particles.append(particle)
 
     def add_food_particles(self, x, y, color, count=15):
         """Add particles for food collection"""
@@ -102,8 +184,7 @@ class ParticleSystem:
         if not isinstance(color, tuple) or len(color) != 3:
             color = (255, 50, 50)  # Default to red
 
-        for _ in range(count):
-            self.particles.append(Particle(x, y, color, "food"))
+        self._emit(x, y, color, "food", count)
 
     def add_trail_particles(self, x, y, color, count=3):
         """Add particles for snake trail"""
@@ -111,8 +192,7 @@ class ParticleSystem:
         if not isinstance(color, tuple) or len(color) != 3:
             color = (50, 255, 50)  # Default to green
 
-        for _ in range(count):
-            self.particles.append(Particle(x, y, color, "trail"))
+        self._emit(x, y, color, "trail", count)
 
     def add_collision_particles(self, x, y, color, count=20):
         """Add particles for collision"""
@@ -120,14 +200,191 @@ class ParticleSystem:
         if not isinstance(color, tuple) or len(color) != 3:
             color = (255, 50, 50)  # Default to red
 
-        for _ in range(count):
-            self.particles.append(Particle(x, y, color, "collision"))
+        self._emit(x, y, color, "collision", count)
 
     def update(self):
-        """Update all particles"""
-        self.particles = [p for p in self.particles if p.update()]
+        """Update all particles, returning dead ones to the pool"""
+        live = []
+        dead = self.pool
+        for particle in self.particles:
+            if particle.update():
+                live.append(particle)
+            else:
+                dead.append(particle)
+        self.particles = live
+
+    def draw(self, screen, view=(0, 0)):
+        """Draw all particles, returning the rects that were touched.
 
-    def draw(self, screen):
-        """Draw all particles"""
+        view is the board pixel at the top-left of the screen.
+        """
+        view_x, view_y = view
+        blits = []
         for particle in self.particles:
-            particle.draw(screen)
\ No newline at end of file
+            alpha = int(max(0, min(255, particle.life * 255)))
+            sprite = sprite_cache.get(particle.type, particle.size, particle.color, alpha)
+            if sprite is not None:
+                offset = sprite.get_width() // 2
+                blits.append((sprite, (int(particle.x - offset) - view_x,
+                                       int(particle.y - offset) - view_y)))
+        return screen.blits(blits)
+
+
+class ArrayParticleSystem:
+    """NumPy particle engine storing one array per particle attribute.
+
+    Same interface as ParticleSystem, but particles live in
+    structure-of-arrays columns: update() moves every particle with a few
+    vectorized operations and compacts dead ones in place, so live
+    particles always occupy the first `count` rows. The columns never
+    grow past budget rows; a burst that would go over recycles the rows
+    of the faintest particles.
+    """
+
+    # Column name, dtype and per-particle shape
+    COLUMNS = (
+        ("x", "float32", ()), ("y", "float32", ()),
+        ("vx", "float32", ()), ("vy", "float32", ()),
+        ("life", "float32", ()), ("size", "float32", ()),
+        ("gravity", "float32", ()), ("decay", "float32", ()),
+        ("kind", "uint8", ()), ("color", "uint8", (3,)),
+    )
+
+    def __init__(self, capacity=1024, seed=None, budget=ARRAY_PARTICLE_BUDGET):
+        self.rng = np.random.default_rng(seed)
+        self.budget = budget
+        self.count = 0
+        self.capacity = 0
+        self._allocate(min(capacity, budget))
+
+    def __len__(self):
+        return self.count
+
+    def _allocate(self, capacity):
+        """Grow every column to capacity rows, keeping live particles"""
+        for name, dtype, shape in self.COLUMNS:
+            column = np.zeros((capacity,) + shape, dtype)
+            if self.count:
+                column[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, column)
+        self.capacity = capacity
+
+    def _compact(self, keep):
+        """Move the rows selected by keep (a mask or indices) to the front"""
+        for name, dtype, shape in self.COLUMNS:
+            column = getattr(self, name)
+            kept = column[:self.count][keep]
+            column[:len(kept)] = kept
+        self.count = len(kept)
+
+    def _emit(self, x, y, color, particle_type, count):
+        """Append count particles of one type and return their row slice"""
+        # Bursts shrink at lower quality levels
+        count = min(quality.particle_count(count), self.budget)
+        excess = self.count + count - self.budget
+        if excess >= self.count:
+            self.count = 0
+        elif excess > 0:
+            # Keep all but the excess faintest particles
+            self._compact(np.argpartition(self.life[:self.count], excess)[excess:])
+        if self.count + count > self.capacity:
+            self._allocate(min(max(self.capacity * 2, self.count + count), self.budget))
+
+        rows = slice(self.count, self.count + count)
+        self.count += count
+
+        self.x[rows] = x
+        self.y[rows] = y
+        self.kind[rows] = PARTICLE_TYPES.index(particle_type)
+        self.color[rows] = color
+        self.decay[rows] = self.rng.uniform(0.01, 0.03, count)
+        return rows
+
+    def _emit_burst(self, x, y, color, particle_type, count,
+                    size, speed, life, gravity):
+        """Emit particles flying out in random directions"""
+        rows = self._emit(x, y, color, particle_type, count)
+        count = rows.stop - rows.start  # Scaled by quality and capped at the budget
+        angle = self.rng.uniform(0, math.pi * 2, count)
+        velocity = self.rng.uniform(*speed, count)
+        self.vx[rows] = np.cos(angle) * velocity
+        self.vy[rows] = np.sin(angle) * velocity
+        self.size[rows] = self.rng.uniform(*size, count)
+        self.life[rows] = self.rng.uniform(*life, count)
+        self.gravity[rows] = gravity
+
+    def add_food_particles(self, x, y, color, count=15):
+        """Add particles for food collection"""
+        # Ensure color is valid
+        if not isinstance(color, tuple) or len(color) != 3:
+            color = (255, 50, 50)  # Default to red
+
+        self._emit_burst(x, y, color, "food", count,
+                         size=(1, 4), speed=(1, 3), life=(0.5, 1.0), gravity=0.1)
+
+    def add_trail_particles(self, x, y, color, count=3):
+        """Add particles for snake trail"""
+        # Ensure color is valid
+        if not isinstance(color, tuple) or len(color) != 3:
+            color = (50, 255, 50)  # Default to green
+
+        rows = self._emit(x, y, color, "trail", count)
+        count = rows.stop - rows.start
+        self.size[rows] = self.rng.uniform(1, 2, count)
+        self.vx[rows] = self.rng.uniform(-0.5, 0.5, count)
+        self.vy[rows] = self.rng.uniform(-0.5, 0.5, count)
+        self.life[rows] = self.rng.uniform(0.3, 0.6, count)
+        self.gravity[rows] = 0.05
+
+    def add_collision_particles(self, x, y, color, count=20):
+        """Add particles for collision"""
+        # Ensure color is valid
+        if not isinstance(color, tuple) or len(color) != 3:
+            color = (255, 50, 50)  # Default to red
+
+        self._emit_burst(x, y, color, "collision", count,
+                         size=(2, 5), speed=(2, 5), life=(0.8, 1.2), gravity=0.2)
+
+    def update(self):
+        """Update all particles"""
+        n = self.count
+        if n == 0:
+            return
+
+        self.x[:n] += self.vx[:n]
+        self.y[:n] += self.vy[:n]
+        self.vy[:n] += self.gravity[:n]
+        self.life[:n] -= self.decay[:n]
+        self.size[:n] *= 0.98  # Shrink over time
+
+        # Compact surviving particles to the front of every column
+        alive = self.life[:n] > 0
+        if not alive.all():
+            self._compact(alive)
+
+    def draw(self, screen, view=(0, 0)):
+        """Draw all particles, returning the rects that were touched.
+
+        view is the board pixel at the top-left of the screen.
+        """
+        view_x, view_y = view
+        n = self.count
+        alpha = np.clip(self.life[:n] * 255, 0, 255).astype(np.int32)
+
+        blits = []
+        for x, y, size, color, a, kind in zip(
+                self.x[:n].tolist(), self.y[:n].tolist(),
+                self.size[:n].tolist(), self.color[:n].tolist(),
+                alpha.tolist(), self.kind[:n].tolist()):
+            sprite = sprite_cache.get(PARTICLE_TYPES[kind], size, color, a)
+            if sprite is not None:
+                offset = sprite.get_width() // 2
+                blits.append((sprite, (int(x - offset) - view_x, int(y - offset) - view_y)))
+        return screen.blits(blits)
+
+
+def create_particle_system(rng=random):
+    """Create the fastest particle system available, drawing its randomness from rng"""
+    if np is not None:
+        return ArrayParticleSystem(seed=rng.getrandbits(64))
+    return ParticleSystem(rng)
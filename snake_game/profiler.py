@@ -0,0 +1,147 @@
+# profiler.py - Per-phase frame timing with an on-screen overlay
+import csv
+import json
+import time
+from array import array
+import pygame
+from config import *
+from resources import get_font
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted sequence"""
+    if not ordered:
+        return 0.0
+    rank = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[rank]
+
+
+class FrameProfiler:
+    """Times the phases of each frame into fixed-size ring buffers.
+
+    Call begin_frame at the top of the loop and mark(phase) as each phase
+    finishes; the time since the previous mark is added to that phase.
+    end_frame stores the frame's timings, overwriting the oldest frame
+    once `size` frames have been recorded.
+    """
+
+    def __init__(self, phases, size=PROFILER_SAMPLES):
+        self.phases = list(phases)
+        self.size = size
+        self.samples = {phase: array("d", [0.0]) * size for phase in self.phases}
+        self.current = dict.fromkeys(self.phases, 0.0)
+        self.frames = 0
+        self.last_mark = time.perf_counter()
+
+        # Overlay, refreshed a few times a second rather than every frame
+        self.visible = False
+        self.overlay = None
+        self.overlay_frame = -PROFILER_OVERLAY_INTERVAL
+
+    def begin_frame(self):
+        """Start timing a new frame"""
+        for phase in self.phases:
+            self.current[phase] = 0.0
+        self.last_mark = time.perf_counter()
+
+    def mark(self, phase):
+        """Charge the time since the previous mark to a phase"""
+        now = time.perf_counter()
+        self.current[phase] += now - self.last_mark
+        self.last_mark = now
+
+    def end_frame(self):
+        """Store the finished frame in the ring buffer"""
+        slot = self.frames % self.size
+        for phase in self.phases:
+            self.samples[phase][slot] = self.current[phase]
+        self.frames += 1
+
+    def busy_time(self, idle=("wait",)):
+        """Seconds the current frame has spent outside the idle phases"""
+        return sum(seconds for phase, seconds in self.current.items() if phase not in idle)
+
+    def recorded(self, phase):
+        """Samples for a phase in seconds, oldest first"""
+        samples = self.samples[phase]
+        count = min(self.frames, self.size)
+        if self.frames <= self.size:
+            return list(samples[:count])
+        start = self.frames % self.size
+        return list(samples[start:]) + list(samples[:start])
+
+    def summary(self):
+        """p50/p95/p99 and mean of every phase, in milliseconds"""
+        stats = {}
+        for phase in self.phases:
+            ordered = sorted(self.recorded(phase))
+            mean = sum(ordered) / len(ordered) if ordered else 0.0
+            stats[phase] = {
+                "p50": percentile(ordered, 0.50) * 1000,
+                "p95": percentile(ordered, 0.95) * 1000,
+                "p99": percentile(ordered, 0.99) * 1000,
+                "mean": mean * 1000,
+            }
+        return stats
+
+    def toggle(self):
+        """Show or hide the overlay"""
+        self.visible = not self.visible
+        self.overlay = None
+        self.overlay_frame = -PROFILER_OVERLAY_INTERVAL
+
+    def draw(self, screen):
+        """Draw the overlay and push it to the display, returning its rect"""
+        if self.overlay is None or self.frames - self.overlay_frame >= PROFILER_OVERLAY_INTERVAL:
+            self.overlay = self.render_overlay()
+            self.overlay_frame = self.frames
+
+        rect = screen.blit(self.overlay, (10, SCREEN_HEIGHT - self.overlay.get_height() - 10))
+        pygame.display.update(rect)
+        return rect
+
+    def render_overlay(self):
+        """Render the percentile table onto a new surface"""
+        font = get_font(18)
+        stats = self.summary()
+        rows = [("phase (ms)", "p50", "p95", "p99")]
+        for phase in self.phases:
+            phase_stats = stats[phase]
+            rows.append((phase, f"{phase_stats['p50']:.2f}",
+                         f"{phase_stats['p95']:.2f}", f"{phase_stats['p99']:.2f}"))
+
+        # One column per value, numbers right-aligned
+        column_x = (6, 150, 200, 250)
+        line_height = font.get_linesize()
+        surface = pygame.Surface((column_x[-1] + 8, line_height * len(rows) + 8))
+        surface.fill((0, 0, 0))
+        for row, cells in enumerate(rows):
+            color = YELLOW if row == 0 else WHITE
+            y = 4 + row * line_height
+            surface.blit(font.render(cells[0], True, color), (column_x[0], y))
+            for column, cell in enumerate(cells[1:], 1):
+                text = font.render(cell, True, color)
+                surface.blit(text, text.get_rect(topright=(column_x[column], y)))
+        return surface
+
+    def dump(self, path):
+        """Write the recorded frames to a .json (with percentiles) or .csv file"""
+        columns = {phase: self.recorded(phase) for phase in self.phases}
+        count = min(self.frames, self.size)
+
+        if path.endswith(".json"):
+            with open(path, "w") as dump_file:
+                json.dump({
+                    "frames": count,
+                    "summary_ms": self.summary(),
+                    "samples_ms": {phase: [sample * 1000 for sample in column]
+                                   for phase, column in columns.items()},
+                }, dump_file, indent=2)
+        else:
+            with open(path, "w", newline="") as dump_file:
+                writer = csv.writer(dump_file)
+                writer.writerow(["frame"] + [f"{phase}_ms" for phase in self.phases])
+                first_frame = self.frames - count
+                for row in range(count):
+                    writer.writerow([first_frame + row] +
+                                    [f"{columns[phase][row] * 1000:.4f}" for phase in self.phases])
@@ -0,0 +1,329 @@
+# protocol.py - Wire format between the multiplayer server and its clients
+#
+# Every message is a 32-bit little-endian length followed by a payload
+# whose first byte is the message kind. Numbers are LEB128 varints (see
+# replay.py) and snake bodies are sent as a head cell followed by one
+# step code per segment, so a segment costs a byte instead of a cell index.
+#
+# Per tick the server sends only what changed: one record per event from
+# World.update. A snake that moved without growing, the common case,
+# costs two bytes: a "slide" record (head added, tail removed) carrying
+# its direction, then its id.
+import struct
+from config import *
+from cells import DIRECTIONS
+from replay import write_varint, read_varint
+
+LENGTH = struct.Struct("<I")
+
+# Longest frame a client may send: everything it sends is a one-byte steer
+MAX_CLIENT_FRAME = 1
+
+# Message kinds
+MSG_WELCOME = 0x01  # snake id, width, height, tick rate
+MSG_SNAPSHOT = 0x02  # tick, obstacles, snakes, scores and food
+MSG_DELTA = 0x03  # tick, then event records up to the end of the payload
+MSG_STEER = 0x10  # 0x10-0x13, one per entry in DIRECTIONS (client to server)
+
+# Delta records
+RECORD_MOVE = 0x10  # 0x10-0x13 + direction: head added
+RECORD_SLIDE = 0x14  # 0x14-0x17 + direction: head added and tail removed
+RECORD_TAIL = 0x18
+RECORD_SPAWN = 0x20
+RECORD_DEATH = 0x21
+RECORD_LEAVE = 0x22
+RECORD_FOOD_REMOVED = 0x30
+RECORD_FOOD_ADDED = 0x31  # 0x31-0x33 + index into FOOD_TYPES
+RECORD_SCORE = 0x40
+
+FOOD_TYPES = ("normal", "golden", "speed")
+
+# Step code for a body segment that is not next to the one before it
+STEP_JUMP = 0x04
+
+
+def frame(payload):
+    """Prefix a payload with its length"""
+    return LENGTH.pack(len(payload)) + payload
+
+
+async def read_message(reader, max_length=None):
+    """Read and decode one message from an asyncio stream.
+
+    Raises ValueError for an empty frame or one longer than max_length,
+    before reading its payload.
+    """
+    header = await reader.readexactly(LENGTH.size)
+    length = LENGTH.unpack(header)[0]
+    if length == 0 or (max_length is not None and length > max_length):
+        raise ValueError(f"Bad frame length {length}")
+    payload = await reader.readexactly(length)
+    return decode(payload)
+
+
+def step_code(previous, cell, width, height):
+    """Direction code from one cell to the next, wrapping around the edges"""
+    prev_y, prev_x = divmod(previous, width)
+    y, x = divmod(cell, width)
+    dx = (x - prev_x + 1) % width - 1
+    dy = (y - prev_y + 1) % height - 1
+    if (dx, dy) in DIRECTIONS:
+        return DIRECTIONS.index((dx, dy))
+    return None
+
+
+def step(cell, direction, width, height):
+    """The cell one step along direction, wrapping around the edges"""
+    y, x = divmod(cell, width)
+    dx, dy = direction
+    return (y + dy) % height * width + (x + dx) % width
+
+
+def write_body(buffer, cells, width, height):
+    """Append a head-first body as a length, head cell and step codes"""
+    write_varint(buffer, len(cells))
+    if not cells:
+        return
+    write_varint(buffer, cells[0])
+    for previous, cell in zip(cells, cells[1:]):
+        code = step_code(previous, cell, width, height)
+        if code is None:
+            buffer.append(STEP_JUMP)
+            write_varint(buffer, cell)
+        else:
+            buffer.append(code)
+
+
+def read_body(data, offset, width, height):
+    """Read a body written by write_body, returning (cells, new_offset)"""
+    length, offset = read_varint(data, offset)
+    if not length:
+        return (), offset
+
+    cell, offset = read_varint(data, offset)
+    cells = [cell]
+    for _ in range(length - 1):
+        code = data[offset]
+        offset += 1
+        if code == STEP_JUMP:
+            cell, offset = read_varint(data, offset)
+        else:
+            cell = step(cell, DIRECTIONS[code], width, height)
+        cells.append(cell)
+    return tuple(cells), offset
+
+
+def encode_welcome(snake_id, width, height, tick_rate):
+    """The first message a client gets: who it is and what the board looks like"""
+    payload = bytearray([MSG_WELCOME])
+    for value in (snake_id, width, height, tick_rate):
+        write_varint(payload, value)
+    return frame(payload)
+
+
+def encode_snapshot(world):
+    """The whole board, for clients joining or catching up"""
+    width, height = world.width, world.height
+    payload = bytearray([MSG_SNAPSHOT])
+    write_varint(payload, world.tick_count)
+
+    # Obstacles as gaps between sorted cells
+    cells = sorted(y * width + x for x, y in world.grid.obstacles)
+    write_varint(payload, len(cells))
+    previous = 0
+    for cell in cells:
+        write_varint(payload, cell - previous)
+        previous = cell
+
+    write_varint(payload, len(world.snakes))
+    for snake_id, snake in world.snakes.items():
+        write_varint(payload, snake_id)
+        write_varint(payload, world.scores[snake_id])
+        payload.append(DIRECTIONS.index(snake.direction))
+        write_body(payload, tuple(snake.body), width, height)
+
+    write_varint(payload, len(world.foods))
+    for cell, food in world.foods.items():
+        payload.append(FOOD_TYPES.index(food.type))
+        write_varint(payload, cell)
+    return frame(payload)
+
+
+def encode_delta(tick, events, width, height):
+    """One tick's World events, packed as records"""
+    payload = bytearray([MSG_DELTA])
+    write_varint(payload, tick)
+
+    count = len(events)
+    i = 0
+    while i < count:
+        event = events[i]
+        kind = event[0]
+        i += 1
+
+        if kind == "move":
+            direction = DIRECTIONS.index(event[2])
+            if i < count and events[i][0] == "tail" and events[i][1] == event[1]:
+                # Head added and tail removed in one record
+                payload.append(RECORD_SLIDE + direction)
+                i += 1
+            else:
+                payload.append(RECORD_MOVE + direction)
+            write_varint(payload, event[1])
+        elif kind == "tail":
+            payload.append(RECORD_TAIL)
+            write_varint(payload, event[1])
+        elif kind == "spawn":
+            payload.append(RECORD_SPAWN)
+            write_varint(payload, event[1])
+            write_body(payload, event[2], width, height)
+        elif kind == "death":
+            payload.append(RECORD_DEATH)
+            write_varint(payload, event[1])
+        elif kind == "leave":
+            payload.append(RECORD_LEAVE)
+            write_varint(payload, event[1])
+        elif kind == "food_removed":
+            payload.append(RECORD_FOOD_REMOVED)
+            write_varint(payload, event[1])
+        elif kind == "food_added":
+            payload.append(RECORD_FOOD_ADDED + FOOD_TYPES.index(event[2]))
+            write_varint(payload, event[1])
+        elif kind == "score":
+            payload.append(RECORD_SCORE)
+            write_varint(payload, event[1])
+            write_varint(payload, event[2])
+    return frame(payload)
+
+
+def encode_steer(direction):
+    """A direction change from a client"""
+    return frame(bytes([MSG_STEER + DIRECTIONS.index(direction)]))
+
+
+def decode(payload):
+    """Decode a message payload into a tuple.
+
+    ("welcome", snake_id, width, height, tick_rate)
+    ("steer", direction)
+    ("snapshot", payload) and ("delta", payload), which need the board
+        size from the welcome to decode (see decode_snapshot and
+        decode_delta)
+    """
+    if not payload:
+        raise ValueError("Empty message")
+    kind = payload[0]
+    if MSG_STEER <= kind < MSG_STEER + len(DIRECTIONS):
+        return ("steer", DIRECTIONS[kind - MSG_STEER])
+
+    offset = 1
+    if kind == MSG_WELCOME:
+        values = []
+        try:
+            for _ in range(4):
+                value, offset = read_varint(payload, offset)
+                values.append(value)
+        except IndexError as error:
+            raise ValueError("Truncated welcome") from error
+        return ("welcome",) + tuple(values)
+
+    if kind in (MSG_SNAPSHOT, MSG_DELTA):
+        return ("snapshot" if kind == MSG_SNAPSHOT else "delta", bytes(payload))
+
+    raise ValueError(f"Unknown message 0x{kind:02x}")
+
+
+def decode_snapshot(payload, width, height):
+    """Decode a snapshot payload into (tick, obstacle_cells, snakes, foods).
+
+    snakes maps id to (score, direction, cells) and foods maps cell to
+    food type. Raises ValueError for a truncated or malformed payload.
+    """
+    try:
+        return _read_snapshot(payload, width, height)
+    except IndexError as error:
+        raise ValueError("Truncated or malformed snapshot") from error
+
+
+def _read_snapshot(payload, width, height):
+    tick, offset = read_varint(payload, 1)
+
+    count, offset = read_varint(payload, offset)
+    obstacles = []
+    cell = 0
+    for _ in range(count):
+        gap, offset = read_varint(payload, offset)
+        cell += gap
+        obstacles.append(cell)
+
+    count, offset = read_varint(payload, offset)
+    snakes = {}
+    for _ in range(count):
+        snake_id, offset = read_varint(payload, offset)
+        score, offset = read_varint(payload, offset)
+        direction = DIRECTIONS[payload[offset]]
+        cells, offset = read_body(payload, offset + 1, width, height)
+        snakes[snake_id] = (score, direction, cells)
+
+    count, offset = read_varint(payload, offset)
+    foods = {}
+    for _ in range(count):
+        food_type = FOOD_TYPES[payload[offset]]
+        cell, offset = read_varint(payload, offset + 1)
+        foods[cell] = food_type
+    return tick, obstacles, snakes, foods
+
+
+def decode_delta(payload, width, height):
+    """Decode a delta payload into (tick, events), events as World.update returns them.
+
+    Death events carry no head position (the client knows where its
+    copy of the snake was). Raises ValueError for a truncated or
+    malformed payload.
+    """
+    try:
+        return _read_delta(payload, width, height)
+    except IndexError as error:
+        raise ValueError("Truncated or malformed delta") from error
+
+
+def _read_delta(payload, width, height):
+    tick, offset = read_varint(payload, 1)
+    events = []
+    end = len(payload)
+    while offset < end:
+        kind = payload[offset]
+        offset += 1
+
+        if RECORD_MOVE <= kind < RECORD_SLIDE + len(DIRECTIONS):
+            snake_id, offset = read_varint(payload, offset)
+            direction = DIRECTIONS[(kind - RECORD_MOVE) % len(DIRECTIONS)]
+            events.append(("move", snake_id, direction))
+            if kind >= RECORD_SLIDE:
+                events.append(("tail", snake_id))
+        elif kind == RECORD_TAIL:
+            snake_id, offset = read_varint(payload, offset)
+            events.append(("tail", snake_id))
+        elif kind == RECORD_SPAWN:
+            snake_id, offset = read_varint(payload, offset)
+            cells, offset = read_body(payload, offset, width, height)
+            events.append(("spawn", snake_id, cells))
+        elif kind == RECORD_DEATH:
+            snake_id, offset = read_varint(payload, offset)
+            events.append(("death", snake_id, None))
+        elif kind == RECORD_LEAVE:
+            snake_id, offset = read_varint(payload, offset)
+            events.append(("leave", snake_id))
+        elif kind == RECORD_FOOD_REMOVED:
+            cell, offset = read_varint(payload, offset)
+            events.append(("food_removed", cell))
+        elif RECORD_FOOD_ADDED <= kind < RECORD_FOOD_ADDED + len(FOOD_TYPES):
+            cell, offset = read_varint(payload, offset)
+            events.append(("food_added", cell, FOOD_TYPES[kind - RECORD_FOOD_ADDED]))
+        elif kind == RECORD_SCORE:
+            snake_id, offset = read_varint(payload, offset)
+            score, offset = read_varint(payload, offset)
+            events.append(("score", snake_id, score))
+        else:
+            raise ValueError(f"Unknown delta record 0x{kind:02x}")
+    return tick, events
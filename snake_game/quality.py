@@ -0,0 +1,75 @@
+# quality.py - Effect quality scaled to hold the frame budget
+from collections import deque
+from config import *
+
+
+class Quality:
+    """The effect settings in use, one entry of QUALITY_LEVELS.
+
+    Drawing and effect code reads its knobs from the shared `quality`
+    object below, so a change of level applies everywhere at once.
+    """
+
+    def __init__(self, level=len(QUALITY_LEVELS) - 1):
+        self.set_level(level)
+
+    def set_level(self, level):
+        """Switch to a level from QUALITY_LEVELS (0 is the lowest)"""
+        self.level = max(0, min(len(QUALITY_LEVELS) - 1, level))
+        self.settings = QUALITY_LEVELS[self.level]
+
+    def __getitem__(self, knob):
+        return self.settings[knob]
+
+    def particle_count(self, count):
+        """Scale a particle burst, keeping at least one particle of a non-empty burst"""
+        if count <= 0:
+            return 0
+        return max(1, int(count * self.settings["particles"] + 0.5))
+
+
+class QualityGovernor:
+    """Steps quality down when frames run over budget and back up when there is room.
+
+    Feed it the busy time of every frame (the time spent before waiting
+    for the next one). Every QUALITY_WINDOW frames it looks at the 90th
+    percentile: over QUALITY_DOWN_AT of the budget steps down at once,
+    while under QUALITY_UP_AT steps up only after QUALITY_UP_DELAY such
+    windows in a row. The gap between the two thresholds and the delay
+    keep it from flickering between levels.
+    """
+
+    def __init__(self, quality, budget=1.0 / FPS, window=QUALITY_WINDOW):
+        self.quality = quality
+        self.budget = budget
+        self.samples = deque(maxlen=window)
+        self.fast_windows = 0
+
+    def record(self, frame_time):
+        """Add one frame's busy time, returning True if the quality level changed"""
+        samples = self.samples
+        samples.append(frame_time)
+        if len(samples) < samples.maxlen:
+            return False
+
+        busy = sorted(samples)[len(samples) * 9 // 10]  # 90th percentile
+        samples.clear()
+        level = self.quality.level
+        if busy > self.budget * QUALITY_DOWN_AT:
+            self.fast_windows = 0
+            if level > 0:
+                self.quality.set_level(level - 1)
+                return True
+        elif busy < self.budget * QUALITY_UP_AT:
+            self.fast_windows += 1
+            if self.fast_windows >= QUALITY_UP_DELAY and level < len(QUALITY_LEVELS) - 1:
+                self.fast_windows = 0
+                self.quality.set_level(level + 1)
+                return True
+        else:
+            self.fast_windows = 0
+        return False
+
+
+# Shared by everything that draws effects
+quality = Quality()
@@ -0,0 +1,113 @@
+# renderer.py - Dirty rectangle rendering for the playing state
+import pygame
+from config import *
+
+
+class DirtyRectRenderer:
+    """Draws the playing state by repairing only the regions that changed.
+
+    Last frame's sprites are painted over with the cached grid background,
+    the food, snake and particles are drawn again and only the touched
+    rects are pushed with pygame.display.update. The HUD is redrawn only
+    when its values change or a sprite passes underneath it.
+    """
+
+    def __init__(self):
+        self.background = None
+        self.sprite_rects = []
+        self.hud_rects = []
+        self.hud_state = None
+
+    def invalidate(self):
+        """Force a full repaint on the next frame"""
+        self.background = None
+
+    def add_overlay(self, rect):
+        """Erase a rect drawn over the frame (like the F3 overlay) with the next one"""
+        self.sprite_rects.append(rect)
+
+    def draw(self, game):
+        """Draw one frame and update the changed parts of the display"""
+        screen = game.screen
+        grid = game.sim.grid
+        profiler = game.profiler
+
+        if grid.background is None:
+            grid.background = grid.render_background(screen)
+
+        # A new background (first frame or new level) needs a full repaint
+        full_repaint = grid.background is not self.background
+        if full_repaint:
+            self.background = grid.background
+            screen.blit(self.background, (0, 0))
+            erased = []
+        else:
+            erased = self.sprite_rects
+            for rect in erased:
+                screen.blit(self.background, rect, rect)
+        profiler.mark("grid")
+
+        drawn = self.draw_sprites(game)
+
+        # Redraw the HUD if its text changed or a sprite touched it
+        hud_state = (
+            game.sim.score, game.snake.length, game.sim.level,
+            round(game.snake.speed, 1), game.sim.combo,
+            game.sim.get_target_length()
+        )
+        old_hud_rects = self.hud_rects
+        hud_dirty = (
+            full_repaint or
+            hud_state != self.hud_state or
+            any(rect.collidelist(old_hud_rects) != -1 for rect in erased) or
+            any(rect.collidelist(old_hud_rects) != -1 for rect in drawn)
+        )
+
+        if hud_dirty:
+            for rect in old_hud_rects:
+                self.repair(game, rect, drawn)
+            self.hud_rects = game.ui.draw_hud(
+                screen, game.sim.score, game.snake.length, game.sim.level,
+                game.snake.speed, game.sim.combo, hud_state[-1]
+            )
+            self.hud_state = hud_state
+        profiler.mark("hud")
+
+        if full_repaint:
+            pygame.display.flip()
+        else:
+            dirty = erased + drawn
+            if hud_dirty:
+                dirty += old_hud_rects + self.hud_rects
+            pygame.display.update(dirty)
+        profiler.mark("flip")
+
+        self.sprite_rects = drawn
+
+    def draw_sprites(self, game):
+        """Draw food, snake and particles, returning the touched rects"""
+        screen = game.screen
+        profiler = game.profiler
+        drawn = []
+
+        if game.sim.food:
+            rect = game.sim.food.draw(screen)
+            if rect:
+                drawn.append(rect)
+        profiler.mark("food")
+
+        drawn.extend(game.snake.draw(screen, game.accumulator))
+        profiler.mark("snake")
+        drawn.extend(game.particles.draw(screen))
+        profiler.mark("particles")
+        return drawn
+
+    def repair(self, game, rect, drawn):
+        """Restore the background under rect, keeping sprites on top of it"""
+        screen = game.screen
+        screen.blit(self.background, rect, rect)
+
+        if rect.collidelist(drawn) != -1:
+            screen.set_clip(rect)
+            self.draw_sprites(game)
+            screen.set_clip(None)
@@ -0,0 +1,162 @@
+# replay.py - Compact input recordings and deterministic playback
+import struct
+from config import *
+from sim import SnakeSim
+from cells import DIRECTIONS
+
+# File layout: header, then records of (kind byte, tick delta varint,
+# payload). Direction records carry no payload, checksum records carry a
+# 32-bit CRC of the simulation state, and the end record closes the stream.
+MAGIC = b"SNKR"
+VERSION = 2
+HEADER = struct.Struct("<4sBHQHIHH")  # magic, version, tick rate, seed, level, score, width, height
+CHECKSUM = struct.Struct("<I")
+
+RECORD_DIRECTION = 0x01  # 0x01-0x04, one per entry in DIRECTIONS
+RECORD_CHECKSUM = 0x10
+RECORD_END = 0xFF
+
+
+class ReplayDivergence(Exception):
+    """Raised when playback no longer matches the recorded game"""
+
+
+def write_varint(buffer, value):
+    """Append an unsigned LEB128 integer"""
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data, offset):
+    """Read an unsigned LEB128 integer, returning (value, new_offset)"""
+    value = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+class ReplayRecorder:
+    """Records a game's seed, board, starting level and per-tick direction changes"""
+
+    def __init__(self, seed, level=0, score=0, tick_rate=SIM_TICK_RATE,
+                 width=GRID_WIDTH, height=GRID_HEIGHT):
+        self.data = bytearray(HEADER.pack(MAGIC, VERSION, tick_rate, seed, level, score,
+                                          width, height))
+        self.last_tick = 0
+        self.finished = False
+
+    def _record(self, kind, tick):
+        self.data.append(kind)
+        write_varint(self.data, tick - self.last_tick)
+        self.last_tick = tick
+
+    def record_direction(self, tick, direction):
+        """Record a direction change made before simulation tick `tick` runs"""
+        self._record(RECORD_DIRECTION + DIRECTIONS.index(direction), tick)
+
+    def record_checksum(self, tick, checksum):
+        """Record the state checksum after tick `tick`"""
+        self._record(RECORD_CHECKSUM, tick)
+        self.data += CHECKSUM.pack(checksum)
+
+    def finish(self, tick, checksum):
+        """Close the recording at the final tick and return its bytes"""
+        if not self.finished:
+            self.record_checksum(tick, checksum)
+            self._record(RECORD_END, tick)
+            self.finished = True
+        return bytes(self.data)
+
+    def save(self, path):
+        """Write the recording to a file"""
+        with open(path, "wb") as replay_file:
+            replay_file.write(self.data)
+
+
+class Replay:
+    """A parsed recording"""
+
+    def __init__(self, data):
+        magic, version, self.tick_rate, self.seed, self.level, self.score, \
+            self.width, self.height = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a snake replay (or an unsupported version)")
+        offset = HEADER.size
+
+        # Per-tick inputs and checksums
+        self.directions = {}
+        self.checksums = {}
+        self.end_tick = None
+
+        tick = 0
+        while offset < len(data):
+            kind = data[offset]
+            delta, offset = read_varint(data, offset + 1)
+            tick += delta
+
+            if kind == RECORD_END:
+                self.end_tick = tick
+                break
+            elif kind == RECORD_CHECKSUM:
+                self.checksums[tick] = CHECKSUM.unpack_from(data, offset)[0]
+                offset += CHECKSUM.size
+            elif RECORD_DIRECTION <= kind < RECORD_DIRECTION + len(DIRECTIONS):
+                self.directions.setdefault(tick, []).append(DIRECTIONS[kind - RECORD_DIRECTION])
+            else:
+                raise ValueError(f"Unknown replay record 0x{kind:02x}")
+
+        if self.end_tick is None:
+            # Truncated recording; play what is there
+            self.end_tick = tick
+
+    @classmethod
+    def load(cls, path):
+        """Read a recording from a file"""
+        with open(path, "rb") as replay_file:
+            return cls(replay_file.read())
+
+
+class ReplayPlayer:
+    """Re-simulates a recording tick by tick, checking every checksum"""
+
+    def __init__(self, replay, sim=None):
+        self.replay = replay
+        self.sim = sim if sim is not None else SnakeSim(width=replay.width, height=replay.height)
+        if (self.sim.width, self.sim.height) != (replay.width, replay.height):
+            raise ValueError(f"Replay was recorded on a {replay.width}x{replay.height} board")
+        self.sim.reset(replay.seed, replay.level, replay.score)
+        self.dt = 1.0 / replay.tick_rate
+
+    @property
+    def finished(self):
+        """True once the last recorded tick has been played"""
+        return self.sim.tick_count >= self.replay.end_tick
+
+    def tick(self):
+        """Run one recorded tick and return its simulation events"""
+        sim = self.sim
+        if sim.state != "playing":
+            raise ReplayDivergence(f"Game ended early at tick {sim.tick_count}")
+
+        for direction in self.replay.directions.get(sim.tick_count, ()):
+            sim.snake.change_direction(direction)
+
+        events = sim.update(self.dt)
+
+        expected = self.replay.checksums.get(sim.tick_count)
+        if expected is not None and expected != sim.checksum():
+            raise ReplayDivergence(f"Replay diverged at tick {sim.tick_count}")
+        return events
+
+    def run(self):
+        """Play the whole recording as fast as possible and return the simulation"""
+        while not self.finished:
+            self.tick()
+        return self.sim
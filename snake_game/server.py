@@ -0,0 +1,150 @@
+# server.py - Authoritative multiplayer snake server
+#
+# Runs a World at a fixed tick and streams it to every connected player:
+# a snapshot on joining, then one delta per tick with only what changed
+# (see protocol.py). Clients send nothing but direction changes.
+#
+#   python server.py --port 5555 --board 200x150
+import argparse
+import asyncio
+from config import *
+from world import World
+import protocol
+
+
+class ClientConnection:
+    """One connected player and how far behind its connection is"""
+
+    def __init__(self, snake_id, writer):
+        self.snake_id = snake_id
+        self.writer = writer
+
+        # False until the client has the board, or after it fell behind;
+        # a snapshot brings it back in step
+        self.synced = False
+
+    @property
+    def backlog(self):
+        """Bytes written but not yet sent to the client"""
+        return self.writer.transport.get_write_buffer_size()
+
+    def send(self, message):
+        """Queue an encoded message"""
+        self.writer.write(message)
+
+
+class SnakeServer:
+    """Accepts players into a World and broadcasts its changes every tick"""
+
+    def __init__(self, world=None, tick_rate=NET_TICK_RATE):
+        self.world = world if world is not None else World()
+        self.tick_rate = tick_rate
+        self.clients = {}
+        self.port = None
+        self.stopped = False
+
+        # Traffic counters, for checking the cost of a delta
+        self.bytes_sent = 0
+        self.ticks = 0
+
+    async def handle_client(self, reader, writer):
+        """Serve one player for as long as it stays connected"""
+        snake_id = self.world.add_snake()
+        if snake_id is None:
+            # Board full
+            writer.close()
+            return
+
+        client = ClientConnection(snake_id, writer)
+        client.send(protocol.encode_welcome(snake_id, self.world.width, self.world.height,
+                                            self.tick_rate))
+        self.send_snapshot(client)
+        self.clients[snake_id] = client
+
+        try:
+            while True:
+                message = await protocol.read_message(reader, protocol.MAX_CLIENT_FRAME)
+                if message[0] == "steer":
+                    self.world.steer(snake_id, message[1])
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            del self.clients[snake_id]
+            self.world.remove_snake(snake_id)
+            writer.close()
+
+    def send_snapshot(self, client):
+        """Bring a client up to date with the whole board"""
+        snapshot = protocol.encode_snapshot(self.world)
+        client.send(snapshot)
+        client.synced = True
+        self.bytes_sent += len(snapshot)
+
+    def tick(self):
+        """Advance the world one tick and send each client its update"""
+        world = self.world
+        events = world.update(1.0 / self.tick_rate)
+        delta = protocol.encode_delta(world.tick_count, events, world.width, world.height)
+        self.ticks += 1
+
+        for client in list(self.clients.values()):
+            if client.backlog > NET_MAX_BACKLOG:
+                # Deltas would only pile up behind the backlog; skip them
+                # and send a snapshot once the connection has drained
+                client.synced = False
+            elif client.synced:
+                client.send(delta)
+                self.bytes_sent += len(delta)
+            else:
+                self.send_snapshot(client)
+
+    async def run(self, host=NET_HOST, port=NET_PORT, started=None):
+        """Serve until stop is called.
+
+        started, if given, is a threading.Event set once the server is
+        listening (port 0 picks a free port, stored in self.port).
+        """
+        server = await asyncio.start_server(self.handle_client, host, port)
+        self.port = server.sockets[0].getsockname()[1]
+        if started is not None:
+            started.set()
+
+        loop = asyncio.get_running_loop()
+        interval = 1.0 / self.tick_rate
+        next_tick = loop.time()
+        async with server:
+            while not self.stopped:
+                # Fixed ticks; a late tick is followed by an early one
+                next_tick += interval
+                await asyncio.sleep(max(0.0, next_tick - loop.time()))
+                self.tick()
+
+    def stop(self):
+        """Stop ticking and close the listening socket"""
+        self.stopped = True
+
+
+def main():
+    from main import board_size
+
+    parser = argparse.ArgumentParser(description="Emerald Serpent multiplayer server")
+    parser.add_argument("--host", default=NET_HOST, help="address to listen on")
+    parser.add_argument("--port", type=int, default=NET_PORT, help="port to listen on")
+    parser.add_argument("--board", type=board_size, default=(WORLD_WIDTH, WORLD_HEIGHT),
+                        metavar="WIDTHxHEIGHT", help="board size in cells")
+    parser.add_argument("--level", type=int, default=0, help="obstacle layout to play on")
+    parser.add_argument("--seed", type=int, help="seed for food and spawn positions")
+    args = parser.parse_args()
+
+    width, height = args.board
+    server = SnakeServer(World(width, height, args.seed, args.level))
+    print(f"Serving a {width}x{height} board on {args.host}:{args.port} "
+          f"at {server.tick_rate} ticks/second")
+    try:
+        asyncio.run(server.run(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
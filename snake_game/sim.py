@@ -0,0 +1,233 @@
+# sim.py - Headless snake game rules
+import random
+import zlib
+from array import array
+from config import *
+from snake import Snake
+from food import Food
+from grid import Grid
+from levelpack import level_count
+from cells import FreeCells
+
+
+class SnakeSim:
+    """Snake game rules (movement, food, scoring, combos and levels).
+
+    The simulation never calls into pygame, so it can be stepped without a
+    window. Each update returns a list of events such as
+    ("food", position, food_type), ("level_complete", level) or
+    ("game_over", head_position) for a renderer to turn into effects.
+    """
+
+    def __init__(self, seed=None, width=GRID_WIDTH, height=GRID_HEIGHT):
+        self.width = width
+        self.height = height
+
+        # All gameplay randomness comes from this generator, so a game is
+        # fully determined by its seed and inputs
+        self.rng = random.Random()
+        self.seed = None
+
+        # Cells not taken by the snake, obstacles or food
+        self.free_cells = FreeCells(width * height)
+
+        self.snake = Snake(self.free_cells, width, height)
+        self.grid = Grid(self.free_cells, width, height)
+        self.food = Food(self.free_cells, rng=self.rng, width=width)
+        self.events = []
+        self.reset(seed)
+
+    def reset(self, seed=None, level=0, score=0):
+        """Start a new game from scratch (or from a level with a carried score)"""
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.seed = seed
+        self.rng.seed(seed)
+
+        self.score = score
+        self.level = level
+        self.tick_count = 0
+        self.combo = 1
+        self.combo_counter = 0
+        self.combo_timer = 0
+        self.consecutive_foods = 0
+        self.game_time = 0
+        self.last_food_time = 0
+        self.state = "playing"  # playing, game_over
+
+        # Empty the board and put the free-cell index back in its initial
+        # order, so the same seed always plays out the same way
+        self.food.remove()
+        self.snake.clear_body()
+        self.grid.clear()
+        self.free_cells.clear()
+
+        self.snake.reset()
+        self.grid.load_level(self.level)
+        self.spawn_food()
+
+    def next_level(self, seed=None):
+        """Skip straight to the next level, keeping the score"""
+        self.reset(seed, self.level + 1, self.score)
+
+    def checksum(self):
+        """CRC of the gameplay state, for spotting replay divergence"""
+        food = self.food.position or (-1, -1)
+        state = array("q", (
+            self.tick_count, self.score, self.level, self.snake.length,
+            self.snake.head[0], self.snake.head[1], food[0], food[1],
+            len(self.free_cells)
+        ))
+        crc = zlib.crc32(state.tobytes())
+        return zlib.crc32(array("i", self.snake.body).tobytes(), crc)
+
+    def spawn_food(self):
+        """Spawn new food in valid position"""
+        self.food.spawn(self.game_time)
+        self.last_food_time = self.game_time
+
+    def get_target_length(self):
+        """Get target length for current level"""
+        if self.level < len(LEVEL_TARGET_LENGTH):
+            return LEVEL_TARGET_LENGTH[self.level]
+        return 30 + (self.level - len(LEVEL_TARGET_LENGTH)) * 10
+
+    def step(self, action=None):
+        """Advance the game by exactly one snake move.
+
+        action is an optional direction tuple such as (0, -1). Game time
+        advances by however long the snake would have taken to move.
+        """
+        self.events = []
+        if self.state != "playing":
+            return self.events
+
+        if action is not None:
+            self.snake.change_direction(action)
+
+        self.tick_count += 1
+        self._advance_clock(self.snake.time_until_move())
+        self.snake.step()
+        self._after_move()
+        self._check_food_expiry()
+        return self.events
+
+    def update(self, dt, action=None):
+        """Advance the game by dt seconds of game time"""
+        self.events = []
+        if self.state != "playing":
+            return self.events
+
+        if action is not None:
+            self.snake.change_direction(action)
+
+        self.tick_count += 1
+        self._advance_clock(dt)
+        moved = self.snake.update(dt)
+        while moved and self.state == "playing":
+            self._after_move()
+            moved = self.snake.move_if_due()
+        self._check_food_expiry()
+        return self.events
+
+    def _advance_clock(self, dt):
+        """Advance game time and the combo timer"""
+        self.game_time += dt
+
+        if self.combo_timer > 0:
+            self.combo_timer -= dt
+            if self.combo_timer <= 0:
+                self.combo = 1
+                self.combo_counter = 0
+
+    def _after_move(self):
+        """Resolve collisions, food and level progress after a move"""
+        if self.check_collisions():
+            return
+
+        if self.food and self.food.check_collision(self.snake.get_head_position()):
+            self.handle_food_collection()
+
+        if self.snake.length >= self.get_target_length():
+            self.level_complete()
+
+    def _check_food_expiry(self):
+        """Respawn food that has been lying around too long"""
+        if self.state == "playing" and self.food and not self.food.update(self.game_time):
+            self.spawn_food()
+
+    def check_collisions(self):
+        """Check all collision types, ending the game on a hit"""
+        if (self.snake.check_wall_collision() or
+                self.snake.check_self_collision() or
+                self.snake.check_obstacle_collision(self.grid)):
+            self.game_over()
+            return True
+        return False
+
+    def handle_food_collection(self):
+        """Handle food collection and scoring"""
+        if not self.food:
+            return
+
+        # Calculate points with combo
+        base_points = self.food.get_points()
+        points_earned = int(base_points * self.combo)
+        self.score += points_earned
+
+        # Apply food effect
+        effect = self.food.get_effect()
+        if "grow" in effect:
+            self.snake.grow(effect["grow"])
+        if effect.get("speed_boost"):
+            self.snake.activate_speed_boost()
+
+        # Update combo if food was eaten quickly enough (2 second window)
+        self.consecutive_foods += 1
+        if self.game_time - self.last_food_time < 2.0:
+            self.combo_counter += 1
+            if self.combo_counter >= COMBO_MULTIPLIER_THRESHOLD:
+                self.combo = COMBO_MULTIPLIER
+                self.combo_timer = 3.0  # 3 seconds of combo
+                self.combo_counter = 0
+        else:
+            # Reset combo if too slow
+            self.combo_counter = 1
+            self.combo = 1
+
+        self.events.append(("food", self.food.position, self.food.type))
+
+        # Spawn new food
+        self.spawn_food()
+
+        # Gradually increase speed
+        if self.consecutive_foods % 5 == 0:
+            self.snake.increase_speed()
+
+    def level_complete(self):
+        """Handle level completion"""
+        self.score += LEVEL_COMPLETE_BONUS * (self.level + 1)
+        self.events.append(("level_complete", self.level))
+
+        # Move to next level
+        self.level += 1
+
+        if self.level >= level_count():
+            # All levels completed
+            self.state = "game_over"
+        else:
+            self.snake.reset()
+            self.grid.load_level(self.level)
+            self.spawn_food()
+            self.consecutive_foods = 0
+            self.combo = 1
+            self.combo_counter = 0
+
+            # Add some random obstacles
+            extra_obstacles = self.rng.randint(2, 5)
+            self.grid.add_random_obstacles(extra_obstacles, self.rng)
+
+    def game_over(self):
+        """Handle game over"""
+        self.events.append(("game_over", self.snake.get_head_position()))
+        self.state = "game_over"
@@ -1,22 +1,54 @@
-import pygame
 import math
+from collections import deque
 from config import *
+from cells import FreeCells, BodyCells, to_index, to_position, in_bounds
+from quality import quality
 
+try:
+    import pygame
+except ImportError:  # Only drawing needs pygame; headless runs work without it
+    pygame = None
+
+# Transparent color behind segment sprites
+SEGMENT_COLORKEY = (255, 0, 255)
 
-class Snake:
-    def __init__(self):
-        self.reset()
 
-    def reset(self):
-        """Reset snake to initial state"""
-        # Start in the middle of the grid
-        start_x = GRID_WIDTH // 2
-        start_y = GRID_HEIGHT // 2
+class Snake:
+    def __init__(self, free_cells=None, width=GRID_WIDTH, height=GRID_HEIGHT,
+                 body_cells=None, snake_id=1, start=None):
+        self.width = width
+        self.height = height
+        self.free_cells = free_cells if free_cells is not None else FreeCells(width * height)
+
+        # Body cells as packed indices, head first, plus per-cell segment
+        # counts (see BodyCells) so occupancy queries never scan the body.
+        # Snakes sharing a board share body_cells and tell their cells
+        # apart by snake_id.
+        self.body = deque()
+        self.body_cells = body_cells if body_cells is not None else BodyCells(width * height)
+        self.snake_id = snake_id
+        self.occupancy = self.body_cells.occupancy
+        self.owner = self.body_cells.owner
+
+        # A segment's place in the body is moves - entered[cell], which
+        # lets drawing find the segments in a region without walking the body
+        self.entered = self.body_cells.entered
+        self.moves = 0
+        self.reset(start)
+
+    def reset(self, start=None):
+        """Reset snake to initial state, with its head on start (the middle of the grid by default)"""
+        if start is None:
+            start = (self.width // 2, self.height // 2)
+        start_x, start_y = start
 
         # Create initial segments
-        self.segments = []
-        for i in range(SNAKE_START_LENGTH):
-            self.segments.append((start_x - i, start_y))
+        self.set_body([(start_x - i, start_y) for i in range(SNAKE_START_LENGTH)])
+
+        # Tail cell given up by the last move (None after growing), used
+        # to interpolate drawing between moves
+        self.vacated = None
+        self.has_moved = False
 
         self.direction = (1, 0)  # Moving right
         self.next_direction = (1, 0)
@@ -35,8 +67,58 @@ class Snake:
         self.wiggle_offset = 0
         self.color_shift = 0
 
+    def clear_body(self):
+        """Take every segment off the board"""
+        while self.body:
+            self._vacate(self.body.pop())
+
+    def set_body(self, positions):
+        """Replace the body with the given grid positions, head first"""
+        self.clear_body()
+        for i, (x, y) in enumerate(positions):
+            index = to_index(x, y, self.width)
+            if self.occupancy[index]:
+                # Segments nearer the head come first and stay on top
+                self.body_cells.cover(index, self.snake_id, self.moves - i, below=True)
+            else:
+                self.entered[index] = self.moves - i
+                self.owner[index] = self.snake_id
+            self.body.append(index)
+            self._occupy(index)
+        self.head = tuple(positions[0])
+        self.length = len(self.body)
+        self.vacated = None
+
     def update(self, dt):
-        """Update snake state"""
+        """Update snake state, returning True if the snake moved"""
+        self.update_effects(dt)
+
+        self.move_timer += dt
+        return self.move_if_due()
+
+    def move_if_due(self):
+        """Make one move if the movement timer has run out.
+
+        Leftover time is carried into the next move, so calling this until
+        it returns False catches up on every move that fell due.
+        """
+        move_interval = 1.0 / self.speed
+
+        if self.move_timer >= move_interval:
+            self.move_timer -= move_interval
+            self._move()
+            return True
+        return False
+
+    def move_progress(self, lag=0.0):
+        """Fraction of the way to the next move, lag seconds after the last update"""
+        if not self.has_moved:
+            # No move yet, so there is nowhere to interpolate from
+            return 1.0
+        return min(1.0, (self.move_timer + lag) * self.speed)
+
+    def update_effects(self, dt):
+        """Advance visual effects and power-up timers"""
         # Update timers
         self.wiggle_offset += dt * 10
         self.color_shift += dt * 2
@@ -54,13 +136,15 @@ class Snake:
                 # Flash effect when invincibility ends
                 pass
 
-        # Update movement timer
-        self.move_timer += dt
-        move_interval = 1.0 / self.speed
+    def time_until_move(self):
+        """Seconds left before the next move is due"""
+        return max(0.0, 1.0 / self.speed - self.move_timer)
 
-        if self.move_timer >= move_interval:
-            self.move_timer = 0
-            self._move()
+    def step(self):
+        """Move exactly one cell, fast-forwarding the movement timer"""
+        self.update_effects(self.time_until_move())
+        self.move_timer = 0
+        self._move()
 
     def _move(self):
         """Move snake one step"""
@@ -68,19 +152,63 @@ class Snake:
         self.direction = self.next_direction
 
         # Calculate new head position
-        head_x, head_y = self.segments[0]
+        head_x, head_y = self.head
         dx, dy = self.direction
-        new_head = (head_x + dx, head_y + dy)
+        x, y = head_x + dx, head_y + dy
+
+        if not in_bounds(x, y, self.width, self.height):
+            if not self.is_invincible:
+                # Off the board; check_wall_collision reports it
+                self.head = (x, y)
+                return
+            # Invincible snakes wrap around the edges
+            x %= self.width
+            y %= self.height
 
-        # Add new head
-        self.segments.insert(0, new_head)
+        self.push_head(x, y)
 
         # Remove tail if not growing
         if self.grow_pending > 0:
             self.grow_pending -= 1
             self.length += 1
+            self.vacated = None
         else:
-            self.segments.pop()
+            self.pop_tail()
+
+    def push_head(self, x, y):
+        """Add a new head segment on (x, y)"""
+        self.has_moved = True
+        self.head = (x, y)
+        index = to_index(x, y, self.width)
+        self.moves += 1
+        if self.occupancy[index]:
+            self.body_cells.cover(index, self.snake_id, self.moves)
+        else:
+            self.entered[index] = self.moves
+            self.owner[index] = self.snake_id
+        self.body.appendleft(index)
+        self._occupy(index)
+
+    def pop_tail(self):
+        """Take the tail segment off the board, returning its cell"""
+        self.vacated = self.body.pop()
+        self._vacate(self.vacated)
+        return self.vacated
+
+    def _occupy(self, index):
+        """Count a segment on a cell, claiming it on first entry"""
+        self.occupancy[index] += 1
+        if self.occupancy[index] == 1:
+            self.free_cells.block(index)
+
+    def _vacate(self, index):
+        """Remove a segment from a cell, releasing it when the last one leaves"""
+        self.occupancy[index] -= 1
+        if self.occupancy[index] == 0:
+            self.owner[index] = 0
+            self.free_cells.unblock(index)
+        else:
+            self.body_cells.uncover(index, self.snake_id)
 
     def change_direction(self, new_direction):
         """Change snake direction (prevent 180-degree turns)"""
@@ -114,99 +242,262 @@ class Snake:
         if self.is_invincible:
             return False
 
-        head = self.segments[0]
-        return head in self.segments[1:]
+        x, y = self.head
+        if not in_bounds(x, y, self.width, self.height):
+            return False
+        return self.occupancy[to_index(x, y, self.width)] > 1
 
     def check_wall_collision(self):
         """Check if snake hits wall"""
         if self.is_invincible:
             return False
 
-        x, y = self.segments[0]
-        return x < 0 or x >= GRID_WIDTH or y < 0 or y >= GRID_HEIGHT
+        return not in_bounds(*self.head, self.width, self.height)
 
-    def check_obstacle_collision(self, obstacles):
-        """Check if snake hits obstacle"""
+    def check_obstacle_collision(self, grid):
+        """Check if snake hits an obstacle on the grid"""
         if self.is_invincible:
             return False
 
-        head_x, head_y = self.segments[0]
-        for obs_x, obs_y in obstacles:
-            if head_x == obs_x and head_y == obs_y:
-                return True
-        return False
+        return grid.is_obstacle(self.head)
+
+    def occupies(self, position):
+        """Check if any snake segment is on position"""
+        x, y = position
+        return (in_bounds(x, y, self.width, self.height) and
+                self.occupancy[to_index(x, y, self.width)] > 0)
+
+    @property
+    def segments(self):
+        """All segment positions, head first"""
+        return [to_position(index, self.width) for index in self.body]
 
     def get_head_position(self):
         """Get current head position"""
-        return self.segments[0]
+        return self.head
 
     def get_body_positions(self):
         """Get all body positions (excluding head)"""
         return self.segments[1:]
 
-    def draw(self, screen):
-        """Draw snake on screen"""
-        for i, (x, y) in enumerate(self.segments):
-            # Calculate screen position
-            screen_x = x * GRID_SIZE
-            screen_y = y * GRID_SIZE
+    def segment_positions(self, progress=1.0):
+        """Yield each segment's (x, y) grid position, head first.
+
+        With progress below 1 every segment is placed part way between the
+        cell it left on the last move and the cell it is in now.
+        """
+        body = self.body
+        width = self.width
+        last = len(body) - 1
+        behind = 1.0 - progress
+
+        for i, index in enumerate(body):
+            y, x = divmod(index, width)
+            if behind > 0:
+                # Each segment came from the cell now held by the one behind it
+                if i < last:
+                    previous = body[i + 1]
+                else:
+                    previous = self.vacated if self.vacated is not None else index
+                prev_y, prev_x = divmod(previous, width)
+
+                # Skip wraps around the board edge
+                if abs(prev_x - x) + abs(prev_y - y) == 1:
+                    x += (prev_x - x) * behind
+                    y += (prev_y - y) * behind
+            yield x, y
+
+    def visible_segments(self, x0, y0, x1, y1, progress=1.0):
+        """List (i, x, y) for the segments inside a cell rectangle, head first.
+
+        Segments are found cell by cell through the entry stamps, so the
+        cost depends on the size of the rectangle, not the length of the
+        snake. Positions are interpolated like segment_positions; where
+        segments overlap only the newest one on a cell is listed.
+        """
+        width = self.width
+        occupancy = self.occupancy
+        owner = self.owner
+        snake_id = self.snake_id
+        entered = self.entered
+        moves = self.moves
+        last = len(self.body) - 1
+        behind = 1.0 - progress
+
+        found = []
+        for y in range(max(0, y0), min(self.height, y1)):
+            row = y * width
+            start = row + max(0, x0)
+            cells = occupancy[start:row + min(width, x1)]
+            if not any(cells):
+                continue
+
+            for offset, count in enumerate(cells):
+                if not count or owner[start + offset] != snake_id:
+                    continue
+                index = start + offset
+                i = moves - entered[index]
+                x = index - row
+                position_x, position_y = x, y
+                if behind > 0:
+                    previous = self._previous_cell(index, i, last)
+                    prev_y, prev_x = divmod(previous, width)
+                    # Skip wraps around the board edge
+                    if abs(prev_x - x) + abs(prev_y - y) == 1:
+                        position_x += (prev_x - x) * behind
+                        position_y += (prev_y - y) * behind
+                found.append((i, position_x, position_y))
+
+        found.sort()
+        return found
+
+    def _previous_cell(self, index, i, last):
+        """Cell that segment i on index moved out of on the last move"""
+        if i >= last:
+            return self.vacated if self.vacated is not None else index
+
+        # The segment behind entered its cell one move earlier, next door
+        stamp = self.entered[index] - 1
+        width = self.width
+        x = index % width
+        for neighbor, on_board in ((index - 1, x > 0), (index + 1, x < width - 1),
+                                   (index - width, index >= width),
+                                   (index + width, index < len(self.occupancy) - width)):
+            if (on_board and self.owner[neighbor] == self.snake_id and
+                    self.entered[neighbor] == stamp):
+                return neighbor
+        return index
+
+    def draw(self, screen, lag=0.0, camera=None):
+        """Draw snake on screen, returning the rects that were touched.
+
+        lag is the simulation time since the last update, used to
+        interpolate segment positions between moves. With a camera only
+        the segments in its view are looked up and drawn.
+        """
+        progress = self.move_progress(lag)
+        if camera is None:
+            view_x = view_y = 0
+            positions = ((i, x, y) for i, (x, y) in enumerate(self.segment_positions(progress)))
+        else:
+            view_x, view_y = camera.x, camera.y
+            positions = self.visible_segments(*camera.visible_cells(margin=1), progress)
 
-            # Calculate color based on position and effects
-            if i == 0:  # Head
-                color = SNAKE_HEAD_COLOR
-                size = GRID_SIZE
+        sprites = segment_sprites
+        segment_count = len(self.body)
+        steps = SNAKE_GRADIENT_STEPS
+        gradient_on = quality["snake_gradient"]
+        wiggle_on = quality["snake_wiggle"]
+
+        # Wiggle phase of segment 0, in table steps; each segment is half
+        # a radian further along
+        phase = self.wiggle_offset * SNAKE_WIGGLE_STEPS / math.tau
+        phase_step = 0.5 * SNAKE_WIGGLE_STEPS / math.tau
+
+        blits = []
+        for i, x, y in positions:
+            screen_x = int(x * GRID_SIZE - view_x)
+            screen_y = int(y * GRID_SIZE - view_y)
 
-                # Add invincibility glow effect
-                if self.is_invincible:
-                    # Pulsing effect for invincibility
-                    pulse = abs(math.sin(self.color_shift * 3)) * 0.3 + 0.7
-                    color = (
-                        int(color[0] * pulse),
-                        int(color[1] * pulse),
-                        int(color[2] * pulse)
-                    )
-
-            else:  # Body
-                # Gradient from head to tail
-                gradient = 1.0 - (i / len(self.segments))
-                color = (
-                    int(SNAKE_COLOR[0] * gradient),
-                    int(SNAKE_COLOR[1] * gradient),
-                    int(SNAKE_COLOR[2] * gradient)
-                )
-                size = GRID_SIZE - 2
-
-                # Add wiggle effect
-                wiggle = math.sin(self.wiggle_offset + i * 0.5) * 2
-                screen_x += wiggle
-                screen_y += wiggle
-                size -= abs(wiggle) * 0.5
-
-            # Draw snake segment
-            rect = pygame.Rect(screen_x, screen_y, size, size)
-            pygame.draw.rect(screen, color, rect, border_radius=int(size // 4))
-
-            # Draw segment border
-            pygame.draw.rect(screen, DARK_GREEN, rect, 2, border_radius=int(size//4))
-
-            # Draw eyes on head
             if i == 0:
-                # Calculate eye positions based on direction
-                dx, dy = self.direction
-                eye_size = size // 5
-
-                if dx != 0:  # Moving horizontally
-                    eye1_x = screen_x + size * 0.7 if dx > 0 else screen_x + size * 0.3
-                    eye2_x = eye1_x
-                    eye1_y = screen_y + size * 0.3
-                    eye2_y = screen_y + size * 0.7
-                else:  # Moving vertically
-                    eye1_x = screen_x + size * 0.3
-                    eye2_x = screen_x + size * 0.7
-                    eye1_y = screen_y + size * 0.7 if dy > 0 else screen_y + size * 0.3
-                    eye2_y = eye1_y
-
-                pygame.draw.circle(screen, WHITE, (int(eye1_x), int(eye1_y)), eye_size)
-                pygame.draw.circle(screen, WHITE, (int(eye2_x), int(eye2_y)), eye_size)
-                pygame.draw.circle(screen, BLACK, (int(eye1_x), int(eye1_y)), eye_size // 2)
-                pygame.draw.circle(screen, BLACK, (int(eye2_x), int(eye2_y)), eye_size // 2)
\ No newline at end of file
+                # Pulsing head while invincible
+                shade = SNAKE_PULSE_STEPS - 1
+                if self.is_invincible:
+                    pulse = abs(math.sin(self.color_shift * 3))
+                    shade = int(pulse * (SNAKE_PULSE_STEPS - 1))
+                blits.append((sprites.head(self.direction, shade), (screen_x, screen_y)))
+                continue
+
+            # Gradient from head to tail
+            shade = (segment_count - i) * steps // segment_count if gradient_on else steps
+            if wiggle_on:
+                offset, size = sprites.wiggles[int(phase + i * phase_step) % SNAKE_WIGGLE_STEPS]
+                blits.append((sprites.body(shade, size), (screen_x + offset, screen_y + offset)))
+            else:
+                blits.append((sprites.body(shade, GRID_SIZE - 2), (screen_x, screen_y)))
+
+        return screen.blits(blits)
+
+
+class SegmentSprites:
+    """Pre-rendered snake segments, so drawing a snake is one blits call.
+
+    Body segments are cached per gradient shade and size (the wiggle
+    shrinks them slightly) and heads per direction and pulse shade. Shade
+    colors and wiggle offsets come from lookup tables built up front.
+    """
+
+    def __init__(self):
+        # Body color for each gradient shade, darkest (tail) first
+        self.colors = [tuple(int(channel * step / SNAKE_GRADIENT_STEPS) for channel in SNAKE_COLOR)
+                       for step in range(SNAKE_GRADIENT_STEPS + 1)]
+
+        # Head color for each pulse shade, from 70% to full brightness
+        self.head_colors = [
+            tuple(int(channel * (0.7 + 0.3 * step / (SNAKE_PULSE_STEPS - 1)))
+                  for channel in SNAKE_HEAD_COLOR)
+            for step in range(SNAKE_PULSE_STEPS)
+        ]
+
+        # (offset, size) of a body segment at each wiggle phase
+        self.wiggles = []
+        for step in range(SNAKE_WIGGLE_STEPS):
+            wiggle = math.sin(step * math.tau / SNAKE_WIGGLE_STEPS) * 2
+            self.wiggles.append((math.floor(wiggle), int(GRID_SIZE - 2 - abs(wiggle) * 0.5)))
+
+        self.bodies = {}
+        self.heads = {}
+
+    def body(self, shade, size):
+        """Sprite of a body segment"""
+        sprite = self.bodies.get((shade, size))
+        if sprite is None:
+            sprite = render_segment(self.colors[shade], size)
+            self.bodies[shade, size] = sprite
+        return sprite
+
+    def head(self, direction, shade):
+        """Sprite of the head facing a direction"""
+        sprite = self.heads.get((direction, shade))
+        if sprite is None:
+            sprite = render_segment(self.head_colors[shade], GRID_SIZE)
+            draw_eyes(sprite, direction, GRID_SIZE)
+            self.heads[direction, shade] = sprite
+        return sprite
+
+
+def render_segment(color, size):
+    """Render a rounded, bordered segment on a transparent background"""
+    surface = pygame.Surface((size, size))
+    surface.fill(SEGMENT_COLORKEY)
+    surface.set_colorkey(SEGMENT_COLORKEY, pygame.RLEACCEL)
+    rect = surface.get_rect()
+    pygame.draw.rect(surface, color, rect, border_radius=size // 4)
+    pygame.draw.rect(surface, DARK_GREEN, rect, 2, border_radius=size // 4)
+    return surface
+
+
+def draw_eyes(surface, direction, size):
+    """Draw the head's eyes looking along direction"""
+    dx, dy = direction
+    eye_size = size // 5
+
+    if dx != 0:  # Moving horizontally
+        eye1_x = size * 0.7 if dx > 0 else size * 0.3
+        eye2_x = eye1_x
+        eye1_y = size * 0.3
+        eye2_y = size * 0.7
+    else:  # Moving vertically
+        eye1_x = size * 0.3
+        eye2_x = size * 0.7
+        eye1_y = size * 0.7 if dy > 0 else size * 0.3
+        eye2_y = eye1_y
+
+    pygame.draw.circle(surface, WHITE, (int(eye1_x), int(eye1_y)), eye_size)
+    pygame.draw.circle(surface, WHITE, (int(eye2_x), int(eye2_y)), eye_size)
+    pygame.draw.circle(surface, BLACK, (int(eye1_x), int(eye1_y)), eye_size // 2)
+    pygame.draw.circle(surface, BLACK, (int(eye2_x), int(eye2_y)), eye_size // 2)
+
+
+# Shared by every snake
+segment_sprites = SegmentSprites()
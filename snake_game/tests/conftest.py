@@ -0,0 +1,9 @@
+# conftest.py - Run the tests against the game modules without a display
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+# The game's modules import each other by name from snake_game/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,133 @@
+# test_batch_env.py - BatchSnakeEnv keeps its arrays consistent and plays by SnakeSim's rules
+import numpy as np
+import pytest
+
+from config import *
+from batch_env import BatchSnakeEnv, FOOD_GOLDEN, FOOD_NORMAL
+from cells import DIRECTIONS, to_index, to_position
+from sim import SnakeSim
+
+UP, DOWN, LEFT, RIGHT = range(4)
+STRAIGHT = -1
+
+
+def body_cells(env, board):
+    """A board's body from its ring buffer, head first"""
+    slots = (env.head_slot[board] - np.arange(env.length[board])) % env.num_cells
+    return [int(cell) for cell in env.body[board, slots]]
+
+
+def check_board(env, board):
+    """The ring buffer, occupancy and food of one board agree with each other"""
+    cells = body_cells(env, board)
+    assert len(set(cells)) == len(cells)
+    assert np.flatnonzero(env.occupied[board]).tolist() == sorted(cells)
+    assert not env.obstacles[cells].any()
+    for cell, behind in zip(cells, cells[1:]):
+        (x, y), (bx, by) = to_position(cell, env.width), to_position(behind, env.width)
+        assert abs(x - bx) + abs(y - by) == 1
+
+    food = env.food[board]
+    if food >= 0:
+        assert not env.occupied[board, food] and not env.obstacles[food]
+
+
+@pytest.mark.parametrize("level", [0, 1])
+def test_random_actions_keep_occupancy_in_step_with_the_body(level):
+    env = BatchSnakeEnv(32, level=level, seed=5)
+    rng = np.random.default_rng(6)
+    deaths = 0
+    for _ in range(400):
+        # Mostly straight, so snakes live long enough to grow
+        actions = np.where(rng.random(env.num_boards) < 0.7, STRAIGHT,
+                           rng.integers(0, 4, env.num_boards))
+        rewards, dones = env.step(actions)
+        deaths += dones.sum()
+        assert env.alive.all()
+        assert (rewards >= 0).all()
+        for board in range(env.num_boards):
+            check_board(env, board)
+
+    assert deaths > 0
+    assert env.length.max() > SNAKE_START_LENGTH
+
+
+class Pair:
+    """One env board and a SnakeSim given the same moves and the same food"""
+
+    def __init__(self):
+        self.env = BatchSnakeEnv(1, seed=0)
+        self.sim = SnakeSim(seed=0)
+        self.width = self.sim.width
+
+    def place_food(self, position, food_type=FOOD_NORMAL):
+        cell = to_index(*position, self.width)
+        self.env.food[0] = cell
+        self.env.food_type[0] = food_type
+        self.sim.food.place(cell, ("normal", "golden", "speed")[food_type], self.sim.game_time)
+
+    def step(self, action):
+        """Make one move on both and check they agree, returning (reward, done)"""
+        rewards, dones = self.env.step([action])
+        events = self.sim.step(DIRECTIONS[action] if action != STRAIGHT else None)
+        kinds = [event[0] for event in events]
+
+        assert dones[0] == ("game_over" in kinds)
+        assert (rewards[0] > 0) == ("food" in kinds)
+        if not dones[0]:
+            snake = self.sim.snake
+            assert body_cells(self.env, 0) == list(snake.body)
+            assert self.env.length[0] == snake.length
+            assert self.env.grow_pending[0] == snake.grow_pending
+            assert DIRECTIONS[self.env.direction[0]] == snake.direction
+        check_board(self.env, 0)
+        return rewards[0], dones[0]
+
+    def restart(self):
+        """Start the simulation over, as the env already has"""
+        self.sim.reset(seed=0)
+        assert body_cells(self.env, 0) == list(self.sim.snake.body)
+
+
+def test_steps_match_snake_sim():
+    pair = Pair()
+    cx, cy = pair.width // 2, pair.sim.height // 2
+    pair.place_food((cx + 1, cy))
+
+    # Reversing is refused; the snake keeps going right and eats
+    reward, _ = pair.step(LEFT)
+    assert reward == FOOD_POINTS
+    pair.place_food((0, 0))
+    pair.step(STRAIGHT)
+    assert pair.env.length[0] == SNAKE_START_LENGTH + 1
+
+    # A four-long snake circling a 2x2 square always moves into the
+    # cell its tail is leaving
+    for _ in range(3):
+        for action in (DOWN, LEFT, UP, RIGHT):
+            _, done = pair.step(action)
+            assert not done
+
+    # Golden food grows the snake by two, and a growing snake's tail
+    # stays put, so the same square is now a crash into its own body
+    head_x, head_y = to_position(int(pair.env.head[0]), pair.width)
+    pair.place_food((head_x, head_y + 1), FOOD_GOLDEN)
+    reward, _ = pair.step(DOWN)
+    assert reward == GOLDEN_FOOD_POINTS
+    pair.place_food((0, 0))
+    pair.step(RIGHT)
+    pair.step(UP)
+    _, done = pair.step(LEFT)
+    assert done
+    assert pair.env.length[0] == SNAKE_START_LENGTH and pair.env.score[0] == 0
+
+    # The reset board plays on; straight into the wall ends it again
+    pair.restart()
+    pair.place_food((0, 0))
+    done = False
+    for _ in range(pair.width):
+        _, done = pair.step(STRAIGHT)
+        if done:
+            break
+    assert done
+    pair.restart()
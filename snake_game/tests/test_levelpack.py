@@ -0,0 +1,60 @@
+# test_levelpack.py - Level packs decode to the layouts they were built from
+import pytest
+
+from config import *
+from cells import to_index, in_bounds
+from levelpack import LevelPack, encode_level, write_pack
+
+BOARDS = [(GRID_WIDTH, GRID_HEIGHT), (20, 15), (60, 45)]
+
+
+@pytest.fixture
+def pack(tmp_path):
+    path = tmp_path / "levels.snkl"
+    write_pack(path, LEVEL_OBSTACLES)
+    pack = LevelPack(path)
+    yield pack
+    pack.close()
+
+
+def expected_cells(level, width, height):
+    """The level's obstacles on a width x height board, straight from LEVEL_OBSTACLES"""
+    return sorted({to_index(x, y, width) for x, y in LEVEL_OBSTACLES[level]
+                   if in_bounds(x, y, width, height)})
+
+
+def test_header(pack):
+    assert len(pack) == len(LEVEL_OBSTACLES)
+    assert (pack.width, pack.height) == (GRID_WIDTH, GRID_HEIGHT)
+
+
+@pytest.mark.parametrize("width, height", BOARDS)
+@pytest.mark.parametrize("level", range(len(LEVEL_OBSTACLES)))
+def test_levels_round_trip(pack, level, width, height):
+    cells = pack.level_cells(level, width, height)
+    assert len(cells) == len(set(cells))
+    assert sorted(cells) == expected_cells(level, width, height)
+
+
+def test_out_of_bounds_obstacles_are_dropped(tmp_path):
+    path = tmp_path / "edge.snkl"
+    write_pack(path, [[(0, 0), (9, 4), (10, 0), (-1, 2), (3, 5)]], width=10, height=5)
+    pack = LevelPack(path)
+    try:
+        assert pack.level_cells(0, 10, 5) == (0, 49)
+        assert pack.level_cells(0, 5, 5) == (0,)
+    finally:
+        pack.close()
+
+
+def test_encode_level_is_one_bit_per_cell():
+    bitmap = encode_level([(0, 0), (3, 1)], 4, 3)
+    assert bitmap == bytes([0b10000001, 0])
+
+
+@pytest.mark.parametrize("data", [b"", b"SNKL", b"XXXX\x01" + bytes(16), b"SNKL\x02" + bytes(16)])
+def test_bad_pack_is_rejected(tmp_path, data):
+    path = tmp_path / "bad.snkl"
+    path.write_bytes(data)
+    with pytest.raises(ValueError):
+        LevelPack(path)
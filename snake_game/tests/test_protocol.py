@@ -0,0 +1,174 @@
+# test_protocol.py - Multiplayer wire format round trips and bad input
+import asyncio
+
+import pytest
+
+from config import *
+from cells import DIRECTIONS, to_index
+from world import World
+import protocol
+
+WIDTH, HEIGHT = 40, 30
+
+
+def payload(message):
+    """Strip the length prefix from an encoded frame"""
+    assert protocol.LENGTH.unpack_from(message)[0] == len(message) - protocol.LENGTH.size
+    return message[protocol.LENGTH.size:]
+
+
+def busy_world(ticks=120, snakes=6):
+    """A world with a few snakes that have moved, eaten and crashed for a while"""
+    world = World(WIDTH, HEIGHT, seed=4, level=2)
+    for _ in range(snakes):
+        world.add_snake()
+    for tick in range(ticks):
+        for snake_id in world.snakes:
+            if (tick + snake_id) % 7 == 0:
+                world.steer(snake_id, DIRECTIONS[(tick // 7 + snake_id) % 4])
+        world.update(1.0 / NET_TICK_RATE)
+    return world
+
+
+def read_frames(data, max_length=None):
+    """Feed raw bytes to a stream reader and read one message from it"""
+    async def read():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return await protocol.read_message(reader, max_length)
+    return asyncio.run(read())
+
+
+def test_welcome_round_trip():
+    message = protocol.encode_welcome(300, WIDTH, HEIGHT, NET_TICK_RATE)
+    assert protocol.decode(payload(message)) == ("welcome", 300, WIDTH, HEIGHT, NET_TICK_RATE)
+
+
+@pytest.mark.parametrize("direction", DIRECTIONS)
+def test_steer_round_trip(direction):
+    message = protocol.encode_steer(direction)
+    assert len(payload(message)) == protocol.MAX_CLIENT_FRAME
+    assert protocol.decode(payload(message)) == ("steer", direction)
+
+
+@pytest.mark.parametrize("cells", [
+    (),
+    (to_index(5, 5, WIDTH),),
+    tuple(to_index(x, 5, WIDTH) for x in range(10, 2, -1)),
+    # Wrapping around both edges, then a jump across the board
+    (to_index(0, 0, WIDTH), to_index(WIDTH - 1, 0, WIDTH), to_index(WIDTH - 1, HEIGHT - 1, WIDTH),
+     to_index(20, 15, WIDTH), to_index(20, 16, WIDTH)),
+])
+def test_body_round_trip(cells):
+    buffer = bytearray(b"\xff")
+    protocol.write_body(buffer, cells, WIDTH, HEIGHT)
+    assert protocol.read_body(buffer, 1, WIDTH, HEIGHT) == (cells, len(buffer))
+
+
+def test_snapshot_round_trip():
+    world = busy_world()
+    kind, data = protocol.decode(payload(protocol.encode_snapshot(world)))
+    assert kind == "snapshot"
+
+    tick, obstacles, snakes, foods = protocol.decode_snapshot(data, WIDTH, HEIGHT)
+    assert tick == world.tick_count
+    assert obstacles == sorted(to_index(x, y, WIDTH) for x, y in world.grid.obstacles)
+    assert snakes == {snake_id: (world.scores[snake_id], snake.direction, tuple(snake.body))
+                      for snake_id, snake in world.snakes.items()}
+    assert foods == {cell: food.type for cell, food in world.foods.items()}
+
+
+def test_deltas_round_trip():
+    world = World(WIDTH, HEIGHT, seed=9, level=1)
+    for _ in range(8):
+        world.add_snake()
+    seen = set()
+    for tick in range(300):
+        if tick == 150:
+            world.remove_snake(next(iter(world.snakes)))
+        for snake_id in world.snakes:
+            if (tick + snake_id) % 5 == 0:
+                world.steer(snake_id, DIRECTIONS[(tick + snake_id) % 4])
+        events = world.update(1.0 / NET_TICK_RATE)
+
+        kind, data = protocol.decode(payload(
+            protocol.encode_delta(world.tick_count, events, WIDTH, HEIGHT)))
+        assert kind == "delta"
+        # Deaths go out without the head position
+        expected = [event[:2] + (None,) if event[0] == "death" else event for event in events]
+        assert protocol.decode_delta(data, WIDTH, HEIGHT) == (world.tick_count, expected)
+        seen.update(event[0] for event in events)
+
+    assert seen >= {"move", "tail", "spawn", "death", "leave", "score", "food_removed", "food_added"}
+
+
+def test_sliding_snake_costs_two_bytes():
+    message = protocol.encode_delta(1, [("move", 3, (1, 0)), ("tail", 3)], WIDTH, HEIGHT)
+    assert len(payload(message)) == 2 + 2  # kind and tick, then the slide record
+
+
+@pytest.mark.parametrize("data, match", [
+    (b"", "Empty"),
+    (b"\x7f", "Unknown message"),
+    (bytes([protocol.MSG_WELCOME, 5, 40]), "Truncated welcome"),
+    (bytes([protocol.MSG_WELCOME, 5, 40, 30, 0x80]), "Truncated welcome"),
+])
+def test_malformed_message_is_rejected(data, match):
+    with pytest.raises(ValueError, match=match):
+        protocol.decode(data)
+
+
+def test_truncated_snapshot_is_rejected():
+    data = payload(protocol.encode_snapshot(busy_world()))
+    for end in range(1, len(data)):
+        with pytest.raises(ValueError):
+            protocol.decode_snapshot(data[:end], WIDTH, HEIGHT)
+
+
+def test_snapshot_with_bad_direction_is_rejected():
+    world = World(WIDTH, HEIGHT, seed=1)
+    world.add_snake()
+    data = bytearray(payload(protocol.encode_snapshot(world)))
+    # tick, no obstacles, one snake with id 1 and score 0, then its direction
+    assert data[1:6] == bytes([0, 0, 1, 1, 0])
+    data[6] = len(DIRECTIONS)
+    with pytest.raises(ValueError):
+        protocol.decode_snapshot(bytes(data), WIDTH, HEIGHT)
+
+
+def test_truncated_delta_record_is_rejected():
+    body = tuple(to_index(x, 7, WIDTH) for x in range(12, 2, -1))
+    data = payload(protocol.encode_delta(
+        200, [("spawn", 2, body), ("score", 2, 1000)], WIDTH, HEIGHT))
+    records = 3  # kind byte and a two-byte tick
+    for end in range(records + 1, len(data)):
+        if end == len(data) - 4:
+            continue  # between the two records: a shorter, valid delta
+        with pytest.raises(ValueError):
+            protocol.decode_delta(data[:end], WIDTH, HEIGHT)
+
+
+def test_unknown_delta_record_is_rejected():
+    with pytest.raises(ValueError, match="Unknown delta record"):
+        protocol.decode_delta(bytes([protocol.MSG_DELTA, 1, 0x7e]), WIDTH, HEIGHT)
+
+
+def test_read_message():
+    message = protocol.encode_steer((0, 1))
+    assert read_frames(message, protocol.MAX_CLIENT_FRAME) == ("steer", (0, 1))
+
+
+@pytest.mark.parametrize("length", [0, protocol.MAX_CLIENT_FRAME + 1, 2 ** 32 - 1])
+def test_bad_frame_length_is_rejected(length):
+    # The payload is never read, so none needs to follow
+    with pytest.raises(ValueError, match="Bad frame length"):
+        read_frames(protocol.LENGTH.pack(length), protocol.MAX_CLIENT_FRAME)
+
+
+def test_truncated_frame_is_rejected():
+    message = protocol.encode_welcome(1, WIDTH, HEIGHT, NET_TICK_RATE)
+    with pytest.raises(asyncio.IncompleteReadError):
+        read_frames(message[:-1])
+    with pytest.raises(asyncio.IncompleteReadError):
+        read_frames(message[:2])
@@ -0,0 +1,137 @@
+# test_replay.py - Replay encoding and deterministic playback
+import struct
+
+import pytest
+
+from config import *
+from autopilot import Autopilot
+from cells import DIRECTIONS
+from replay import (HEADER, MAGIC, VERSION, RECORD_END, Replay, ReplayDivergence,
+                    ReplayPlayer, ReplayRecorder, read_varint, write_varint)
+from sim import SnakeSim
+
+TICK = 1.0 / SIM_TICK_RATE
+
+
+def record_game(seed=7, ticks=1500):
+    """Play a game under the autopilot, returning the recording and the final simulation"""
+    sim = SnakeSim(seed)
+    autopilot = Autopilot(sim)
+    recorder = ReplayRecorder(sim.seed, sim.level, sim.score, width=sim.width, height=sim.height)
+    while sim.tick_count < ticks and sim.state == "playing":
+        direction = autopilot.choose()
+        if direction != sim.snake.next_direction:
+            sim.snake.change_direction(direction)
+            recorder.record_direction(sim.tick_count, direction)
+        sim.update(TICK)
+        if sim.tick_count % REPLAY_CHECKSUM_INTERVAL == 0:
+            recorder.record_checksum(sim.tick_count, sim.checksum())
+    return recorder.finish(sim.tick_count, sim.checksum()), sim
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 300, 2 ** 32, 2 ** 64 - 1])
+def test_varint_round_trip(value):
+    buffer = bytearray(b"\x99")
+    write_varint(buffer, value)
+    assert read_varint(buffer, 1) == (value, len(buffer))
+
+
+def test_recording_round_trip():
+    recorder = ReplayRecorder(seed=1234, level=1, score=50, width=30, height=20)
+    recorder.record_direction(3, (0, -1))
+    recorder.record_direction(3, (-1, 0))
+    recorder.record_checksum(60, 0xDEADBEEF)
+    recorder.record_direction(200, (0, 1))
+    replay = Replay(recorder.finish(500, 0x12345678))
+
+    assert (replay.seed, replay.level, replay.score) == (1234, 1, 50)
+    assert (replay.width, replay.height, replay.tick_rate) == (30, 20, SIM_TICK_RATE)
+    assert replay.directions == {3: [(0, -1), (-1, 0)], 200: [(0, 1)]}
+    assert replay.checksums == {60: 0xDEADBEEF, 500: 0x12345678}
+    assert replay.end_tick == 500
+
+
+def test_every_direction_is_recorded():
+    recorder = ReplayRecorder(seed=0)
+    for tick, direction in enumerate(DIRECTIONS):
+        recorder.record_direction(tick, direction)
+    replay = Replay(recorder.finish(len(DIRECTIONS), 0))
+    assert [replay.directions[tick][0] for tick in range(len(DIRECTIONS))] == DIRECTIONS
+
+
+def test_finish_is_idempotent():
+    recorder = ReplayRecorder(seed=0)
+    data = recorder.finish(10, 1)
+    assert recorder.finish(20, 2) == data
+
+
+def test_truncated_recording_plays_to_its_last_record():
+    recorder = ReplayRecorder(seed=0)
+    recorder.record_direction(40, (0, 1))
+    data = recorder.finish(90, 0)
+    replay = Replay(data[:data.rindex(RECORD_END)])
+    assert replay.end_tick == 90
+
+
+@pytest.mark.parametrize("magic, version", [(b"SNKX", VERSION), (MAGIC, 1), (MAGIC, VERSION + 1)])
+def test_bad_header_is_rejected(magic, version):
+    data = bytearray(ReplayRecorder(seed=0).finish(0, 0))
+    data[:5] = struct.pack("<4sB", magic, version)
+    with pytest.raises(ValueError):
+        Replay(bytes(data))
+
+
+def test_short_header_is_rejected():
+    with pytest.raises(struct.error):
+        Replay(ReplayRecorder(seed=0).finish(0, 0)[:HEADER.size - 1])
+
+
+def test_unknown_record_is_rejected():
+    data = ReplayRecorder(seed=0).data + bytes([0x20, 0])
+    with pytest.raises(ValueError, match="Unknown replay record"):
+        Replay(bytes(data))
+
+
+def test_playback_matches_the_recorded_game():
+    data, recorded = record_game()
+    sim = ReplayPlayer(Replay(data)).run()
+    assert sim.tick_count == recorded.tick_count
+    assert sim.checksum() == recorded.checksum()
+    assert sim.score == recorded.score
+    assert list(sim.snake.body) == list(recorded.snake.body)
+
+
+def test_playback_on_the_wrong_board_is_refused():
+    data, _ = record_game(ticks=60)
+    with pytest.raises(ValueError):
+        ReplayPlayer(Replay(data), SnakeSim(width=GRID_WIDTH + 2))
+
+
+def test_changed_input_is_detected():
+    data, _ = record_game()
+    replay = Replay(data)
+    # Drop the first turn; the snake goes somewhere else from then on
+    del replay.directions[min(replay.directions)]
+    with pytest.raises(ReplayDivergence):
+        ReplayPlayer(replay).run()
+
+
+def test_wrong_checksum_is_detected():
+    data, _ = record_game()
+    replay = Replay(data)
+    tick = min(replay.checksums)
+    replay.checksums[tick] ^= 1
+    player = ReplayPlayer(replay)
+    with pytest.raises(ReplayDivergence, match=f"tick {tick}"):
+        player.run()
+    assert player.sim.tick_count == tick
+
+
+def test_game_ending_early_is_detected():
+    # Without input the snake runs straight into the wall
+    sim = SnakeSim(seed=3)
+    while sim.state == "playing":
+        sim.update(TICK)
+    replay = Replay(ReplayRecorder(sim.seed).finish(sim.tick_count + 10, 0))
+    with pytest.raises(ReplayDivergence, match="ended early"):
+        ReplayPlayer(replay).run()
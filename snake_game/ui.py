@@ -1,5 +1,62 @@
 import pygame
+from collections import OrderedDict
 from config import *
+from resources import get_font
+from quality import quality
+
+
+class TextCache:
+    """Bounded LRU cache of rendered text surfaces.
+
+    Surfaces are keyed by font, text, color and antialiasing, so labels
+    that do not change between frames are rasterized once.
+    """
+
+    def __init__(self, max_size=TEXT_CACHE_SIZE):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+
+    def render(self, font, text, color, antialias=True):
+        """Get the surface for a piece of text, rendering it on a miss"""
+        key = (font, text, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = font.render(text, antialias, color)
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.max_size:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+
+
+# Shared by every screen
+text_cache = TextCache()
+
+
+class HudText:
+    """A HUD label that re-renders only when its values change.
+
+    fmt is a str.format template and anchor is passed to get_rect to place
+    the text, e.g. HudText(font, "SCORE: {}", WHITE, topleft=(20, 20)).
+    """
+
+    def __init__(self, font, fmt, color, **anchor):
+        self.font = font
+        self.fmt = fmt
+        self.color = color
+        self.anchor = anchor
+        self.values = None
+        self.surface = None
+        self.rect = None
+
+    def draw(self, screen, *values):
+        """Draw the label for the given values and return its rect"""
+        if values != self.values:
+            self.values = values
+            self.surface = text_cache.render(self.font, self.fmt.format(*values), self.color)
+            self.rect = self.surface.get_rect(**self.anchor)
+        return screen.blit(self.surface, self.rect)
 
 
 class Button:
@@ -10,7 +67,7 @@ class Button:
         self.hover_color = hover_color
         self.current_color = color
         self.is_hovered = False
-        self.font = pygame.font.Font(None, MENU_FONT_SIZE)
+        self.font = get_font(MENU_FONT_SIZE)
 
     def draw(self, screen):
         # Draw button with hover effect
@@ -18,7 +75,7 @@ class Button:
         pygame.draw.rect(screen, WHITE, self.rect, 3, border_radius=10)
 
         # Draw text
-        text_surface = self.font.render(self.text, True, WHITE)
+        text_surface = text_cache.render(self.font, self.text, WHITE)
         text_rect = text_surface.get_rect(center=self.rect.center)
         screen.blit(text_surface, text_rect)
 
@@ -31,36 +88,77 @@ class Button:
         return self.rect.collidepoint(pos) and mouse_down
 
 
-class UI:
-    def __init__(self):
-        self.font_large = pygame.font.Font(None, TITLE_FONT_SIZE)
-        self.font_medium = pygame.font.Font(None, MENU_FONT_SIZE)
-        self.font_small = pygame.font.Font(None, HUD_FONT_SIZE)
-        self.font_score = pygame.font.Font(None, SCORE_FONT_SIZE)
+class StaticScreen:
+    """A composed screen that only changes when a button's hover state does.
 
-    def draw_main_menu(self, screen):
-        """Draw the main menu"""
-        screen.fill(BACKGROUND)
+    background holds everything but the buttons. The first draw puts the
+    whole screen up; after that only buttons whose hover state changed are
+    redrawn, so an idle menu costs next to nothing.
+    """
 
-        # Draw title with glow effect
-        title = self.font_large.render("EMERALD SERPENT", True, GREEN)
-        title_rect = title.get_rect(center=(SCREEN_WIDTH // 2, 100))
+    def __init__(self, background, buttons):
+        self.background = background
+        self.buttons = buttons
+        self.drawn_hover = None
 
-        # Draw glow effect
-        for offset in range(5, 0, -1):
-            glow_color = (0, min(100 + offset * 30, 255), 0)
-            glow_surf = self.font_large.render("EMERALD SERPENT", True, glow_color)
-            glow_rect = glow_surf.get_rect(center=(SCREEN_WIDTH // 2 + offset, 100 + offset))
-            screen.blit(glow_surf, glow_rect)
+    def draw(self, screen, full=False):
+        """Draw onto screen, returning the rects that changed"""
+        hover = [button.is_hovered for button in self.buttons]
 
-        screen.blit(title, title_rect)
+        if full or self.drawn_hover is None:
+            screen.blit(self.background, (0, 0))
+            for button in self.buttons:
+                button.draw(screen)
+            self.drawn_hover = hover
+            return [screen.get_rect()]
 
-        # Draw subtitle
-        subtitle = self.font_small.render("The Mystical Garden Quest", True, YELLOW)
-        subtitle_rect = subtitle.get_rect(center=(SCREEN_WIDTH // 2, 160))
-        screen.blit(subtitle, subtitle_rect)
+        dirty = []
+        for button, was_hovered, is_hovered in zip(self.buttons, self.drawn_hover, hover):
+            if was_hovered != is_hovered:
+                screen.blit(self.background, button.rect, button.rect)
+                button.draw(screen)
+                dirty.append(button.rect)
+        self.drawn_hover = hover
+        return dirty
 
-        # Create buttons
+
+class UI:
+    def __init__(self):
+        self.font_large = get_font(TITLE_FONT_SIZE)
+        self.font_medium = get_font(MENU_FONT_SIZE)
+        self.font_small = get_font(HUD_FONT_SIZE)
+        self.font_score = get_font(SCORE_FONT_SIZE)
+
+        # HUD labels
+        self.hud_score = HudText(self.font_score, "SCORE: {}", WHITE, topleft=(20, 20))
+        self.hud_level = HudText(self.font_score, "LEVEL: {}", WHITE, center=(SCREEN_WIDTH // 2, 30))
+        self.hud_length = HudText(self.font_small, "LENGTH: {}/{}", WHITE, center=(SCREEN_WIDTH // 2, 60))
+        self.hud_speed = HudText(self.font_small, "SPEED: {:.1f}", WHITE, right=SCREEN_WIDTH - 20, top=20)
+        self.hud_combo = HudText(self.font_medium, "COMBO x{}!", YELLOW,
+                                 center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 100))
+        self.hud_players = HudText(self.font_small, "PLAYERS: {}", WHITE, right=SCREEN_WIDTH - 20, top=20)
+        self.hud_net_length = HudText(self.font_small, "LENGTH: {}", WHITE, center=(SCREEN_WIDTH // 2, 30))
+
+        # Screen widgets, built once and reused every frame
+        self.menu_buttons = self.create_menu_buttons()
+        self.back_button = Button(
+            SCREEN_WIDTH // 2 - 150,
+            SCREEN_HEIGHT - 100,
+            300, 50,
+            "BACK TO MENU", GREEN, (100, 255, 100)
+        )
+        self.level_complete_buttons = self.create_game_over_buttons("NEXT LEVEL")
+        self.game_over_buttons = self.create_game_over_buttons("PLAY AGAIN")
+
+        # Composed static screens, most recently used last
+        self.screens = OrderedDict()
+
+        # Pause overlay, drawn once
+        self.pause_overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+        self.pause_overlay.fill((0, 0, 0, 128))  # Black with 50% opacity
+
+    def create_menu_buttons(self):
+        """Build the main menu buttons"""
         button_width = 300
         button_height = 60
         button_y_start = 250
@@ -87,16 +185,89 @@ class UI:
             "QUIT", RED, (255, 100, 100)
         )
 
-        # Draw buttons
-        buttons = [play_button, instructions_button, quit_button]
-        return buttons
+        return [play_button, instructions_button, quit_button]
+
+    def create_game_over_buttons(self, first_text):
+        """Build the game over buttons, led by NEXT LEVEL or PLAY AGAIN"""
+        button_width = 300
+        button_height = 60
+
+        first_button = Button(
+            SCREEN_WIDTH // 2 - button_width // 2,
+            400,
+            button_width, button_height,
+            first_text, GREEN, (100, 255, 100)
+        )
+        menu_button = Button(
+            SCREEN_WIDTH // 2 - button_width // 2,
+            480,
+            button_width, button_height,
+            "MAIN MENU", BLUE, (100, 150, 255)
+        )
+        return [first_button, menu_button]
+
+    def static_screen(self, key, draw, buttons, *args):
+        """Get a composed screen from the cache, drawing it on a miss"""
+        static = self.screens.get(key)
+        if static is None:
+            background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+            draw(background, *args)
+            static = StaticScreen(background, buttons)
+            self.screens[key] = static
+            if len(self.screens) > SCREEN_CACHE_SIZE:
+                self.screens.popitem(last=False)
+        else:
+            self.screens.move_to_end(key)
+        return static
+
+    def main_menu_screen(self, high_score):
+        """The main menu for a high score"""
+        return self.static_screen(("menu", high_score, quality.level), self.draw_main_menu,
+                                  self.menu_buttons, high_score)
+
+    def instructions_screen(self):
+        """The instructions screen"""
+        return self.static_screen(("instructions",), self.draw_instructions, [self.back_button])
+
+    def game_over_screen(self, score, length, level_complete, high_score):
+        """The game over or level complete screen for a finished game"""
+        buttons = self.level_complete_buttons if level_complete else self.game_over_buttons
+        return self.static_screen(("game_over", score, length, level_complete, high_score),
+                                  self.draw_game_over, buttons, score, length, level_complete, high_score)
+
+    def draw_main_menu(self, screen, high_score):
+        """Draw the main menu, apart from its buttons"""
+        screen.fill(BACKGROUND)
+
+        # Draw title with glow effect
+        title = text_cache.render(self.font_large, "EMERALD SERPENT", GREEN)
+        title_rect = title.get_rect(center=(SCREEN_WIDTH // 2, 100))
+
+        # Draw glow effect
+        for offset in range(quality["title_glow"], 0, -1):
+            glow_color = (0, min(100 + offset * 30, 255), 0)
+            glow_surf = text_cache.render(self.font_large, "EMERALD SERPENT", glow_color)
+            glow_rect = glow_surf.get_rect(center=(SCREEN_WIDTH // 2 + offset, 100 + offset))
+            screen.blit(glow_surf, glow_rect)
+
+        screen.blit(title, title_rect)
+
+        # Draw subtitle
+        subtitle = text_cache.render(self.font_small, "The Mystical Garden Quest", YELLOW)
+        subtitle_rect = subtitle.get_rect(center=(SCREEN_WIDTH // 2, 160))
+        screen.blit(subtitle, subtitle_rect)
+
+        # Draw high score
+        high_score_text = text_cache.render(self.font_medium, f"HIGH SCORE: {high_score}", YELLOW)
+        high_score_rect = high_score_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 50))
+        screen.blit(high_score_text, high_score_rect)
 
     def draw_instructions(self, screen):
-        """Draw instructions screen"""
+        """Draw instructions screen, apart from the back button"""
         screen.fill(BACKGROUND)
 
         # Title
-        title = self.font_large.render("INSTRUCTIONS", True, YELLOW)
+        title = text_cache.render(self.font_large, "INSTRUCTIONS", YELLOW)
         title_rect = title.get_rect(center=(SCREEN_WIDTH // 2, 80))
         screen.blit(title, title_rect)
 
@@ -108,6 +279,7 @@ class UI:
             "- Move Left: LEFT ARROW or A",
             "- Move Right: RIGHT ARROW or D",
             "- Pause: P key",
+            "- Autopilot: TAB key",
             "- Menu: ESC key",
             "",
             "GAMEPLAY:",
@@ -131,61 +303,49 @@ class UI:
         for line in instructions:
             if ":" in line and not line.startswith("-"):
                 # Section headers
-                text = self.font_medium.render(line, True, BLUE)
+                text = text_cache.render(self.font_medium, line, BLUE)
             elif line.startswith("-"):
                 # List items
-                text = self.font_small.render(line, True, WHITE)
+                text = text_cache.render(self.font_small, line, WHITE)
             else:
                 # Regular text
-                text = self.font_small.render(line, True, YELLOW)
+                text = text_cache.render(self.font_small, line, YELLOW)
 
             text_rect = text.get_rect(center=(SCREEN_WIDTH // 2, y_offset))
             screen.blit(text, text_rect)
             y_offset += 30 if ":" in line and not line.startswith("-") else 25
 
-        # Back button
-        back_button = Button(
-            SCREEN_WIDTH // 2 - 150,
-            SCREEN_HEIGHT - 100,
-            300, 50,
-            "BACK TO MENU", GREEN, (100, 255, 100)
-        )
-        back_button.draw(screen)
-
-        return back_button
-
     def draw_hud(self, screen, score, length, level, speed, combo, target_length):
-        """Draw heads-up display during gameplay"""
-        # Draw score
-        score_text = self.font_score.render(f"SCORE: {score}", True, WHITE)
-        screen.blit(score_text, (20, 20))
+        """Draw heads-up display during gameplay, returning the rects that were touched"""
+        dirty = []
 
-        # Draw level and progress
-        level_text = self.font_score.render(f"LEVEL: {level + 1}", True, WHITE)
-        level_rect = level_text.get_rect(center=(SCREEN_WIDTH // 2, 30))
-        screen.blit(level_text, level_rect)
-
-        # Draw length and target
-        length_text = self.font_small.render(f"LENGTH: {length}/{target_length}", True, WHITE)
-        length_rect = length_text.get_rect(center=(SCREEN_WIDTH // 2, 60))
-        screen.blit(length_text, length_rect)
+        # Draw score, level and progress
+        dirty.append(self.hud_score.draw(screen, score))
+        dirty.append(self.hud_level.draw(screen, level + 1))
+        dirty.append(self.hud_length.draw(screen, length, target_length))
 
         # Draw speed
-        speed_text = self.font_small.render(f"SPEED: {speed:.1f}", True, WHITE)
-        speed_rect = speed_text.get_rect(right=SCREEN_WIDTH - 20, top=20)
-        screen.blit(speed_text, speed_rect)
+        dirty.append(self.hud_speed.draw(screen, speed))
 
         # Draw combo if active
         if combo > 1:
-            combo_text = self.font_medium.render(f"COMBO x{combo}!", True, YELLOW)
-            combo_rect = combo_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 100))
-            screen.blit(combo_text, combo_rect)
+            dirty.append(self.hud_combo.draw(screen, combo))
 
         # Draw power-up indicators
         # (These would show active power-ups)
 
-    def draw_game_over(self, screen, score, length, level_complete):
-        """Draw game over or level complete screen"""
+        return dirty
+
+    def draw_multiplayer_hud(self, screen, score, length, players):
+        """Draw the heads-up display for network games, returning the rects that were touched"""
+        return [
+            self.hud_score.draw(screen, score),
+            self.hud_net_length.draw(screen, length),
+            self.hud_players.draw(screen, players),
+        ]
+
+    def draw_game_over(self, screen, score, length, level_complete, high_score):
+        """Draw game over or level complete screen, apart from its buttons"""
         screen.fill(BACKGROUND)
 
         if level_complete:
@@ -195,7 +355,7 @@ class UI:
             title_text = "GAME OVER"
             title_color = RED
 
-        title = self.font_large.render(title_text, True, title_color)
+        title = text_cache.render(self.font_large, title_text, title_color)
         title_rect = title.get_rect(center=(SCREEN_WIDTH // 2, 150))
         screen.blit(title, title_rect)
 
@@ -208,62 +368,27 @@ class UI:
 
         y_offset = 250
         for stat in stats:
-            stat_text = self.font_medium.render(stat, True, WHITE)
+            stat_text = text_cache.render(self.font_medium, stat, WHITE)
             stat_rect = stat_text.get_rect(center=(SCREEN_WIDTH // 2, y_offset))
             screen.blit(stat_text, stat_rect)
             y_offset += 50
 
-        # Create buttons
-        button_width = 300
-        button_height = 60
-
-        if level_complete:
-            next_button = Button(
-                SCREEN_WIDTH // 2 - button_width // 2,
-                400,
-                button_width, button_height,
-                "NEXT LEVEL", GREEN, (100, 255, 100)
-            )
-            menu_button = Button(
-                SCREEN_WIDTH // 2 - button_width // 2,
-                480,
-                button_width, button_height,
-                "MAIN MENU", BLUE, (100, 150, 255)
-            )
-            buttons = [next_button, menu_button]
-        else:
-            restart_button = Button(
-                SCREEN_WIDTH // 2 - button_width // 2,
-                400,
-                button_width, button_height,
-                "PLAY AGAIN", GREEN, (100, 255, 100)
-            )
-            menu_button = Button(
-                SCREEN_WIDTH // 2 - button_width // 2,
-                480,
-                button_width, button_height,
-                "MAIN MENU", BLUE, (100, 150, 255)
-            )
-            buttons = [restart_button, menu_button]
-
-        for button in buttons:
-            button.draw(screen)
-
-        return buttons
+        # Draw high score
+        high_score_text = text_cache.render(self.font_medium, f"HIGH SCORE: {high_score}", YELLOW)
+        high_score_rect = high_score_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT - 100))
+        screen.blit(high_score_text, high_score_rect)
 
     def draw_pause(self, screen):
         """Draw pause screen overlay"""
         # Semi-transparent overlay
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 128))  # Black with 50% opacity
-        screen.blit(overlay, (0, 0))
+        screen.blit(self.pause_overlay, (0, 0))
 
         # Pause text
-        pause_text = self.font_large.render("PAUSED", True, YELLOW)
+        pause_text = text_cache.render(self.font_large, "PAUSED", YELLOW)
         pause_rect = pause_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
         screen.blit(pause_text, pause_rect)
 
         # Instructions
-        continue_text = self.font_small.render("Press P to continue", True, WHITE)
+        continue_text = text_cache.render(self.font_small, "Press P to continue", WHITE)
         continue_rect = continue_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 80))
         screen.blit(continue_text, continue_rect)
\ No newline at end of file
@@ -0,0 +1,235 @@
+# world.py - Snake rules for many snakes sharing one board
+import random
+from config import *
+from cells import FreeCells, BodyCells, to_index, to_position, in_bounds
+from snake import Snake
+from food import Food
+from grid import Grid
+
+
+class World:
+    """Many snakes, their food and a level's obstacles on one board.
+
+    Like SnakeSim this never calls into pygame, and every snake moves,
+    eats and grows by the single-player rules. Snakes share one BodyCells
+    grid, so a crash into any snake is found by looking at the cell the
+    head moved onto. Crashed snakes respawn somewhere free.
+
+    Each update returns a list of events for a server to broadcast or a
+    renderer to draw:
+
+        ("spawn", snake_id, cells)     snake placed, packed cells head first
+        ("move", snake_id, direction)  new head one step along direction
+        ("tail", snake_id)             tail segment removed
+        ("death", snake_id, head)      snake crashed and left the board
+        ("leave", snake_id)            snake removed for good
+        ("food_removed", cell)
+        ("food_added", cell, food_type)
+        ("score", snake_id, score)
+
+    Events caused by add_snake and remove_snake between updates are
+    returned by the next update.
+    """
+
+    def __init__(self, width=WORLD_WIDTH, height=WORLD_HEIGHT, seed=None, level=0):
+        self.width = width
+        self.height = height
+        self.rng = random.Random(seed)
+        self.tick_count = 0
+        self.game_time = 0
+
+        self.free_cells = FreeCells(width * height)
+        self.body_cells = BodyCells(width * height)
+        self.grid = Grid(self.free_cells, width, height)
+        self.grid.load_level(level)
+
+        # Snakes on the board, and crashed ones waiting for room to respawn
+        self.snakes = {}
+        self.waiting = {}
+        self.scores = {}
+        self.foods_eaten = {}
+        self.free_ids = []
+        self.next_id = 1
+
+        # Food by packed cell
+        self.foods = {}
+        self.events = []
+
+    def find_start(self, attempts=100):
+        """Pick a head cell with room for a new snake, or None if none was found.
+
+        New snakes trail to the left of their head and set off to the
+        right, so the cells behind and SPAWN_CLEARANCE ahead must be free.
+        """
+        for _ in range(attempts):
+            index = self.free_cells.choice(self.rng)
+            if index is None:
+                return None
+
+            x, y = to_position(index, self.width)
+            if all(in_bounds(cell_x, y, self.width, self.height) and
+                   self.free_cells.is_free(to_index(cell_x, y, self.width))
+                   for cell_x in range(x - SNAKE_START_LENGTH + 1, x + SPAWN_CLEARANCE + 1)):
+                return x, y
+        return None
+
+    def add_snake(self):
+        """Put a new snake on the board and return its id, or None if there is no room"""
+        start = self.find_start()
+        if start is None:
+            return None
+
+        if self.free_ids:
+            snake_id = self.free_ids.pop()
+        elif self.next_id <= 0xFFFF:
+            snake_id = self.next_id
+            self.next_id += 1
+        else:
+            return None
+
+        snake = Snake(self.free_cells, self.width, self.height, self.body_cells, snake_id, start)
+        self.snakes[snake_id] = snake
+        self.scores[snake_id] = 0
+        self.foods_eaten[snake_id] = 0
+        self.events.append(("spawn", snake_id, tuple(snake.body)))
+        self.events.append(("score", snake_id, 0))
+        self.top_up_food()
+        return snake_id
+
+    def remove_snake(self, snake_id):
+        """Take a snake off the board for good"""
+        snake = self.snakes.pop(snake_id, None) or self.waiting.pop(snake_id, None)
+        if snake is None:
+            return
+
+        snake.clear_body()
+        del self.scores[snake_id]
+        del self.foods_eaten[snake_id]
+        self.free_ids.append(snake_id)
+        self.events.append(("leave", snake_id))
+
+    def steer(self, snake_id, direction):
+        """Turn a snake (180-degree turns are ignored, as in Snake.change_direction)"""
+        snake = self.snakes.get(snake_id)
+        if snake is not None:
+            snake.change_direction(direction)
+
+    def update(self, dt):
+        """Advance every snake by dt seconds and return the events"""
+        self.tick_count += 1
+        self.game_time += dt
+        events = self.events
+
+        # Move everything first, so crashes do not depend on the order
+        # snakes are visited in (a tail moving away this tick is safe)
+        moved = []
+        for snake_id, snake in self.snakes.items():
+            if not snake.update(dt):
+                continue
+            moved.append(snake_id)
+            while self._record_move(snake_id, snake) and snake.move_if_due():
+                pass
+
+        crashed = [snake_id for snake_id in moved if self.crashed(self.snakes[snake_id])]
+        for snake_id in crashed:
+            self.kill(snake_id)
+
+        for snake_id in moved:
+            snake = self.snakes.get(snake_id)
+            if snake is not None:
+                food = self.foods.get(snake.body[0])
+                if food is not None:
+                    self.eat(snake_id, snake, food)
+
+        # Respawn food that has been lying around too long
+        for food in list(self.foods.values()):
+            if not food.update(self.game_time):
+                self.respawn_food(food)
+
+        for snake_id in list(self.waiting):
+            self.respawn(snake_id)
+
+        self.events = []
+        return events
+
+    def _record_move(self, snake_id, snake):
+        """Add the events for a move just made, returning False if it left the board"""
+        if not in_bounds(*snake.head, self.width, self.height):
+            return False
+
+        self.events.append(("move", snake_id, snake.direction))
+        if snake.vacated is not None:
+            self.events.append(("tail", snake_id))
+        return True
+
+    def crashed(self, snake):
+        """Check if a snake hit a wall, an obstacle or any snake's body"""
+        return (snake.check_wall_collision() or
+                snake.check_self_collision() or
+                snake.check_obstacle_collision(self.grid))
+
+    def kill(self, snake_id):
+        """Take a crashed snake off the board until it can respawn"""
+        snake = self.snakes.pop(snake_id)
+        self.events.append(("death", snake_id, snake.head))
+        snake.clear_body()
+        self.waiting[snake_id] = snake
+
+    def respawn(self, snake_id):
+        """Put a crashed snake back on the board if there is room"""
+        start = self.find_start()
+        if start is None:
+            return
+
+        snake = self.waiting.pop(snake_id)
+        snake.reset(start)
+        self.snakes[snake_id] = snake
+        self.scores[snake_id] = 0
+        self.foods_eaten[snake_id] = 0
+        self.events.append(("spawn", snake_id, tuple(snake.body)))
+        self.events.append(("score", snake_id, 0))
+
+    def eat(self, snake_id, snake, food):
+        """Score a piece of food for a snake and put it somewhere else"""
+        self.scores[snake_id] += food.get_points()
+        self.events.append(("score", snake_id, self.scores[snake_id]))
+
+        effect = food.get_effect()
+        if "grow" in effect:
+            snake.grow(effect["grow"])
+        if effect.get("speed_boost"):
+            snake.activate_speed_boost()
+
+        # Gradually increase speed, as in the single-player game
+        self.foods_eaten[snake_id] += 1
+        if self.foods_eaten[snake_id] % 5 == 0:
+            snake.increase_speed()
+
+        self.respawn_food(food)
+
+    def respawn_food(self, food):
+        """Move a piece of food to a new random cell"""
+        cell = to_index(*food.position, self.width)
+        del self.foods[cell]
+        self.events.append(("food_removed", cell))
+        self.place_food(food)
+
+    def place_food(self, food):
+        """Spawn food on a free cell and index it, returning False if the board is full"""
+        if not food.spawn(self.game_time):
+            return False
+        cell = to_index(*food.position, self.width)
+        self.foods[cell] = food
+        self.events.append(("food_added", cell, food.type))
+        return True
+
+    def top_up_food(self):
+        """Add food until there is WORLD_FOODS_PER_SNAKE pieces per snake"""
+        target = WORLD_FOODS_PER_SNAKE * max(1, len(self.snakes) + len(self.waiting))
+        while len(self.foods) < target:
+            food = Food(self.free_cells, self.game_time, self.rng, self.width)
+            if food.position is None:
+                break
+            cell = to_index(*food.position, self.width)
+            self.foods[cell] = food
+            self.events.append(("food_added", cell, food.type))